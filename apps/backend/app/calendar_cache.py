@@ -0,0 +1,133 @@
+"""
+Bounded in-process cache of encoded /calendar responses.
+
+Members browse the same few weeks at the same few branches, so the JSON
+body for a (range, branch set, bucket set, has_spots) key is kept as bytes
+and a repeat request skips the join, the event dicts and the encoder.
+
+An entry is stored with the ETag it was built under (app/data_version.py),
+which already covers the key and the versions of its branches ("*" when
+the request named none), so a lookup is one dict probe and a string
+compare. Entries are also dropped as soon as their branches' counters move,
+whether from this process's enrollments or another worker's
+(VERSIONS.subscribe): an enrollment at one branch evicts the views of that
+branch and the all-branch views, and leaves every other branch's views
+alone.
+
+Size is bounded by entry count (OLIVIA_CALENDAR_CACHE_SIZE) and by the
+total size of the cached bodies (OLIVIA_CALENDAR_CACHE_MB), least recently
+used first; a body bigger than a quarter of the byte budget is not cached.
+"""
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, NamedTuple, Optional, Set, Tuple
+
+from . import metrics
+from .data_version import ALL, EPOCH, VERSIONS
+
+MAX_ENTRIES = int(os.getenv("OLIVIA_CALENDAR_CACHE_SIZE", "256"))
+MAX_BYTES = int(float(os.getenv("OLIVIA_CALENDAR_CACHE_MB", "64")) * (1 << 20))
+
+metrics.describe("olivia_calendar_cache_total", "counter", "Calendar cache lookups, by result (hit, miss, stale).")
+metrics.describe("olivia_calendar_cache_evictions_total", "counter", "Calendar cache entries dropped, by reason (size, invalidated).")
+metrics.describe("olivia_calendar_cache_entries", "gauge", "Calendar responses held in the cache.")
+metrics.describe("olivia_calendar_cache_bytes", "gauge", "Bytes of encoded calendar responses held in the cache.")
+
+
+class _Entry(NamedTuple):
+    etag: str
+    body: bytes
+    scopes: Tuple[str, ...]
+
+
+class CalendarCache:
+    def __init__(self, max_entries: int = MAX_ENTRIES, max_bytes: int = MAX_BYTES) -> None:
+        self.max_entries = max(0, max_entries)
+        self.max_bytes = max(0, max_bytes)
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._by_scope: Dict[str, Set[str]] = {}
+        self._bytes = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    def get(self, key: str, etag: str) -> Optional[bytes]:
+        """The cached body for `key` if it was built under `etag`."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                result = "miss"
+            elif entry.etag != etag:
+                self._drop_locked(key)  # built under older versions; the subscriber usually got there first
+                result = "stale"
+            else:
+                self._entries.move_to_end(key)
+                result = "hit"
+        metrics.inc("olivia_calendar_cache_total", result=result)
+        if result != "hit":
+            return None
+        return entry.body
+
+    def put(self, key: str, etag: str, body: bytes, branch_ids: Optional[Iterable[str]]) -> None:
+        if not self.enabled or len(body) > self.max_bytes // 4:
+            return
+        scopes = tuple(sorted(set(branch_ids))) if branch_ids else (ALL,)
+        evicted = 0
+        with self._lock:
+            if key in self._entries:
+                self._drop_locked(key)
+            self._entries[key] = _Entry(etag, body, scopes)
+            for s in scopes:
+                self._by_scope.setdefault(s, set()).add(key)
+            self._bytes += len(body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop_locked(next(iter(self._entries)))
+                evicted += 1
+            self._gauges_locked()
+        if evicted:
+            metrics.inc("olivia_calendar_cache_evictions_total", evicted, reason="size")
+
+    def invalidate(self, scopes: Iterable[str]) -> None:
+        """Drop the entries that show any of these branches ("*": every entry for all branches; "#epoch": everything)."""
+        scopes = set(scopes)
+        with self._lock:
+            if EPOCH in scopes:
+                keys = set(self._entries)
+            else:
+                # an all-branch view shows every branch, so it goes whenever any branch moves
+                keys = set(self._by_scope.get(ALL, ())) if scopes else set()
+                for s in scopes:
+                    keys |= self._by_scope.get(s, set())
+            for key in keys:
+                self._drop_locked(key)
+            self._gauges_locked()
+        if keys:
+            metrics.inc("olivia_calendar_cache_evictions_total", len(keys), reason="invalidated")
+
+    def clear(self) -> None:
+        self.invalidate({EPOCH})
+
+    def _drop_locked(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._bytes -= len(entry.body)
+        for s in entry.scopes:
+            keys = self._by_scope.get(s)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_scope[s]
+
+    def _gauges_locked(self) -> None:
+        metrics.set_gauge("olivia_calendar_cache_entries", len(self._entries))
+        metrics.set_gauge("olivia_calendar_cache_bytes", self._bytes)
+
+
+CALENDAR_CACHE = CalendarCache()
+VERSIONS.subscribe(CALENDAR_CACHE.invalidate)
@@ -1,18 +1,19 @@
 import json
 import random
 import sqlite3
+import threading
 from datetime import datetime, timedelta
 from pathlib import Path
+from typing import Dict, List, Tuple
 from zoneinfo import ZoneInfo
 
+from . import hours_engine
+from .config_registry import CATALOG, FACILITIES
+
 TZ = ZoneInfo("America/New_York")
 
 BACKEND_DIR = Path(__file__).resolve().parents[1]         # .../apps/backend
 DB_PATH = BACKEND_DIR / "data" / "olivia.db"
-CONFIG_DIR = BACKEND_DIR.parent / "configs"               # .../Olivia/configs
-
-FACILITIES_PATH = CONFIG_DIR / "facilities.json"
-CATALOG_PATH = CONFIG_DIR / "class_catalog.json"
 
 def conn() -> sqlite3.Connection:
     DB_PATH.parent.mkdir(parents=True, exist_ok=True)
@@ -20,6 +21,14 @@ def conn() -> sqlite3.Connection:
     c.row_factory = sqlite3.Row
     return c
 
+_BUMP = "INSERT INTO data_versions(scope, version) VALUES ({}, 1) ON CONFLICT(scope) DO UPDATE SET version = version + 1"
+
+_VERSION_TRIGGERS = [
+    ("sessions", "INSERT", ("NEW.branch_id", "'*'", "'#schedule'")),
+    ("sessions", "UPDATE", ("OLD.branch_id", "NEW.branch_id", "'*'", "'#schedule'")),
+    ("sessions", "DELETE", ("OLD.branch_id", "'*'", "'#schedule'")),
+] + [(table, op, ("'#epoch'", "'#schedule'")) for table in ("classes", "branches") for op in ("INSERT", "UPDATE", "DELETE")]
+
 def init_db() -> None:
     c = conn()
     cur = c.cursor()
@@ -71,12 +80,75 @@ def init_db() -> None:
     );
     """)
 
+    # one row per (tag, class), lowercased: tag filters become an indexed lookup instead of JSON parsing
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS class_tags (
+      tag TEXT NOT NULL,
+      class_id TEXT NOT NULL,
+      PRIMARY KEY (tag, class_id)
+    ) WITHOUT ROWID;
+    """)
+
+    # member directory (app/members.py): profiles by id, plus which roster files were imported
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS members (
+      id TEXT PRIMARY KEY,
+      home_branch_id TEXT,
+      email TEXT,
+      phone TEXT,
+      updated_at TEXT NOT NULL
+    ) WITHOUT ROWID;
+    """)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS member_sources (
+      source TEXT PRIMARY KEY,
+      stamp TEXT NOT NULL,
+      rows INTEGER NOT NULL,
+      imported_at TEXT NOT NULL
+    );
+    """)
+
+    # per-branch write counters behind the /calendar and /sessions ETags (app/data_version.py)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS data_versions (
+      scope TEXT PRIMARY KEY,
+      version INTEGER NOT NULL
+    ) WITHOUT ROWID;
+    """)
+    cur.execute("INSERT OR IGNORE INTO data_versions(scope, version) VALUES ('#epoch', abs(random()))")
+    # every schedule write, whoever makes it (seed, an import, sqlite3 by hand), moves '#schedule' (the
+    # schedule index rebuilds on it) and the ETag counters: a session's branch and "*", or "#epoch" when a
+    # class or branch changes, since those show up in every branch's responses
+    for table, op, scopes in _VERSION_TRIGGERS:
+        name = f"trg_{table}_{op.lower()}_version"
+        cur.execute(f"DROP TRIGGER IF EXISTS {name}")  # recreated so a new definition reaches existing databases
+        cur.execute(f"CREATE TRIGGER {name} AFTER {op} ON {table} BEGIN {''.join(_BUMP.format(s) + ';' for s in scopes)} END;")
+
     cur.execute("CREATE INDEX IF NOT EXISTS idx_sessions_start ON sessions(start_ts);")
     cur.execute("CREATE INDEX IF NOT EXISTS idx_sessions_branch_start ON sessions(branch_id, start_ts);")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_class_tags_class ON class_tags(class_id);")
+    # lets the schedule index pick up only the enrollment counts that changed
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_enrollments_updated ON enrollments(updated_at);")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_members_updated ON members(updated_at);")
 
+    sync_class_tags(c)
     c.commit()
     c.close()
 
+def sync_class_tags(c: sqlite3.Connection) -> None:
+    """Rebuild class_tags from classes.tags_json (the catalog is small; callers commit)."""
+    before = {tuple(r) for r in c.execute("SELECT tag, class_id FROM class_tags")}
+    c.execute("DELETE FROM class_tags")
+    c.execute("""
+    INSERT OR IGNORE INTO class_tags(tag, class_id)
+    SELECT LOWER(j.value), cl.id FROM classes cl, json_each(cl.tags_json) j
+    """)
+    if {tuple(r) for r in c.execute("SELECT tag, class_id FROM class_tags")} != before:
+        # tags are in every branch's responses: retire all ETags and rebuild the schedule index
+        for scope in ("'#epoch'", "'#schedule'"):
+            c.execute(_BUMP.format(scope))
+    reload_class_tags()
+
 def seed(seed: int = 42, days: int = 21) -> None:
     random.seed(seed)
     c = conn()
@@ -86,21 +158,21 @@ def seed(seed: int = 42, days: int = 21) -> None:
         return int(c.execute(f"SELECT COUNT(*) AS n FROM {table}").fetchone()["n"])
 
     if _count("branches") == 0:
-        facilities = json.loads(FACILITIES_PATH.read_text())
-        for b in facilities["branches"]:
-            cur.execute("INSERT OR IGNORE INTO branches(id,name) VALUES (?,?)", (b["id"], b["name"]))
+        for b in FACILITIES.get().branches:
+            cur.execute("INSERT OR IGNORE INTO branches(id,name) VALUES (?,?)", (b.id, b.name))
 
     if _count("classes") == 0:
-        cat = json.loads(CATALOG_PATH.read_text())
-        for cl in cat["classes"]:
+        for cl in CATALOG.get().classes:
             cur.execute(
                 "INSERT OR IGNORE INTO classes(id,name,bucket,tags_json,default_location,default_duration_min) VALUES (?,?,?,?,?,?)",
                 (
-                    cl["id"], cl["name"], cl["bucket"], json.dumps(cl["tags"]),
-                    cl["default_location"], int(cl["default_duration_min"])
+                    cl.id, cl.name, cl.bucket, json.dumps(list(cl.tags)),
+                    cl.default_location, cl.default_duration_min
                 )
             )
 
+    sync_class_tags(c)
+
     if _count("sessions") == 0:
         branches = c.execute("SELECT id,name FROM branches").fetchall()
         classes = c.execute("SELECT * FROM classes").fetchall()
@@ -112,6 +184,7 @@ def seed(seed: int = 42, days: int = 21) -> None:
         ]
 
         today = datetime.now(TZ).replace(hour=0, minute=0, second=0, microsecond=0)
+        hours = hours_engine.get()
 
         for d in range(days):
             day = today + timedelta(days=d)
@@ -133,6 +206,8 @@ def seed(seed: int = 42, days: int = 21) -> None:
                     start = day.replace(hour=hh, minute=mm)
                     dur = int(cl["default_duration_min"])
                     end = start + timedelta(minutes=dur)
+                    if not hours.fits(branch_id, start.isoformat(), end.isoformat()):
+                        continue  # closed then (early slots, Sundays, holidays)
 
                     session_id = f"s_{branch_id}_{start.strftime('%Y%m%d_%H%M')}_{cl['id']}"
                     cap = random.choice([8, 12, 16, 20, 25, 30, 40, 70])
@@ -163,6 +238,39 @@ def seed(seed: int = 42, days: int = 21) -> None:
     c.commit()
     c.close()
 
+# class_id -> tags as listed in the catalog, decoded once instead of per row
+_CLASS_TAGS: Dict[str, Tuple[str, ...]] = {}
+_CLASS_TAGS_LOADED = False
+_CLASS_TAGS_LOCK = threading.Lock()
+
+def reload_class_tags() -> None:
+    global _CLASS_TAGS_LOADED
+    with _CLASS_TAGS_LOCK:
+        _CLASS_TAGS_LOADED = False
+
+def _load_class_tags() -> None:
+    global _CLASS_TAGS, _CLASS_TAGS_LOADED
+    c = conn()
+    try:
+        rows = c.execute("SELECT id, tags_json FROM classes").fetchall()
+    finally:
+        c.close()
+    _CLASS_TAGS = {r["id"]: tuple(json.loads(r["tags_json"] or "[]")) for r in rows}
+    _CLASS_TAGS_LOADED = True
+
+def class_tags(class_id: str) -> List[str]:
+    """Catalog tags for a class (a fresh list; safe to hand to callers)."""
+    tags = _CLASS_TAGS.get(class_id) if _CLASS_TAGS_LOADED else None
+    if tags is None:
+        # first use, after a reseed, or a class this process hasn't seen
+        with _CLASS_TAGS_LOCK:
+            if not _CLASS_TAGS_LOADED or class_id not in _CLASS_TAGS:
+                _load_class_tags()
+            # still unknown: remember it as untagged; a catalog change moves
+            # "#epoch", which reloads the map (data_version)
+            tags = _CLASS_TAGS.setdefault(class_id, ())
+    return list(tags)
+
 def availability_color(enrolled: int, capacity: int) -> str:
     # YOUR RULES:
     # amber >= 80% full, red = 100% full
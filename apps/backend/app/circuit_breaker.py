@@ -0,0 +1,126 @@
+"""
+Circuit breaker for the Ollama client.
+
+closed     -> calls flow; the last OLIVIA_LLM_BREAKER_WINDOW outcomes are tracked
+open       -> calls fail fast with CircuitOpen for OLIVIA_LLM_BREAKER_COOLDOWN_S
+half_open  -> a single probe call is let through; success closes, failure re-opens
+
+A call counts against the breaker if it errors/times out or takes longer
+than OLIVIA_LLM_SLOW_CALL_S (a model reload looks like a run of slow calls).
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import deque
+from typing import Deque, Tuple
+
+from . import metrics
+
+WINDOW = int(os.getenv("OLIVIA_LLM_BREAKER_WINDOW", "20"))
+MIN_CALLS = int(os.getenv("OLIVIA_LLM_BREAKER_MIN_CALLS", "5"))
+FAILURE_RATE = float(os.getenv("OLIVIA_LLM_BREAKER_FAILURE_RATE", "0.5"))
+SLOW_CALL_S = float(os.getenv("OLIVIA_LLM_SLOW_CALL_S", "15"))
+COOLDOWN_S = float(os.getenv("OLIVIA_LLM_BREAKER_COOLDOWN_S", "30"))
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+_STATE_CODES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+metrics.describe("olivia_llm_breaker_state", "gauge", "LLM circuit breaker state (0 closed, 1 half_open, 2 open).")
+metrics.describe("olivia_llm_breaker_transitions_total", "counter", "LLM circuit breaker state changes, by target state.")
+metrics.describe("olivia_llm_breaker_rejected_total", "counter", "LLM calls failed fast by an open breaker.")
+metrics.describe("olivia_llm_breaker_outcomes_total", "counter", "LLM call outcomes seen by the breaker (ok, slow, error).")
+
+
+class CircuitOpen(Exception):
+    """The breaker is open (or half-open with a probe already in flight)."""
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        window: int = WINDOW,
+        min_calls: int = MIN_CALLS,
+        failure_rate: float = FAILURE_RATE,
+        slow_call_s: float = SLOW_CALL_S,
+        cooldown_s: float = COOLDOWN_S,
+    ) -> None:
+        self.min_calls = max(1, min_calls)
+        self.failure_rate = failure_rate
+        self.slow_call_s = slow_call_s
+        self.cooldown_s = cooldown_s
+        self._lock = threading.Lock()
+        self._outcomes: Deque[bool] = deque(maxlen=max(1, window))  # True = bad (error or slow)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        metrics.set_gauge("olivia_llm_breaker_state", 0)
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._maybe_half_open_locked()
+            return self._state
+
+    def _set_state_locked(self, state: str) -> None:
+        if state == self._state:
+            return
+        self._state = state
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+        if state != HALF_OPEN:
+            self._probe_in_flight = False
+        if state == CLOSED:
+            self._outcomes.clear()
+        metrics.inc("olivia_llm_breaker_transitions_total", to=state)
+        metrics.set_gauge("olivia_llm_breaker_state", _STATE_CODES[state])
+
+    def _maybe_half_open_locked(self) -> None:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.cooldown_s:
+            self._set_state_locked(HALF_OPEN)
+
+    def acquire(self) -> bool:
+        """
+        Admit a call or raise CircuitOpen. Returns True when the caller is the
+        half-open probe (it must then report back via record/abandon).
+        """
+        with self._lock:
+            self._maybe_half_open_locked()
+            if self._state == CLOSED:
+                return False
+            if self._state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            metrics.inc("olivia_llm_breaker_rejected_total")
+            raise CircuitOpen(f"LLM circuit {self._state}")
+
+    def record(self, probe: bool, ok: bool, latency_s: float) -> None:
+        bad = (not ok) or latency_s > self.slow_call_s
+        metrics.inc("olivia_llm_breaker_outcomes_total", outcome="error" if not ok else ("slow" if bad else "ok"))
+        with self._lock:
+            if probe or self._state == HALF_OPEN:
+                self._set_state_locked(OPEN if bad else CLOSED)
+                return
+            if self._state != CLOSED:
+                return
+            self._outcomes.append(bad)
+            n = len(self._outcomes)
+            if n >= self.min_calls and sum(self._outcomes) / n >= self.failure_rate:
+                self._set_state_locked(OPEN)
+
+    def abandon(self, probe: bool) -> None:
+        """The call never reached Ollama (queue full, client went away)."""
+        if probe:
+            with self._lock:
+                self._probe_in_flight = False
+
+    def snapshot(self) -> Tuple[str, int, int]:
+        with self._lock:
+            self._maybe_half_open_locked()
+            return self._state, sum(self._outcomes), len(self._outcomes)
+
+
+BREAKER = CircuitBreaker()
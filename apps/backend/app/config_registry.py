@@ -0,0 +1,296 @@
+"""
+Parsed configs/*.json, shared by every request.
+
+Each file is read and parsed once into immutable objects (NamedTuples,
+tuples and read-only id -> object maps). Readers call `.get()`, which costs
+at most one stat() every OLIVIA_CONFIG_CHECK_S seconds. When the file's
+mtime or size changes, the new contents are parsed to the side and swapped
+in with a single assignment: a request sees the old config or the new one,
+never a mix. A file that fails to parse on reload leaves the previous
+config in place (olivia_config_reloads_total{result="error"}) until it
+changes again, and so does a file that disappears; at startup the error
+is raised.
+
+`version` counts successful loads of a file and `version()` of all of
+them; caches built from a config (the branch gazetteer, the proximity
+matrix) rebuild when it moves.
+"""
+from __future__ import annotations
+
+import itertools
+import json
+import os
+import re
+import threading
+import time
+from datetime import date
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Generic, List, Mapping, NamedTuple, Optional, Tuple, TypeVar
+
+from . import metrics
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]  # .../apps/backend
+# /app/configs (Docker volume) or .../Olivia/configs (local checkout)
+CONFIG_DIR = BACKEND_DIR / "configs" if (BACKEND_DIR / "configs").exists() else BACKEND_DIR.parents[1] / "configs"
+
+CHECK_S = float(os.getenv("OLIVIA_CONFIG_CHECK_S", "1"))
+
+metrics.describe("olivia_config_reloads_total", "counter", "Config file loads, by file and result (ok, error).")
+metrics.describe("olivia_config_version", "gauge", "Successful loads of each config file since startup.")
+
+T = TypeVar("T")
+
+_VERSIONS = itertools.count(1)
+_VERSION = 0
+FILES: List["ConfigFile[Any]"] = []
+
+
+class _Loaded(NamedTuple):
+    stamp: Optional[Tuple[int, int]]  # (mtime_ns, size); None when the file is missing
+    value: Any
+    version: int
+
+
+class ConfigFile(Generic[T]):
+    def __init__(
+        self,
+        name: str,
+        parse: Callable[[Any, str], T],
+        missing: Optional[Callable[[], T]] = None,
+        check_s: float = CHECK_S,
+    ) -> None:
+        """`parse(raw_json, source)` raises ValueError on bad input; `missing()` is the value when the file is absent."""
+        self.name = name
+        self.path = CONFIG_DIR / name
+        self.check_s = check_s
+        self.last_error: Optional[str] = None
+        self._parse = parse
+        self._missing = missing
+        self._lock = threading.Lock()
+        self._loaded: Optional[_Loaded] = None
+        self._failed: Optional[Tuple[int, int]] = None
+        self._checked = 0.0
+        FILES.append(self)
+
+    def get(self) -> T:
+        return self.current()[0]
+
+    @property
+    def version(self) -> int:
+        return self.current()[1]
+
+    def current(self) -> Tuple[T, int]:
+        """(value, version), read together."""
+        loaded = self._loaded
+        if loaded is None or time.monotonic() - self._checked >= self.check_s:
+            loaded = self._refresh()
+        return loaded.value, loaded.version
+
+    def _stamp(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _read(self) -> T:
+        if not self.path.exists():
+            if self._missing is None:
+                raise ValueError(f"{self.path}: file not found")
+            return self._missing()
+        try:
+            raw = json.loads(self.path.read_text())
+        except json.JSONDecodeError as e:
+            raise ValueError(f"{self.path}: {e}") from e
+        return self._parse(raw, self.name)
+
+    def _refresh(self) -> _Loaded:
+        global _VERSION
+        with self._lock:
+            loaded = self._loaded
+            now = time.monotonic()
+            if loaded is not None and now - self._checked < self.check_s:
+                return loaded
+            stamp = self._stamp()
+            self._checked = now
+            if loaded is not None and stamp in (loaded.stamp, self._failed):
+                return loaded
+            try:
+                value = self._read()
+            except (ValueError, KeyError, TypeError) as e:
+                metrics.inc("olivia_config_reloads_total", file=self.name, result="error")
+                self.last_error = str(e)
+                if loaded is None:
+                    raise
+                self._failed = stamp
+                return loaded
+            _VERSION = next(_VERSIONS)
+            self._loaded = loaded = _Loaded(stamp, value, (loaded.version if loaded else 0) + 1)
+            self._failed = None
+            self.last_error = None
+            metrics.inc("olivia_config_reloads_total", file=self.name, result="ok")
+            metrics.set_gauge("olivia_config_version", loaded.version, file=self.name)
+            return loaded
+
+
+def version() -> int:
+    """Bumped by every successful load of any config file."""
+    return _VERSION
+
+
+def warm() -> None:
+    """Load every registered file now, so a malformed config fails startup instead of a request."""
+    for f in FILES:
+        f.get()
+
+
+def _expect(cond: bool, where: str, what: str) -> None:
+    if not cond:
+        raise ValueError(f"{where}: {what}")
+
+
+_HHMM_RE = re.compile(r"([01]\d|2[0-3]):[0-5]\d")
+
+
+def _hhmm_pair(value: Any, where: str) -> Optional[Tuple[str, str]]:
+    """[open, close] as zero-padded 24h "HH:MM", open before close ("24:00" closes at midnight)."""
+    if value is None:
+        return None
+    _expect(isinstance(value, list) and len(value) == 2 and all(isinstance(v, str) for v in value), where, "expected [\"HH:MM\", \"HH:MM\"] or null")
+    lo, hi = value
+    _expect(bool(_HHMM_RE.fullmatch(lo)) and (hi == "24:00" or bool(_HHMM_RE.fullmatch(hi))), where, "times must be \"HH:MM\" (00:00-23:59, or 24:00 to close at midnight)")
+    _expect(lo < hi, where, "opening time must be before closing time")
+    return lo, hi
+
+
+# ----------------------------
+# facilities.json
+# ----------------------------
+class Branch(NamedTuple):
+    id: str
+    name: str
+    aliases: Tuple[str, ...]
+
+
+class Facilities(NamedTuple):
+    branches: Tuple[Branch, ...]
+    by_id: Mapping[str, Branch]
+    # the same branches as read-only mappings (id, name, aliases) for dict-shaped callers
+    records: Tuple[Mapping[str, Any], ...]
+
+    def name(self, branch_id: str) -> str:
+        b = self.by_id.get(branch_id)
+        return b.name if b else branch_id
+
+
+def parse_facilities(raw: Any, source: str = "facilities") -> Facilities:
+    _expect(isinstance(raw, dict) and isinstance(raw.get("branches"), list), source, "expected {\"branches\": [...]}")
+    branches: List[Branch] = []
+    for n, b in enumerate(raw["branches"]):
+        where = f"{source}.branches[{n}]"
+        _expect(isinstance(b, dict), where, "expected an object")
+        bid, name, aliases = b.get("id"), b.get("name"), b.get("aliases") or []
+        _expect(isinstance(bid, str) and bid, where, "missing 'id'")
+        _expect(isinstance(name, str) and name, where, "missing 'name'")
+        _expect(isinstance(aliases, list) and all(isinstance(a, str) for a in aliases), where, "'aliases' must be a list of strings")
+        branches.append(Branch(bid, name, tuple(aliases)))
+    by_id = {b.id: b for b in branches}
+    _expect(len(by_id) == len(branches), source, "duplicate branch ids")
+    records = tuple(MappingProxyType({"id": b.id, "name": b.name, "aliases": b.aliases}) for b in branches)
+    return Facilities(tuple(branches), MappingProxyType(by_id), records)
+
+
+# ----------------------------
+# hours.json
+# ----------------------------
+DAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+
+class SundayOverride(NamedTuple):
+    open_branch_id: str
+    hours: Optional[Tuple[str, str]]
+
+
+class HoursException(NamedTuple):
+    date: str  # YYYY-MM-DD
+    branch_ids: Optional[Tuple[str, ...]]  # None: every branch
+    hours: Optional[Tuple[str, str]]  # None: closed all day
+    note: Optional[str]
+
+
+class Hours(NamedTuple):
+    timezone: str
+    default_hours: Mapping[str, Optional[Tuple[str, str]]]  # "mon".."sun" -> (open, close) or None
+    sunday_override: Optional[SundayOverride]
+    exceptions: Tuple[HoursException, ...] = ()  # holidays and closures, replacing the weekly hours on that date
+
+    def for_day(self, branch_id: str, day: str) -> Optional[Tuple[str, str]]:
+        """(open, close) for a branch on a weekday ("mon".."sun"); None when closed."""
+        if day == "sun" and self.sunday_override is not None:
+            return self.sunday_override.hours if branch_id == self.sunday_override.open_branch_id else None
+        return self.default_hours.get(day)
+
+
+def parse_hours(raw: Any, source: str = "hours") -> Hours:
+    _expect(isinstance(raw, dict) and isinstance(raw.get("default_hours"), dict), source, "expected {\"default_hours\": {...}}")
+    default = {d: _hhmm_pair(raw["default_hours"].get(d), f"{source}.default_hours.{d}") for d in DAYS}
+    override = None
+    so = raw.get("sunday_override")
+    if so is not None:
+        _expect(isinstance(so, dict) and isinstance(so.get("open_branch_id"), str), f"{source}.sunday_override", "missing 'open_branch_id'")
+        override = SundayOverride(so["open_branch_id"], _hhmm_pair(so.get("hours"), f"{source}.sunday_override.hours"))
+    exceptions: List[HoursException] = []
+    for n, x in enumerate(raw.get("exceptions") or []):
+        where = f"{source}.exceptions[{n}]"
+        _expect(isinstance(x, dict) and isinstance(x.get("date"), str), where, "missing 'date'")
+        try:
+            date.fromisoformat(x["date"])
+        except ValueError as e:
+            raise ValueError(f"{where}: 'date' must be YYYY-MM-DD") from e
+        ids = x.get("branch_ids")
+        _expect(ids is None or (isinstance(ids, list) and all(isinstance(i, str) for i in ids)), where, "'branch_ids' must be a list of strings or null")
+        exceptions.append(HoursException(x["date"], tuple(ids) if ids is not None else None, _hhmm_pair(x.get("hours"), f"{where}.hours"), x.get("note")))
+    return Hours(str(raw.get("timezone") or "America/New_York"), MappingProxyType(default), override, tuple(exceptions))
+
+
+# ----------------------------
+# class_catalog.json
+# ----------------------------
+class CatalogClass(NamedTuple):
+    id: str
+    name: str
+    bucket: str
+    tags: Tuple[str, ...]
+    default_location: str
+    default_duration_min: int
+
+
+class Catalog(NamedTuple):
+    buckets: Mapping[str, Tuple[str, ...]]
+    classes: Tuple[CatalogClass, ...]
+    by_id: Mapping[str, CatalogClass]
+
+
+def parse_catalog(raw: Any, source: str = "class_catalog") -> Catalog:
+    _expect(isinstance(raw, dict) and isinstance(raw.get("classes"), list), source, "expected {\"classes\": [...]}")
+    classes: List[CatalogClass] = []
+    for n, c in enumerate(raw["classes"]):
+        where = f"{source}.classes[{n}]"
+        _expect(isinstance(c, dict), where, "expected an object")
+        try:
+            classes.append(CatalogClass(
+                str(c["id"]), str(c["name"]), str(c["bucket"]), tuple(str(t) for t in c.get("tags") or []),
+                str(c["default_location"]), int(c["default_duration_min"]),
+            ))
+        except KeyError as e:
+            raise ValueError(f"{where}: missing {e}") from e
+    by_id = {c.id: c for c in classes}
+    _expect(len(by_id) == len(classes), source, "duplicate class ids")
+    buckets: Dict[str, Tuple[str, ...]] = {k: tuple(v) for k, v in (raw.get("buckets") or {}).items()}
+    return Catalog(MappingProxyType(buckets), tuple(classes), MappingProxyType(by_id))
+
+
+FACILITIES: ConfigFile[Facilities] = ConfigFile("facilities.json", parse_facilities)
+HOURS: ConfigFile[Hours] = ConfigFile("hours.json", parse_hours)
+CATALOG: ConfigFile[Catalog] = ConfigFile("class_catalog.json", parse_catalog)
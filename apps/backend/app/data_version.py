@@ -0,0 +1,148 @@
+"""
+Per-branch data versions, for strong ETags on /calendar and /sessions/{id}.
+
+Every write that changes what those endpoints return bumps a counter for
+each branch it touched and the "*" counter, in the same transaction:
+enrollments call bump(), schedule writes (sessions) are counted by
+triggers (calendar_store.init_db). The counters live in the data_versions table, so
+every worker derives the same ETag from the same data. Each process keeps
+a copy that it re-reads at most every OLIVIA_DATA_VERSION_REFRESH_S and
+updates at once after its own commits (note), so answering If-None-Match
+is a dict lookup and a hash: no SQLite on the request path.
+
+"#epoch" is a random number written when the table is created, so a
+rebuilt database never hands out an ETag from the old one; it moves on
+writes that show up in every branch's responses (classes, branches, class
+tags). RESPONSE_VERSION goes into every ETag as well: bump it whenever the
+/calendar or /sessions/{id} body changes shape, so clients holding an old
+ETag get the new format instead of a 304.
+
+Writes by another worker show up here within the refresh interval. When
+the counters move that way the schedule index is told to re-check right
+away, so a new ETag is never attached to the index's older rows.
+Callbacks registered with subscribe() get the scopes that moved (from
+either source), for caches that drop entries per branch.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from . import metrics
+from .calendar_store import conn, reload_class_tags
+from .schedule_index import SCHEDULE_INDEX
+
+REFRESH_S = float(os.getenv("OLIVIA_DATA_VERSION_REFRESH_S", "1"))
+
+RESPONSE_VERSION = 1
+
+ALL = "*"
+EPOCH = "#epoch"
+
+metrics.describe("olivia_conditional_get_total", "counter", "GETs with an ETag, by route and result (not_modified = 304, full = 200).")
+
+_BUMP = """
+    INSERT INTO data_versions(scope, version) VALUES (?, 1)
+    ON CONFLICT(scope) DO UPDATE SET version = version + 1
+"""
+
+
+class DataVersions:
+    def __init__(self, refresh_s: float = REFRESH_S) -> None:
+        self.refresh_s = refresh_s
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._versions: Dict[str, int] = {}
+        self._checked = 0.0
+        self._subscribers: List[Callable[[Set[str]], None]] = []
+
+    def subscribe(self, fn: Callable[[Set[str]], None]) -> None:
+        """Call fn(scopes) whenever counters move; "#epoch" among them means everything changed."""
+        self._subscribers.append(fn)
+
+    def _changed(self, old: Dict[str, int], new: Dict[str, int]) -> Set[str]:
+        return {s for s, v in new.items() if old.get(s, 0) != v} | {s for s in old if s not in new}
+
+    def _notify(self, scopes: Set[str]) -> None:
+        for fn in self._subscribers:
+            fn(scopes)
+
+    def _current(self) -> Dict[str, int]:
+        now = time.monotonic()
+        if self._db is not None and now - self._checked < self.refresh_s:
+            return self._versions
+        with self._lock:
+            if self._db is not None and now - self._checked < self.refresh_s:
+                return self._versions
+            if self._db is None:
+                self._db = conn()
+            fresh = {scope: int(v) for scope, v in self._db.execute("SELECT scope, version FROM data_versions")}
+            changed = self._changed(self._versions, fresh) if self._versions else set()
+            if changed:
+                SCHEDULE_INDEX.expire()  # another worker wrote: the index must not lag the ETag
+            self._versions = fresh
+            self._checked = now
+        if changed:
+            self._notify(changed)
+        return fresh
+
+    def invalidate(self) -> None:
+        """Drop the local copy (and reconnect), e.g. after swapping DB_PATH."""
+        with self._lock:
+            self._versions = {}
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+        self._notify({EPOCH})
+
+    def bump(self, c: sqlite3.Connection, branch_ids: Iterable[str]) -> Dict[str, int]:
+        """
+        Bump the branches' counters and "*" inside the caller's transaction;
+        pass the result to note() after commit, once this process's own
+        copies (the schedule index) show the write.
+        """
+        scopes = sorted(set(branch_ids)) + [ALL]
+        c.executemany(_BUMP, [(s,) for s in scopes])
+        placeholders = ",".join("?" * len(scopes))
+        return {scope: int(v) for scope, v in c.execute(f"SELECT scope, version FROM data_versions WHERE scope IN ({placeholders})", scopes)}
+
+    def note(self, versions: Dict[str, int]) -> None:
+        """Apply this process's committed bump without waiting for the refresh."""
+        with self._lock:
+            merged = dict(self._versions)
+            for scope, v in versions.items():
+                merged[scope] = max(merged.get(scope, 0), v)
+            changed = self._changed(self._versions, merged)
+            self._versions = merged
+        if changed:
+            self._notify(changed)
+
+    def etag(self, kind: str, key: str, scopes: Iterable[str]) -> str:
+        """Strong ETag for `kind`/`key` (the request's identity) at the current versions of `scopes`."""
+        v = self._current()
+        parts = [kind, key, str(RESPONSE_VERSION), str(v.get(EPOCH, 0))] + [f"{s}:{v.get(s, 0)}" for s in sorted(set(scopes))]
+        return '"' + hashlib.blake2b("|".join(parts).encode(), digest_size=12).hexdigest() + '"'
+
+
+VERSIONS = DataVersions()
+
+
+def _reload_class_tags(scopes: Set[str]) -> None:
+    if EPOCH in scopes:
+        reload_class_tags()  # the catalog or its tags changed, possibly in another worker
+
+
+VERSIONS.subscribe(_reload_class_tags)
+
+
+def not_modified(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match matching (weak comparison, as RFC 9110 asks for GET)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
@@ -0,0 +1,228 @@
+"""
+Branch gazetteer: every way a member can name a branch, compiled once.
+
+Phrases come from configs/facilities.json (via the config registry; the
+gazetteer is recompiled when the file changes): the id ("blue_ash" -> "blue
+ash"), the name ("Blue Ash YMCA"), the name without "YMCA", and every
+alias. Text is tokenized to lowercase words, so punctuation and hyphens
+don't matter ("Gamble-Nippert" == "gamble nippert").
+
+The phrases are compiled into a word-level Aho-Corasick automaton, so a
+message is scanned once no matter how many branches there are, and all
+mentions come back (leftmost-longest, non-overlapping).
+
+Typos: a message word that is not in the phrase vocabulary is corrected
+to the single vocabulary word within edit distance 1 (2 for words of 9+
+letters), looked up through a deletion index rather than by comparing
+against every word. Short words (< 5 letters) are never corrected, so
+"cp" or "ash" only match exactly.
+"""
+from __future__ import annotations
+
+import re
+import threading
+from collections import deque
+from functools import lru_cache
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Set, Tuple
+
+from .config_registry import FACILITIES
+
+_WORD = re.compile(r"[a-z0-9]+")
+# words that never identify a branch on their own (dropped from partial replies)
+_FILLER = frozenset({"the", "at", "my", "y", "ymca", "branch", "location", "one", "please", "in", "on"})
+MIN_FUZZY_LEN = 5
+LONG_FUZZY_LEN = 9
+
+
+class Mention(NamedTuple):
+    branch_id: str
+    start: int  # character offsets into the original text
+    end: int
+    text: str
+    fuzzy: bool
+
+
+def _tokens(text: str) -> List[Tuple[str, int, int]]:
+    return [(m.group(), m.start(), m.end()) for m in _WORD.finditer((text or "").lower())]
+
+
+def _max_edits(word: str) -> int:
+    if len(word) >= LONG_FUZZY_LEN:
+        return 2
+    return 1 if len(word) >= MIN_FUZZY_LEN else 0
+
+
+def _deletes(word: str, edits: int) -> Set[str]:
+    out = {word}
+    frontier = {word}
+    for _ in range(edits):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        out |= frontier
+    return out
+
+
+def _distance(a: str, b: str, bound: int) -> int:
+    """Damerau-Levenshtein (adjacent transpositions), or bound + 1 once it is exceeded."""
+    if abs(len(a) - len(b)) > bound:
+        return bound + 1
+    prev2: List[int] = []
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+        if min(cur) > bound:
+            return bound + 1
+        prev2, prev = prev, cur
+    return prev[-1]
+
+
+class Gazetteer:
+    def __init__(self, branches: Iterable[Mapping]) -> None:
+        phrases: Dict[Tuple[str, ...], Set[str]] = {}
+        self.names: Dict[str, str] = {}
+        for b in branches:
+            bid = b.get("id")
+            if not bid:
+                continue
+            name = b.get("name") or b.get("branch_name") or bid
+            self.names[bid] = name
+            for text in [bid.replace("_", " "), name, *(b.get("aliases") or [])]:
+                words = tuple(w for w, _, _ in _tokens(str(text)))
+                if words:
+                    phrases.setdefault(words, set()).add(bid)
+                    core = tuple(w for w in words if w != "ymca")
+                    if core and core != words:
+                        phrases.setdefault(core, set()).add(bid)
+        # a phrase shared by two branches (e.g. "county") names neither
+        self._phrases = {words: next(iter(ids)) for words, ids in phrases.items() if len(ids) == 1}
+        self._vocab = {w for words in self._phrases for w in words}
+        self._index: Dict[str, Set[str]] = {}
+        for w in self._vocab:
+            for d in _deletes(w, _max_edits(w)):
+                self._index.setdefault(d, set()).add(w)
+        # word -> branches whose phrases use it (partial replies like "blue" or "highland")
+        self._word_branches: Dict[str, Set[str]] = {}
+        for words, bid in self._phrases.items():
+            for w in words:
+                self._word_branches.setdefault(w, set()).add(bid)
+        self._compile()
+        # chat words repeat ("swim", "tomorrow"), so remember each correction
+        self._correct = lru_cache(maxsize=8192)(self._correct_word)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _compile(self) -> None:
+        goto: List[Dict[str, int]] = [{}]
+        out: List[List[Tuple[int, str]]] = [[]]
+        for words, bid in self._phrases.items():
+            state = 0
+            for w in words:
+                nxt = goto[state].get(w)
+                if nxt is None:
+                    goto.append({})
+                    out.append([])
+                    nxt = goto[state][w] = len(goto) - 1
+                state = nxt
+            out[state].append((len(words), bid))
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for w, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and w not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(w, 0) if state else 0
+                out[nxt] = out[nxt] + out[fail[nxt]]
+        self._goto, self._fail, self._out = goto, fail, out
+
+    def _correct_word(self, word: str) -> Optional[str]:
+        """The one vocabulary word within the edit bound, or None (unknown or ambiguous)."""
+        if word in self._vocab:
+            return word
+        edits = _max_edits(word)
+        if not edits:
+            return None
+        candidates: Set[str] = set()
+        for d in _deletes(word, edits):
+            candidates |= self._index.get(d, set())
+        best, best_d, tie = None, edits + 1, False
+        for c in candidates:
+            dist = _distance(word, c, edits)
+            if dist < best_d:
+                best, best_d, tie = c, dist, False
+            elif dist == best_d:
+                tie = True
+        return None if tie else best
+
+    def mentions(self, text: str) -> List[Mention]:
+        """All branch mentions in text, in order, longest match first where they overlap."""
+        toks = _tokens(text)
+        words = [self._correct(w) for w, _, _ in toks]
+        found: List[Tuple[int, int, str]] = []
+        state = 0
+        for i, w in enumerate(words):
+            while state and (w is None or w not in self._goto[state]):
+                state = self._fail[state]
+            state = self._goto[state].get(w, 0) if w is not None else 0
+            for length, bid in self._out[state]:
+                found.append((i - length + 1, i + 1, bid))
+        found.sort(key=lambda m: (m[0], -(m[1] - m[0])))
+        result: List[Mention] = []
+        taken = 0
+        for s, e, bid in found:
+            if s < taken:
+                continue
+            taken = e
+            start, end = toks[s][1], toks[e - 1][2]
+            fuzzy = any(words[k] != toks[k][0] for k in range(s, e))
+            result.append(Mention(bid, start, end, text[start:end], fuzzy))
+        return result
+
+    def branch_ids(self, text: str) -> List[str]:
+        """Distinct branches mentioned in text, in order of first mention."""
+        seen: List[str] = []
+        for m in self.mentions(text):
+            if m.branch_id not in seen:
+                seen.append(m.branch_id)
+        return seen
+
+    def resolve_reply(self, text: str) -> Optional[str]:
+        """
+        Answer to "which branch?": the single branch mentioned, else the one
+        branch whose names contain every (non-filler) word of a short reply
+        ("blue", "highland"). None when nothing or more than one branch fits.
+        """
+        ids = self.branch_ids(text)
+        if len(ids) == 1:
+            return ids[0]
+        if ids:
+            return None
+        words = [self._correct(w) for w, _, _ in _tokens(text) if w not in _FILLER]
+        if not words or None in words or len(words) > 3:
+            return None
+        fits = set.intersection(*(self._word_branches.get(w, set()) for w in words))
+        return next(iter(fits)) if len(fits) == 1 else None
+
+
+_GAZETTEER: Optional[Tuple[int, Gazetteer]] = None  # (facilities version, gazetteer)
+_LOCK = threading.Lock()
+
+
+def get() -> Gazetteer:
+    """The compiled gazetteer for the current facilities.json (rebuilt only when it changes)."""
+    global _GAZETTEER
+    facilities, version = FACILITIES.current()
+    cached = _GAZETTEER
+    if cached is None or cached[0] != version:
+        with _LOCK:
+            cached = _GAZETTEER
+            if cached is None or cached[0] != version:
+                cached = _GAZETTEER = (version, Gazetteer(facilities.records))
+    return cached[1]
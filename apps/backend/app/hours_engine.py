@@ -0,0 +1,214 @@
+"""
+Branch opening hours, compiled once per hours.json / facilities.json.
+
+Each branch gets a weekly table of (open, close) minute intervals with the
+Sunday override already applied, plus its date exceptions from hours.json
+(holidays and closures; a branch-specific exception beats an all-branch one
+on the same date):
+
+    "exceptions": [
+      {"date": "2026-12-25", "hours": null, "note": "Christmas Day"},
+      {"date": "2026-12-24", "hours": ["07:00", "14:00"], "note": "Christmas Eve"},
+      {"date": "2026-11-02", "branch_ids": ["blue_ash"], "hours": null, "note": "Pool maintenance"}
+    ]
+
+so "hours on a date" is a dict probe and a tuple index. Open-now status for
+every branch is computed in one pass and kept until the earliest next open
+or close (or midnight, when exception notes can change), so a kiosk polling
+all branches costs nothing between boundaries.
+
+Chat drops sessions that are not fully inside their branch's hours for the
+day (`fits`), using the compiled tables: no extra reads per row.
+"""
+from __future__ import annotations
+
+import threading
+from datetime import date, datetime, time as dtime, timedelta
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from . import metrics
+from .config_registry import DAYS, FACILITIES, HOURS, Hours
+
+MAX_SCAN_D = 366  # how far ahead to look for the next opening
+MAX_RANGE_D = 366
+
+metrics.describe("olivia_hours_status_total", "counter", "All-branch open-now lookups, by result (hit: cached until the next boundary, miss).")
+
+
+class Interval(NamedTuple):
+    open: int  # minutes after local midnight
+    close: int  # exclusive; 1440 for midnight
+
+
+class Day(NamedTuple):
+    date: str
+    hours: Optional[Interval]  # None: closed
+    note: Optional[str]
+
+
+class OpenStatus(NamedTuple):
+    branch_id: str
+    is_open: bool
+    opens_at: Optional[datetime]  # next opening, when closed (None if none within MAX_SCAN_D)
+    closes_at: Optional[datetime]  # when open
+    note: Optional[str]  # today's exception, if any
+
+
+def _minutes(hhmm: str) -> int:
+    return int(hhmm[:2]) * 60 + int(hhmm[3:5])
+
+
+def _interval(pair: Optional[Tuple[str, str]]) -> Optional[Interval]:
+    if pair is None:
+        return None
+    lo, hi = _minutes(pair[0]), _minutes(pair[1])
+    return Interval(lo, hi) if lo < hi else None
+
+
+def _hhmm(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+@lru_cache(maxsize=2048)
+def _weekday(iso_day: str) -> int:
+    return date.fromisoformat(iso_day).weekday()
+
+
+class BranchSchedule(NamedTuple):
+    weekly: Tuple[Optional[Interval], ...]  # Monday first
+    exceptions: Dict[str, Tuple[Optional[Interval], Optional[str]]]  # YYYY-MM-DD -> (hours, note)
+
+    def day(self, iso_day: str) -> Day:
+        exc = self.exceptions.get(iso_day)
+        if exc is not None:
+            return Day(iso_day, exc[0], exc[1])
+        return Day(iso_day, self.weekly[_weekday(iso_day)], None)
+
+
+def compile_schedule(hours: Hours, branch_id: str) -> BranchSchedule:
+    weekly = tuple(_interval(hours.for_day(branch_id, d)) for d in DAYS)
+    exceptions: Dict[str, Tuple[Optional[Interval], Optional[str]]] = {}
+    for specific in (False, True):
+        for x in hours.exceptions:
+            if (x.branch_ids is not None) == specific and (x.branch_ids is None or branch_id in x.branch_ids):
+                exceptions[x.date] = (_interval(x.hours), x.note)
+    return BranchSchedule(weekly, exceptions)
+
+
+class HoursEngine:
+    def __init__(self, hours: Hours, branch_ids: Iterable[str]) -> None:
+        self.tz = ZoneInfo(hours.timezone)
+        self._hours = hours
+        self.schedules: Dict[str, BranchSchedule] = {b: compile_schedule(hours, b) for b in branch_ids}
+        self._lock = threading.Lock()
+        self._status: Optional[Tuple[datetime, datetime, Dict[str, OpenStatus]]] = None  # (computed, valid until, by branch)
+
+    def schedule(self, branch_id: str) -> BranchSchedule:
+        s = self.schedules.get(branch_id)
+        # not in facilities.json: compiled per call rather than cached for arbitrary ids
+        return s if s is not None else compile_schedule(self._hours, branch_id)
+
+    def day(self, branch_id: str, day: date) -> Day:
+        return self.schedule(branch_id).day(day.isoformat())
+
+    def days(self, branch_id: str, start: date, end: date) -> List[Day]:
+        """Every day in [start, end], inclusive."""
+        s = self.schedule(branch_id)
+        return [s.day((start + timedelta(days=i)).isoformat()) for i in range((end - start).days + 1)]
+
+    def fits(self, branch_id: str, start_ts: str, end_ts: str) -> bool:
+        """Whether a session (local ISO timestamps) starts and ends within its branch's hours that day."""
+        iso_day = start_ts[:10]
+        hours = self.schedule(branch_id).day(iso_day).hours
+        if hours is None:
+            return False
+        lo = int(start_ts[11:13]) * 60 + int(start_ts[14:16])
+        hi = int(end_ts[11:13]) * 60 + int(end_ts[14:16]) + (0 if end_ts[:10] == iso_day else 1440)
+        return hours.open <= lo and hi <= hours.close
+
+    def filter(self, rows: Iterable[Any]) -> List[Any]:
+        """Rows (anything with branch_id, start_ts, end_ts) that fit their branch's hours."""
+        return [r for r in rows if self.fits(r["branch_id"], r["start_ts"], r["end_ts"])]
+
+    def _at(self, day: date, minutes: int) -> datetime:
+        day += timedelta(days=minutes // 1440)  # a 24:00 close is midnight of the next day
+        return datetime.combine(day, dtime(minutes % 1440 // 60, minutes % 60), tzinfo=self.tz)
+
+    def _compute(self, branch_id: str, now: datetime) -> OpenStatus:
+        s = self.schedule(branch_id)
+        today = now.date()
+        minute = now.hour * 60 + now.minute
+        current = s.day(today.isoformat())
+        if current.hours is not None and current.hours.open <= minute < current.hours.close:
+            return OpenStatus(branch_id, True, None, self._at(today, current.hours.close), current.note)
+        if current.hours is not None and minute < current.hours.open:
+            return OpenStatus(branch_id, False, self._at(today, current.hours.open), None, current.note)
+        for ahead in range(1, MAX_SCAN_D + 1):
+            d = today + timedelta(days=ahead)
+            hours = s.day(d.isoformat()).hours
+            if hours is not None:
+                return OpenStatus(branch_id, False, self._at(d, hours.open), None, current.note)
+        return OpenStatus(branch_id, False, None, None, current.note)
+
+    def status(self, now: Optional[datetime] = None) -> Tuple[Dict[str, OpenStatus], datetime]:
+        """(open-now status by branch id, valid until): every branch, cached until the next boundary."""
+        now = (now or datetime.now(self.tz)).astimezone(self.tz)
+        cached = self._status
+        if cached is not None and cached[0] <= now < cached[1]:
+            metrics.inc("olivia_hours_status_total", result="hit")
+            return cached[2], cached[1]
+        with self._lock:
+            by_branch = {b: self._compute(b, now) for b in self.schedules}
+            midnight = datetime.combine(now.date() + timedelta(days=1), dtime(0), tzinfo=self.tz)
+            valid_until = min([x.closes_at or x.opens_at for x in by_branch.values() if x.closes_at or x.opens_at] + [midnight])
+            self._status = (now, valid_until, by_branch)
+        metrics.inc("olivia_hours_status_total", result="miss")
+        return by_branch, valid_until
+
+    def open_now(self, branch_id: str, now: Optional[datetime] = None) -> OpenStatus:
+        by_branch, _ = self.status(now)
+        got = by_branch.get(branch_id)
+        return got if got is not None else self._compute(branch_id, (now or datetime.now(self.tz)).astimezone(self.tz))
+
+
+_ENGINE: Optional[Tuple[Tuple[int, int], HoursEngine]] = None
+_LOCK = threading.Lock()
+
+
+def get() -> HoursEngine:
+    """The engine for the current hours.json and facilities.json (recompiled only when either changes)."""
+    global _ENGINE
+    hours, hv = HOURS.current()
+    facilities, fv = FACILITIES.current()
+    cached = _ENGINE
+    if cached is None or cached[0] != (hv, fv):
+        with _LOCK:
+            cached = _ENGINE
+            if cached is None or cached[0] != (hv, fv):
+                cached = _ENGINE = ((hv, fv), HoursEngine(hours, [b.id for b in facilities.branches]))
+    return cached[1]
+
+
+def day_json(d: Day) -> Dict[str, Any]:
+    return {
+        "date": d.date,
+        "is_closed": d.hours is None,
+        "open_time": None if d.hours is None else _hhmm(d.hours.open),
+        "close_time": None if d.hours is None else _hhmm(d.hours.close),
+        "note": d.note,
+    }
+
+
+def status_json(s: OpenStatus, names: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    out: Dict[str, Any] = {"branch_id": s.branch_id}
+    if names is not None:
+        out["branch_name"] = names.get(s.branch_id, s.branch_id)
+    out.update({
+        "open_now": s.is_open,
+        "opens_at": s.opens_at.isoformat() if s.opens_at else None,
+        "closes_at": s.closes_at.isoformat() if s.closes_at else None,
+        "note": s.note,
+    })
+    return out
@@ -1,15 +1,31 @@
 from __future__ import annotations
 
+import copy
+import json
 import os
-from typing import Any, Dict, List, Optional
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Union
 
 import httpx
+from fastapi.concurrency import run_in_threadpool
+
+from . import llm_cache, metrics, timing
+from .circuit_breaker import BREAKER
+from .llm_gate import GATE, PRIORITY_MEMBER
+from .singleflight import SingleFlight
 
 OLLAMA_URL = os.getenv("OLIVIA_OLLAMA_URL", "http://127.0.0.1:11434").rstrip("/")
 DEFAULT_MODEL = os.getenv("OLIVIA_OLLAMA_MODEL", "llama3.2:3b")
 TIMEOUT_S = float(os.getenv("OLIVIA_OLLAMA_TIMEOUT_S", "120"))
+CONNECT_TIMEOUT_S = float(os.getenv("OLIVIA_OLLAMA_CONNECT_TIMEOUT_S", "5"))
 DEFAULT_SEED = int(os.getenv("OLIVIA_OLLAMA_SEED", "42"))
 
+# Connection pool for the shared client (keep-alive to the Ollama host)
+MAX_CONNECTIONS = int(os.getenv("OLIVIA_OLLAMA_MAX_CONNECTIONS", "16"))
+MAX_KEEPALIVE = int(os.getenv("OLIVIA_OLLAMA_MAX_KEEPALIVE", "8"))
+KEEPALIVE_EXPIRY_S = float(os.getenv("OLIVIA_OLLAMA_KEEPALIVE_EXPIRY_S", "60"))
+
 DEFAULT_OPTIONS: Dict[str, Any] = {
     "temperature": float(os.getenv("OLIVIA_OLLAMA_TEMPERATURE", "0")),
     "top_p": float(os.getenv("OLIVIA_OLLAMA_TOP_P", "1")),
@@ -17,20 +33,247 @@ DEFAULT_OPTIONS: Dict[str, Any] = {
     "num_predict": int(os.getenv("OLIVIA_OLLAMA_NUM_PREDICT", "256")),
 }
 
-def ollama_chat_json(
+_client: Optional[httpx.AsyncClient] = None
+_FLIGHTS = SingleFlight("llm")
+
+metrics.describe("olivia_llm_calls_total", "counter", "Ollama /api/chat calls by stage.")
+metrics.describe("olivia_llm_prompt_tokens_total", "counter", "Prompt tokens Ollama had to prefill (KV-cache reuse is not counted).")
+metrics.describe("olivia_llm_completion_tokens_total", "counter", "Tokens generated by Ollama.")
+metrics.describe("olivia_llm_prompt_eval_seconds_total", "counter", "Time Ollama spent on prompt prefill.")
+metrics.describe("olivia_llm_last_prompt_tokens", "gauge", "Prompt tokens prefilled by the most recent call.")
+metrics.describe("olivia_llm_eval_seconds_total", "counter", "Time Ollama spent generating tokens.")
+metrics.describe("olivia_llm_stream_bad_lines_total", "counter", "Streamed NDJSON lines that were not a JSON object (skipped), by stage.")
+metrics.describe("olivia_llm_ollama_seconds", "histogram", "Ollama's own per-call timings by stage and phase (load, prompt_eval, eval, total).")
+metrics.describe(
+    "olivia_llm_tokens", "histogram", "Tokens per Ollama call by stage and kind (prompt, completion).",
+    buckets=(16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192),
+)
+
+# Ollama reports these in nanoseconds on the final response
+_OLLAMA_DURATIONS = {"load": "load_duration", "prompt_eval": "prompt_eval_duration", "eval": "eval_duration", "total": "total_duration"}
+
+
+def _new_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        base_url=OLLAMA_URL,
+        timeout=httpx.Timeout(TIMEOUT_S, connect=CONNECT_TIMEOUT_S),
+        limits=httpx.Limits(
+            max_connections=MAX_CONNECTIONS,
+            max_keepalive_connections=MAX_KEEPALIVE,
+            keepalive_expiry=KEEPALIVE_EXPIRY_S,
+        ),
+    )
+
+
+async def startup() -> None:
+    """Open the shared Ollama client (called from the app lifespan)."""
+    global _client
+    if _client is None:
+        _client = _new_client()
+
+
+async def shutdown() -> None:
+    """Close the shared client, drop pooled connections and commit pending cache writes."""
+    global _client
+    if _client is not None:
+        client, _client = _client, None
+        await client.aclose()
+    if llm_cache.CACHE is not None:
+        await run_in_threadpool(llm_cache.CACHE.flush)
+
+
+def _get_client() -> httpx.AsyncClient:
+    # Scripts/REPL use outside the app lifespan still get a pooled client.
+    global _client
+    if _client is None:
+        _client = _new_client()
+    return _client
+
+
+def _record_usage(stage: str, envelope: Dict[str, Any]) -> None:
+    """Token and timing accounting from Ollama's final response fields."""
+    prompt_tokens = int(envelope.get("prompt_eval_count") or 0)
+    completion_tokens = int(envelope.get("eval_count") or 0)
+    seconds = {phase: int(envelope.get(field) or 0) / 1e9 for phase, field in _OLLAMA_DURATIONS.items()}
+    metrics.inc("olivia_llm_calls_total", stage=stage)
+    metrics.inc("olivia_llm_prompt_tokens_total", prompt_tokens, stage=stage)
+    metrics.inc("olivia_llm_completion_tokens_total", completion_tokens, stage=stage)
+    metrics.inc("olivia_llm_prompt_eval_seconds_total", seconds["prompt_eval"], stage=stage)
+    metrics.inc("olivia_llm_eval_seconds_total", seconds["eval"], stage=stage)
+    metrics.set_gauge("olivia_llm_last_prompt_tokens", prompt_tokens, stage=stage)
+    metrics.observe("olivia_llm_tokens", prompt_tokens, stage=stage, kind="prompt")
+    metrics.observe("olivia_llm_tokens", completion_tokens, stage=stage, kind="completion")
+    for phase, s in seconds.items():
+        if s:
+            metrics.observe("olivia_llm_ollama_seconds", s, stage=stage, phase=phase)
+    # Ollama's side of the call in Server-Timing; the gap to the stage timer is queueing + transport
+    for phase in ("prompt_eval", "eval"):
+        if seconds[phase]:
+            timing.record(f"{stage}_ollama_{phase}", seconds[phase], observe=False)
+
+
+def _deadline(timeout_s: Optional[float]) -> Optional[float]:
+    return None if timeout_s is None else time.monotonic() + timeout_s
+
+
+def _left(deadline: Optional[float]) -> Optional[float]:
+    return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+
+def _timeout(deadline: Optional[float]):
+    """Client timeout for what is left of the budget once admitted (the queue wait already spent some)."""
+    if deadline is None:
+        return httpx.USE_CLIENT_DEFAULT
+    return httpx.Timeout(min(_left(deadline), TIMEOUT_S), connect=CONNECT_TIMEOUT_S)
+
+
+@asynccontextmanager
+async def _guarded(priority: int, deadline: Optional[float] = None) -> AsyncIterator[None]:
+    """
+    Circuit breaker + admission gate around one Ollama round trip.
+    Raises CircuitOpen / GateFull without touching Ollama, and
+    httpx.PoolTimeout when the queue wait uses up the budget (`deadline`,
+    time.monotonic()); none of those count against the breaker.
+    """
+    probe = BREAKER.acquire()
+    started: Optional[float] = None
+    try:
+        async with GATE.slot(priority, wait_s=_left(deadline)):
+            if deadline is not None and _left(deadline) <= 0:
+                raise httpx.PoolTimeout("admitted with no latency budget left")
+            started = time.monotonic()  # queue wait isn't Ollama's fault
+            yield
+    except TimeoutError as e:  # from the gate: no slot before the deadline
+        BREAKER.abandon(probe)
+        raise httpx.PoolTimeout("no Ollama slot within the latency budget") from e
+    except (httpx.HTTPError, ValueError):
+        if started is None:
+            BREAKER.abandon(probe)
+        else:
+            BREAKER.record(probe, ok=False, latency_s=time.monotonic() - started)
+        raise
+    except BaseException:
+        BREAKER.abandon(probe)
+        raise
+    BREAKER.record(probe, ok=True, latency_s=time.monotonic() - started)
+
+
+async def ollama_chat(
     messages: List[Dict[str, str]],
     *,
     model: Optional[str] = None,
     options: Optional[Dict[str, Any]] = None,
+    format: Optional[Union[str, Dict[str, Any]]] = None,
+    stage: str = "other",
+    priority: int = PRIORITY_MEMBER,
+    timeout_s: Optional[float] = None,
 ) -> Dict[str, Any]:
+    """
+    One non-streaming /api/chat call; returns Ollama's raw response envelope.
+    `timeout_s` is the latency budget for budgeted stages, queue wait included.
+    """
+    deadline = _deadline(timeout_s)
     payload: Dict[str, Any] = {
         "model": model or DEFAULT_MODEL,
         "messages": messages,
         "stream": False,
         "options": {**DEFAULT_OPTIONS, **(options or {})},
     }
-    url = f"{OLLAMA_URL}/api/chat"
-    with httpx.Client(timeout=TIMEOUT_S) as client:
-        r = client.post(url, json=payload)
+    if format is not None:
+        payload["format"] = format
+    async with _guarded(priority, deadline):
+        r = await _get_client().post("/api/chat", json=payload, timeout=_timeout(deadline))
         r.raise_for_status()
-        return r.json()
+        envelope = r.json()
+    _record_usage(stage, envelope)
+    return envelope
+
+
+def _decode_content(envelope: Dict[str, Any]) -> Dict[str, Any]:
+    content = ((envelope or {}).get("message") or {}).get("content") or ""
+    try:
+        data = json.loads(content)
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+async def ollama_chat_json(
+    messages: List[Dict[str, str]],
+    *,
+    model: Optional[str] = None,
+    options: Optional[Dict[str, Any]] = None,
+    format: Optional[Union[str, Dict[str, Any]]] = "json",
+    stage: str = "other",
+    priority: int = PRIORITY_MEMBER,
+    timeout_s: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    Constrained-JSON chat call. `format` is "json" or a JSON schema (Ollama >= 0.5).
+    Returns the decoded object from message.content ({} if it isn't a JSON object).
+    Deterministic calls (temperature=0 + seed) are served from llm_cache when possible,
+    and concurrent identical calls at the same priority are coalesced into one Ollama
+    generation (a front-desk call never waits in line behind a member-priority leader).
+    """
+    model = model or DEFAULT_MODEL
+    opts = {**DEFAULT_OPTIONS, **(options or {})}
+
+    key = llm_cache.cache_key(model, opts, format, messages)
+    cacheable = llm_cache.CACHE is not None and llm_cache.is_deterministic(opts)
+    if cacheable:
+        hit = await llm_cache.CACHE.get(key)
+        if hit is not None:
+            return copy.deepcopy(hit)
+
+    async def _generate() -> Dict[str, Any]:
+        envelope = await ollama_chat(
+            messages, model=model, options=opts, format=format, stage=stage, priority=priority, timeout_s=timeout_s
+        )
+        data = _decode_content(envelope)
+        if cacheable and data:
+            llm_cache.CACHE.put(key, copy.deepcopy(data))
+        return data
+
+    # identical concurrent prompts share one generation, queued at their own priority
+    return copy.deepcopy(await _FLIGHTS.do(f"{priority}:{key}", _generate))
+
+
+async def ollama_chat_stream(
+    messages: List[Dict[str, str]],
+    *,
+    model: Optional[str] = None,
+    options: Optional[Dict[str, Any]] = None,
+    stage: str = "other",
+    priority: int = PRIORITY_MEMBER,
+    timeout_s: Optional[float] = None,
+) -> AsyncIterator[str]:
+    """
+    Yield message content pieces as Ollama generates them (stream mode, NDJSON).
+    A line that isn't a JSON object is skipped (and counted), not fatal to the stream.
+    """
+    deadline = _deadline(timeout_s)
+    payload: Dict[str, Any] = {
+        "model": model or DEFAULT_MODEL,
+        "messages": messages,
+        "stream": True,
+        "options": {**DEFAULT_OPTIONS, **(options or {})},
+    }
+    async with _guarded(priority, deadline):
+        async with _get_client().stream("POST", "/api/chat", json=payload, timeout=_timeout(deadline)) as r:
+            r.raise_for_status()
+            async for line in r.aiter_lines():
+                if not line.strip():
+                    continue
+                try:
+                    chunk = json.loads(line)
+                except ValueError:
+                    chunk = None
+                if not isinstance(chunk, dict):
+                    metrics.inc("olivia_llm_stream_bad_lines_total", stage=stage)
+                    continue
+                piece = (chunk.get("message") or {}).get("content")
+                if piece:
+                    yield piece
+                if chunk.get("done"):
+                    _record_usage(stage, chunk)
+                    break
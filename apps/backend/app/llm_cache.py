@@ -0,0 +1,230 @@
+"""
+Response cache for deterministic LLM calls (temperature=0 + fixed seed).
+
+Two tiers:
+  - in-memory LRU with a TTL
+  - optional SQLite file (OLIVIA_LLM_CACHE_DB) that survives restarts,
+    read in the threadpool and written behind in batched commits
+
+Keys cover model, options, format and the normalized messages, and are
+namespaced by the local calendar day: prompts embed `_now_iso()`, so
+everything cached yesterday is dropped when the date rolls over.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from fastapi.concurrency import run_in_threadpool
+
+from . import metrics
+
+TZ = ZoneInfo("America/New_York")
+
+CACHE_ENABLED = os.getenv("OLIVIA_LLM_CACHE", "1").strip().lower() not in ("0", "false", "off", "no")
+MAX_ENTRIES = int(os.getenv("OLIVIA_LLM_CACHE_MAX_ENTRIES", "512"))
+TTL_S = float(os.getenv("OLIVIA_LLM_CACHE_TTL_S", "3600"))
+DB_PATH = os.getenv("OLIVIA_LLM_CACHE_DB", "").strip() or None
+DB_MAX_ENTRIES = int(os.getenv("OLIVIA_LLM_CACHE_DB_MAX_ENTRIES", "20000"))
+# most SQLite writes the writer thread commits in one transaction
+WRITE_BATCH = 256
+
+# 2026-01-22T06:10:03.123456-05:00 -> 2026-01-22 (time of day never changes the plan's date logic)
+_ISO_DATETIME_RE = re.compile(r"(\d{4}-\d{2}-\d{2})T\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:[+-]\d{2}:\d{2}|Z)?")
+_WS_RE = re.compile(r"\s+")
+
+metrics.describe("olivia_llm_cache_hits_total", "counter", "LLM cache hits by tier.")
+metrics.describe("olivia_llm_cache_misses_total", "counter", "LLM cache misses.")
+metrics.describe("olivia_llm_cache_evictions_total", "counter", "LLM cache evictions by reason (lru, ttl, rollover).")
+metrics.describe("olivia_llm_cache_entries", "gauge", "Entries in the in-memory LLM cache.")
+metrics.describe("olivia_llm_cache_write_errors_total", "counter", "LLM cache SQLite writes dropped because their batch failed.")
+
+
+def _today() -> str:
+    return datetime.now(TZ).date().isoformat()
+
+
+def is_deterministic(options: Dict[str, Any]) -> bool:
+    return float(options.get("temperature", 1.0)) == 0.0 and options.get("seed") is not None
+
+
+def _normalize_text(text: str) -> str:
+    return _WS_RE.sub(" ", _ISO_DATETIME_RE.sub(r"\1", text or "")).strip()
+
+
+def cache_key(model: str, options: Dict[str, Any], format: Any, messages: List[Dict[str, str]]) -> str:
+    norm = [{"role": m.get("role"), "content": _normalize_text(m.get("content", ""))} for m in messages]
+    blob = json.dumps(
+        {"model": model, "options": options, "format": format, "messages": norm},
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    The memory tier is read and written on the caller's thread (the event
+    loop) under a short lock. The SQLite tier never is: misses read through
+    in the threadpool (`get` is async), and puts, expiry and rollover
+    deletes go to one writer thread that commits whatever has queued up in
+    a single transaction.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = MAX_ENTRIES,
+        ttl_s: float = TTL_S,
+        db_path: Optional[str] = DB_PATH,
+        db_max_entries: int = DB_MAX_ENTRIES,
+    ) -> None:
+        self.max_entries = max(1, max_entries)
+        self.ttl_s = ttl_s
+        self.db_max_entries = db_max_entries
+        self._lock = threading.Lock()
+        # key -> (created_at, value)
+        self._mem: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._day = _today()
+        self._puts = 0
+        # the writer thread owns _db; threadpool reads share _reader
+        self._db: Optional[sqlite3.Connection] = None
+        self._reader: Optional[sqlite3.Connection] = None
+        self._read_lock = threading.Lock()
+        self._writes: "queue.Queue[Tuple[str, Tuple[Any, ...]]]" = queue.Queue()
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL;")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                " key TEXT PRIMARY KEY, day TEXT NOT NULL, created_at REAL NOT NULL, value TEXT NOT NULL)"
+            )
+            self._db.commit()
+            self._reader = sqlite3.connect(db_path, check_same_thread=False)
+            threading.Thread(target=self._write_loop, name="llm-cache-writer", daemon=True).start()
+        self._roll_day_locked(force=True)
+
+    # -- bookkeeping ---------------------------------------------------------
+    def _roll_day_locked(self, force: bool = False) -> None:
+        today = _today()
+        if today == self._day and not force:
+            return
+        if today != self._day and self._mem:
+            metrics.inc("olivia_llm_cache_evictions_total", len(self._mem), reason="rollover")
+            self._mem.clear()
+        self._day = today
+        self._write("DELETE FROM llm_cache WHERE day != ?", today)
+        metrics.set_gauge("olivia_llm_cache_entries", len(self._mem))
+
+    def _fresh(self, created_at: float) -> bool:
+        return (time.time() - created_at) < self.ttl_s
+
+    # -- SQLite tier (threadpool reads, one writer thread) -------------------
+    def _write(self, sql: str, *params: Any) -> None:
+        if self._db is not None:
+            self._writes.put((sql, params))
+
+    def _write_loop(self) -> None:
+        assert self._db is not None
+        while True:
+            batch = [self._writes.get()]
+            while len(batch) < WRITE_BATCH:
+                try:
+                    batch.append(self._writes.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with self._db:  # one commit for the whole batch
+                    for sql, params in batch:
+                        self._db.execute(sql, params)
+            except sqlite3.Error:
+                metrics.inc("olivia_llm_cache_write_errors_total", len(batch))
+            finally:
+                for _ in batch:
+                    self._writes.task_done()
+
+    def _read(self, key: str, day: str) -> Optional[Tuple[float, str]]:
+        assert self._reader is not None
+        with self._read_lock:
+            row = self._reader.execute("SELECT created_at, value FROM llm_cache WHERE key=? AND day=?", (key, day)).fetchone()
+        return (float(row[0]), row[1]) if row is not None else None
+
+    def flush(self) -> None:
+        """Block until every queued SQLite write is committed."""
+        self._writes.join()
+
+    # -- public API ----------------------------------------------------------
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._roll_day_locked()
+            day = self._day
+            hit = self._mem.get(key)
+            if hit is not None:
+                created_at, value = hit
+                if self._fresh(created_at):
+                    self._mem.move_to_end(key)
+                    metrics.inc("olivia_llm_cache_hits_total", tier="memory")
+                    return value
+                del self._mem[key]
+                metrics.inc("olivia_llm_cache_evictions_total", reason="ttl")
+
+        if self._reader is not None:
+            row = await run_in_threadpool(self._read, key, day)
+            if row is not None:
+                created_at, raw = row
+                if self._fresh(created_at):
+                    value = json.loads(raw)
+                    with self._lock:
+                        self._store_mem_locked(key, created_at, value)
+                    metrics.inc("olivia_llm_cache_hits_total", tier="sqlite")
+                    return value
+                self._write("DELETE FROM llm_cache WHERE key=?", key)
+                metrics.inc("olivia_llm_cache_evictions_total", reason="ttl")
+
+        metrics.inc("olivia_llm_cache_misses_total")
+        return None
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        """Store in memory now; the SQLite copy is written behind."""
+        now = time.time()
+        with self._lock:
+            self._roll_day_locked()
+            self._store_mem_locked(key, now, value)
+            if self._db is not None:
+                self._write(
+                    "INSERT OR REPLACE INTO llm_cache(key, day, created_at, value) VALUES (?,?,?,?)",
+                    key, self._day, now, json.dumps(value),
+                )
+                self._puts += 1
+                if self._puts % 100 == 0:
+                    self._write(
+                        "DELETE FROM llm_cache WHERE key IN ("
+                        " SELECT key FROM llm_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                        self.db_max_entries,
+                    )
+
+    def _store_mem_locked(self, key: str, created_at: float, value: Dict[str, Any]) -> None:
+        self._mem[key] = (created_at, value)
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_entries:
+            self._mem.popitem(last=False)
+            metrics.inc("olivia_llm_cache_evictions_total", reason="lru")
+        metrics.set_gauge("olivia_llm_cache_entries", len(self._mem))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._mem.clear()
+            self._write("DELETE FROM llm_cache")
+            metrics.set_gauge("olivia_llm_cache_entries", 0)
+
+
+CACHE: Optional[LLMCache] = LLMCache() if CACHE_ENABLED else None
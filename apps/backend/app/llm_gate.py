@@ -0,0 +1,143 @@
+"""
+Admission control for Ollama calls: at most OLIVIA_LLM_MAX_CONCURRENCY
+generations in flight per process, a bounded priority queue behind them,
+and fast rejection (GateFull -> 503 + Retry-After) when the queue is full.
+Front-desk traffic is queued ahead of member traffic. A caller with a
+latency budget passes what is left of it as `wait_s` and gets TimeoutError
+if no slot frees up in time, so queueing counts against the budget.
+"""
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import math
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Optional, Tuple
+
+from . import metrics
+
+MAX_CONCURRENCY = int(os.getenv("OLIVIA_LLM_MAX_CONCURRENCY", "4"))
+MAX_QUEUE = int(os.getenv("OLIVIA_LLM_MAX_QUEUE", "32"))
+QUEUE_TIMEOUT_S = float(os.getenv("OLIVIA_LLM_QUEUE_TIMEOUT_S", "30"))
+
+PRIORITY_FRONT_DESK = 0
+PRIORITY_MEMBER = 1
+_PRIORITY_NAMES = {PRIORITY_FRONT_DESK: "front_desk", PRIORITY_MEMBER: "member"}
+
+metrics.describe("olivia_llm_gate_active", "gauge", "Ollama calls currently admitted.")
+metrics.describe("olivia_llm_gate_queue_depth", "gauge", "Ollama calls waiting for admission.")
+metrics.describe("olivia_llm_gate_admitted_total", "counter", "Ollama calls admitted, by priority.")
+metrics.describe("olivia_llm_gate_rejected_total", "counter", "Ollama calls rejected (queue full or queue timeout), by priority.")
+metrics.describe("olivia_llm_gate_wait_seconds_total", "counter", "Total time admitted calls spent queued, by priority.")
+
+
+class GateFull(Exception):
+    """Raised when a call can't be admitted; carries a Retry-After hint in seconds."""
+
+    def __init__(self, retry_after_s: int) -> None:
+        super().__init__(f"LLM queue full, retry after {retry_after_s}s")
+        self.retry_after_s = retry_after_s
+
+
+class LLMGate:
+    def __init__(
+        self,
+        max_concurrency: int = MAX_CONCURRENCY,
+        max_queue: int = MAX_QUEUE,
+        queue_timeout_s: float = QUEUE_TIMEOUT_S,
+    ) -> None:
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout_s = queue_timeout_s
+        self._active = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._avg_service_s = 2.0  # EWMA, seeds the Retry-After estimate
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(1 for _, _, f in self._waiters if not f.done())
+
+    def _publish(self) -> None:
+        metrics.set_gauge("olivia_llm_gate_active", self._active)
+        metrics.set_gauge("olivia_llm_gate_queue_depth", self.queue_depth)
+
+    def retry_after_s(self) -> int:
+        backlog = self.queue_depth + self._active
+        return max(1, math.ceil(backlog * self._avg_service_s / self.max_concurrency))
+
+    async def _acquire(self, priority: int, wait_s: Optional[float]) -> None:
+        if self._active < self.max_concurrency and not self.queue_depth:
+            self._active += 1
+            return
+        if self.queue_depth >= self.max_queue and not self._displace(priority):
+            raise GateFull(self.retry_after_s())
+
+        budgeted = wait_s is not None and wait_s < self.queue_timeout_s
+        fut: asyncio.Future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), fut))
+        self._publish()
+        try:
+            await asyncio.wait({fut}, timeout=max(0.0, wait_s) if budgeted else self.queue_timeout_s)
+        except asyncio.CancelledError:
+            # caller went away; hand the slot on if it was already granted
+            if fut.done() and not fut.cancelled() and fut.exception() is None:
+                self._release()
+            else:
+                fut.cancel()
+            raise
+        if not fut.done():
+            fut.cancel()
+            self._publish()
+            if budgeted:
+                raise TimeoutError(f"no LLM slot within {wait_s:.1f}s")
+            raise GateFull(self.retry_after_s())
+        if fut.exception() is not None:
+            raise fut.exception()
+        # slot was transferred by _release (active count unchanged)
+
+    def _displace(self, priority: int) -> bool:
+        """Full queue: bump the newest lower-priority waiter so `priority` can queue instead."""
+        pending = [(p, seq, f) for p, seq, f in self._waiters if not f.done() and p > priority]
+        if not pending:
+            return False
+        _, _, victim = max(pending, key=lambda w: (w[0], w[1]))
+        victim.set_exception(GateFull(self.retry_after_s()))
+        return True
+
+    def _release(self) -> None:
+        while self._waiters:
+            _, _, fut = heapq.heappop(self._waiters)
+            if not fut.done():
+                fut.set_result(None)
+                self._publish()
+                return
+        self._active -= 1
+        self._publish()
+
+    @asynccontextmanager
+    async def slot(self, priority: int = PRIORITY_MEMBER, wait_s: Optional[float] = None) -> AsyncIterator[None]:
+        """Hold one generation slot; GateFull when rejected, TimeoutError when queued longer than wait_s."""
+        name = _PRIORITY_NAMES.get(priority, str(priority))
+        t0 = time.monotonic()
+        try:
+            await self._acquire(priority, wait_s)
+        except (GateFull, TimeoutError):
+            metrics.inc("olivia_llm_gate_rejected_total", priority=name)
+            raise
+        metrics.inc("olivia_llm_gate_admitted_total", priority=name)
+        metrics.inc("olivia_llm_gate_wait_seconds_total", time.monotonic() - t0, priority=name)
+        self._publish()
+
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._avg_service_s = 0.8 * self._avg_service_s + 0.2 * (time.monotonic() - started)
+            self._release()
+
+
+GATE = LLMGate()
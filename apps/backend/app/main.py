@@ -1,9 +1,29 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from .routers import health, branches, hours, calendar, sessions, enroll, chat
+from . import calendar_store, config_registry, llm, members
+from .schedule_index import SCHEDULE_INDEX
+from .timing import ServerTimingMiddleware
+from .routers import health, branches, hours, calendar, sessions, enroll, chat, metrics
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    calendar_store.init_db()
+    calendar_store.seed()
+    members.sync_config()  # re-imports configs/member_profiles.json only when it changed
+    SCHEDULE_INDEX.warm()
+    config_registry.warm()  # a malformed config file fails startup, not a request
+    await llm.startup()
+    try:
+        yield
+    finally:
+        await llm.shutdown()
+
 
-app = FastAPI(title="Olivia API", version="0.1.0")
+app = FastAPI(title="Olivia API", version="0.1.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -12,6 +32,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# outermost: Server-Timing header + per-route latency histograms
+app.add_middleware(ServerTimingMiddleware)
 
 app.include_router(health.router, prefix="/api/v1", tags=["health"])
 app.include_router(branches.router, prefix="/api/v1", tags=["branches"])
@@ -20,3 +42,4 @@ app.include_router(calendar.router, prefix="/api/v1", tags=["calendar"])
 app.include_router(sessions.router, prefix="/api/v1", tags=["sessions"])
 app.include_router(enroll.router, prefix="/api/v1", tags=["enroll"])
 app.include_router(chat.router, prefix="/api/v1", tags=["chat"])
+app.include_router(metrics.router, prefix="/api/v1", tags=["metrics"])
@@ -0,0 +1,337 @@
+"""
+Member directory: profiles in the `members` table, one indexed lookup away.
+
+Rosters come in through a streaming bulk import (JSON, JSON Lines or CSV)
+that never holds more than one profile plus a read buffer in memory:
+
+    python -m app.members import roster.csv
+    python -m app.members import member_profiles.json
+
+  JSON   {"member_id": {"home_branch_id": ..., "email": ..., "phone": ...}, ...}
+         (the configs/member_profiles.json shape) or a list of objects
+  JSONL  one object per line
+  CSV    a header row; the id column is member_id (or id)
+
+Rows are upserted in batches inside one transaction; an unchanged profile
+keeps its updated_at. configs/member_profiles.json is imported at startup
+whenever it differs from the last import (sync_config).
+
+Lookups go through a bounded LRU (OLIVIA_MEMBER_CACHE_SIZE entries,
+unknown ids included). Writes in this process drop the affected entries;
+writes from any other process move MAX(updated_at), which every lookup
+compares at most every OLIVIA_MEMBER_REFRESH_S before trusting the cache.
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, TextIO, Tuple
+
+from . import metrics
+from .calendar_store import conn
+from .config_registry import CONFIG_DIR
+
+CACHE_SIZE = int(os.getenv("OLIVIA_MEMBER_CACHE_SIZE", "4096"))
+REFRESH_S = float(os.getenv("OLIVIA_MEMBER_REFRESH_S", "1"))
+PROFILES_PATH = CONFIG_DIR / "member_profiles.json"
+BATCH = 5000
+
+metrics.describe("olivia_member_cache_total", "counter", "Member profile lookups, by result (hit, miss).")
+metrics.describe("olivia_member_import_rows_total", "counter", "Member rows read by bulk imports, by result (upserted, skipped).")
+
+_UPSERT = """
+    INSERT INTO members(id, home_branch_id, email, phone, updated_at) VALUES (?,?,?,?,?)
+    ON CONFLICT(id) DO UPDATE SET
+      home_branch_id = excluded.home_branch_id,
+      email = excluded.email,
+      phone = excluded.phone,
+      updated_at = excluded.updated_at
+    WHERE members.home_branch_id IS NOT excluded.home_branch_id
+       OR members.email IS NOT excluded.email
+       OR members.phone IS NOT excluded.phone
+"""
+
+
+class Member(NamedTuple):
+    id: str
+    home_branch_id: Optional[str]
+    email: Optional[str]
+    phone: Optional[str]
+
+
+class ImportResult(NamedTuple):
+    rows: int
+    skipped: int
+
+
+def _text(v: Any) -> Optional[str]:
+    if v is None:
+        return None
+    s = str(v).strip()
+    return s or None
+
+
+def _member(profile: Dict[str, Any], member_id: Any = None) -> Optional[Member]:
+    mid = _text(member_id if member_id is not None else profile.get("member_id", profile.get("id")))
+    if not mid:
+        return None
+    return Member(mid, _text(profile.get("home_branch_id")), _text(profile.get("email")), _text(profile.get("phone")))
+
+
+# ----------------------------
+# Streaming readers
+# ----------------------------
+class _JsonStream:
+    """Entries of a top-level JSON object or array, decoded one at a time from a text stream."""
+
+    def __init__(self, fp: TextIO, chunk: int = 1 << 16) -> None:
+        self._fp = fp
+        self._chunk = chunk
+        self._dec = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self) -> None:
+        if self._eof:
+            raise ValueError("unexpected end of JSON")
+        data = self._fp.read(self._chunk)
+        if not data:
+            self._eof = True
+        if self._pos > len(self._buf) // 2:
+            self._buf, self._pos = self._buf[self._pos:], 0
+        self._buf += data
+
+    def _peek(self) -> str:
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in " \t\r\n":
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            self._fill()
+            if self._eof and self._pos >= len(self._buf):
+                raise ValueError("unexpected end of JSON")
+
+    def _expect(self, ch: str) -> None:
+        if self._peek() != ch:
+            raise ValueError(f"expected {ch!r} at offset {self._pos}")
+        self._pos += 1
+
+    def _value(self) -> Any:
+        self._peek()
+        while True:
+            try:
+                value, end = self._dec.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            else:
+                # a number (or literal) that ends with the buffer may continue in the next chunk
+                if end < len(self._buf) or self._eof:
+                    self._pos = end
+                    return value
+            self._fill()
+
+    def entries(self) -> Iterator[Tuple[Optional[str], Any]]:
+        """(key, value) for an object, (None, value) for an array."""
+        opening = self._peek()
+        if opening not in "{[":
+            raise ValueError("expected a JSON object or array")
+        closing = "}" if opening == "{" else "]"
+        self._pos += 1
+        if self._peek() == closing:
+            return
+        while True:
+            key = None
+            if opening == "{":
+                key = self._value()
+                self._expect(":")
+            yield key, self._value()
+            nxt = self._peek()
+            self._pos += 1
+            if nxt == closing:
+                return
+            if nxt != ",":
+                raise ValueError(f"expected ',' or {closing!r} at offset {self._pos - 1}")
+
+
+def read_members(path: Path, fmt: Optional[str] = None) -> Iterator[Optional[Member]]:
+    """Profiles from a roster file, one at a time (None for rows without an id)."""
+    fmt = (fmt or path.suffix.lstrip(".")).lower()
+    with path.open(newline="" if fmt == "csv" else None, encoding="utf-8") as fp:
+        if fmt == "csv":
+            for row in csv.DictReader(fp):
+                yield _member(row)
+        elif fmt in ("jsonl", "ndjson"):
+            for line in fp:
+                if line.strip():
+                    yield _member(json.loads(line))
+        elif fmt == "json":
+            for key, value in _JsonStream(fp).entries():
+                yield _member(value, key) if isinstance(value, dict) else None
+        else:
+            raise ValueError(f"{path}: unknown roster format {fmt!r} (json, jsonl or csv)")
+
+
+# ----------------------------
+# Directory (LRU in front of the table)
+# ----------------------------
+class MemberDirectory:
+    def __init__(self, max_entries: int = CACHE_SIZE, refresh_s: float = REFRESH_S) -> None:
+        self.max_entries = max(1, max_entries)
+        self.refresh_s = refresh_s
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[str, Optional[Member]]" = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        self._watermark: Optional[str] = None
+        self._checked = 0.0
+
+    def _check_locked(self) -> None:
+        now = time.monotonic()
+        if self._db is not None and now - self._checked < self.refresh_s:
+            return
+        if self._db is None:
+            self._db = conn()
+        self._checked = now
+        # idx_members_updated: one index probe, moves on any insert or change from any process
+        mark = self._db.execute("SELECT MAX(updated_at) FROM members").fetchone()[0]
+        if mark != self._watermark:
+            self._cache.clear()
+            self._watermark = mark
+
+    def get(self, member_id: Optional[str]) -> Optional[Member]:
+        if not member_id:
+            return None
+        with self._lock:
+            self._check_locked()
+            if member_id in self._cache:
+                self._cache.move_to_end(member_id)
+                metrics.inc("olivia_member_cache_total", result="hit")
+                return self._cache[member_id]
+            row = self._db.execute(
+                "SELECT id, home_branch_id, email, phone FROM members WHERE id = ?", (member_id,)
+            ).fetchone()
+            member = Member(*row) if row else None
+            self._cache[member_id] = member
+            if len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+            metrics.inc("olivia_member_cache_total", result="miss")
+            return member
+
+    def home_branch(self, member_id: Optional[str]) -> Optional[str]:
+        member = self.get(member_id)
+        return member.home_branch_id if member else None
+
+    def invalidate(self, member_ids: Optional[Iterable[str]] = None) -> None:
+        """Drop the given ids, or everything (and reconnect) when None."""
+        with self._lock:
+            if member_ids is None:
+                self._cache.clear()
+                self._watermark = None
+                if self._db is not None:
+                    self._db.close()
+                    self._db = None
+                return
+            for mid in member_ids:
+                self._cache.pop(mid, None)
+
+
+DIRECTORY = MemberDirectory()
+
+
+def get(member_id: Optional[str]) -> Optional[Member]:
+    return DIRECTORY.get(member_id)
+
+
+def home_branch(member_id: Optional[str]) -> Optional[str]:
+    return DIRECTORY.home_branch(member_id)
+
+
+# ----------------------------
+# Writes
+# ----------------------------
+def _now() -> str:
+    # UTC so MAX(updated_at) keeps moving forward across DST changes
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _write(members: Iterable[Optional[Member]], c: sqlite3.Connection) -> ImportResult:
+    now = _now()
+    rows = skipped = 0
+    batch: List[Tuple[Any, ...]] = []
+    for m in members:
+        if m is None:
+            skipped += 1
+            continue
+        batch.append((m.id, m.home_branch_id, m.email, m.phone, now))
+        if len(batch) >= BATCH:
+            c.executemany(_UPSERT, batch)
+            rows += len(batch)
+            batch.clear()
+    if batch:
+        c.executemany(_UPSERT, batch)
+        rows += len(batch)
+    metrics.inc("olivia_member_import_rows_total", rows, result="upserted")
+    metrics.inc("olivia_member_import_rows_total", skipped, result="skipped")
+    return ImportResult(rows, skipped)
+
+
+def import_file(path: Path, fmt: Optional[str] = None, source: Optional[str] = None) -> ImportResult:
+    """Stream a roster into `members` (one transaction); `source` records it for sync_config."""
+    c = conn()
+    try:
+        result = _write(read_members(path, fmt), c)
+        if source is not None:
+            st = path.stat()
+            c.execute(
+                "INSERT OR REPLACE INTO member_sources(source, stamp, rows, imported_at) VALUES (?,?,?,?)",
+                (source, f"{st.st_mtime_ns}:{st.st_size}", result.rows, _now()),
+            )
+        c.commit()
+    finally:
+        c.close()
+    DIRECTORY.invalidate()
+    return result
+
+
+def sync_config(path: Path = PROFILES_PATH) -> Optional[ImportResult]:
+    """Import configs/member_profiles.json if it changed since it was last imported."""
+    if not path.exists():
+        return None
+    st = path.stat()
+    c = conn()
+    try:
+        row = c.execute("SELECT stamp FROM member_sources WHERE source = ?", (path.name,)).fetchone()
+    finally:
+        c.close()
+    if row and row[0] == f"{st.st_mtime_ns}:{st.st_size}":
+        return None
+    return import_file(path, "json", source=path.name)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(prog="python -m app.members", description="Member directory tools")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    imp = sub.add_parser("import", help="stream a roster (json, jsonl or csv) into the members table")
+    imp.add_argument("path", type=Path)
+    imp.add_argument("--format", choices=["json", "jsonl", "csv"], default=None, help="default: from the file extension")
+    args = ap.parse_args()
+
+    from .calendar_store import init_db
+
+    init_db()
+    t0 = time.perf_counter()
+    result = import_file(args.path, args.format)
+    print(f"{result.rows} members upserted, {result.skipped} rows skipped in {time.perf_counter() - t0:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Tiny in-process metrics registry (counters, gauges, histograms), rendered
+as Prometheus text by the /metrics router. No external dependency.
+"""
+from __future__ import annotations
+
+import bisect
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+_LOCK = threading.Lock()
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+# name -> (type, help)
+_META: Dict[str, Tuple[str, str]] = {}
+# name -> {labels -> value}
+_VALUES: Dict[str, Dict[LabelKey, float]] = {}
+# histogram name -> upper bounds; name -> {labels -> [bucket counts..., sum, count]}
+_BUCKETS: Dict[str, Tuple[float, ...]] = {}
+_HISTS: Dict[str, Dict[LabelKey, List[float]]] = {}
+
+# seconds; spans a cached SQLite read up to a cold model load
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def describe(name: str, kind: str, help_text: str, buckets: Optional[Sequence[float]] = None) -> None:
+    """Register a metric's type ("counter" | "gauge" | "histogram") and HELP line."""
+    with _LOCK:
+        _META[name] = (kind, help_text)
+        if kind == "histogram":
+            _BUCKETS[name] = tuple(sorted(buckets or LATENCY_BUCKETS))
+            _HISTS.setdefault(name, {})
+        else:
+            _VALUES.setdefault(name, {})
+
+
+def inc(name: str, value: float = 1.0, **labels: str) -> None:
+    k = _key(labels)
+    with _LOCK:
+        series = _VALUES.setdefault(name, {})
+        series[k] = series.get(k, 0.0) + value
+
+
+def set_gauge(name: str, value: float, **labels: str) -> None:
+    with _LOCK:
+        _VALUES.setdefault(name, {})[_key(labels)] = float(value)
+
+
+def observe(name: str, value: float, **labels: str) -> None:
+    """Add one sample to a histogram registered with describe(..., "histogram")."""
+    k = _key(labels)
+    with _LOCK:
+        bounds = _BUCKETS.get(name) or LATENCY_BUCKETS
+        row = _HISTS.setdefault(name, {}).get(k)
+        if row is None:
+            row = _HISTS[name][k] = [0.0] * (len(bounds) + 2)
+        i = bisect.bisect_left(bounds, value)
+        if i < len(bounds):
+            row[i] += 1
+        row[-2] += value
+        row[-1] += 1
+
+
+def value(name: str, **labels: str) -> float:
+    with _LOCK:
+        return _VALUES.get(name, {}).get(_key(labels), 0.0)
+
+
+def _fmt_labels(k: LabelKey, le: Optional[str] = None) -> str:
+    pairs = list(k) + ([("le", le)] if le is not None else [])
+    if not pairs:
+        return ""
+    inner = ",".join(f'{n}="{v}"' for n, v in pairs)
+    return "{" + inner + "}"
+
+
+def _render_histogram(lines: List[str], name: str) -> None:
+    bounds = _BUCKETS.get(name) or LATENCY_BUCKETS
+    for k, row in sorted(_HISTS[name].items()):
+        cumulative = 0.0
+        for bound, n in zip(bounds, row):
+            cumulative += n
+            lines.append(f"{name}_bucket{_fmt_labels(k, f'{bound:g}')} {cumulative:g}")
+        lines.append(f"{name}_bucket{_fmt_labels(k, '+Inf')} {row[-1]:g}")
+        lines.append(f"{name}_sum{_fmt_labels(k)} {row[-2]:g}")
+        lines.append(f"{name}_count{_fmt_labels(k)} {row[-1]:g}")
+
+
+def render() -> str:
+    lines = []
+    with _LOCK:
+        for name in sorted(set(_VALUES) | set(_HISTS)):
+            kind, help_text = _META.get(name, ("untyped", ""))
+            if help_text:
+                lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if name in _HISTS:
+                _render_histogram(lines, name)
+                continue
+            for k, v in sorted(_VALUES[name].items()):
+                lines.append(f"{name}{_fmt_labels(k)} {v:g}")
+    return "\n".join(lines) + "\n"
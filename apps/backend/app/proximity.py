@@ -0,0 +1,128 @@
+"""
+Branch-to-branch travel times.
+
+configs/branch_proximity.json lists a few hand-picked neighbours per branch:
+
+    {"blue_ash": [{"branch_id": "central_parkway", "minutes": 15}, ...], ...}
+
+("drive_minutes" is accepted as an alias for "minutes"). The file is read
+and validated through the config registry (parsed once, rebuilt when it
+changes on disk). Every listed drive is treated as a two-way road (when
+both directions are listed the shorter one wins), and Floyd-Warshall turns
+those edges into the shortest travel time between every pair of branches,
+so a radius query also finds branches that are only reachable through a
+neighbour.
+
+Each branch then keeps the other reachable branches sorted by minutes:
+minutes(a, b) is a matrix lookup, nearest(k) a slice and within(radius) a
+bisect plus a slice.
+"""
+from __future__ import annotations
+
+import math
+from bisect import bisect_right
+from typing import Any, Dict, List, Optional, Tuple
+
+from .config_registry import ConfigFile
+
+
+class Proximity:
+    def __init__(self, edges: Dict[Tuple[str, str], int]) -> None:
+        """`edges` maps (from, to) -> minutes; treated as undirected."""
+        ids = sorted({b for pair in edges for b in pair})
+        self._index = {b: i for i, b in enumerate(ids)}
+        self.branch_ids = ids
+
+        n = len(ids)
+        dist: List[List[float]] = [[0.0 if i == j else math.inf for j in range(n)] for i in range(n)]
+        for (a, b), minutes in edges.items():
+            i, j = self._index[a], self._index[b]
+            if minutes < dist[i][j]:
+                dist[i][j] = dist[j][i] = minutes
+        for k in range(n):
+            dk = dist[k]
+            for i in range(n):
+                dik = dist[i][k]
+                if dik == math.inf:
+                    continue
+                di = dist[i]
+                for j in range(n):
+                    if dik + dk[j] < di[j]:
+                        di[j] = dik + dk[j]
+        self._dist = dist
+
+        # per branch: other reachable branches, nearest first (ties by id)
+        self._sorted: Dict[str, List[Tuple[str, int]]] = {}
+        self._sorted_minutes: Dict[str, List[int]] = {}
+        for a, i in self._index.items():
+            ranked = sorted((int(dist[i][j]), b) for b, j in self._index.items() if j != i and dist[i][j] != math.inf)
+            self._sorted[a] = [(b, m) for m, b in ranked]
+            self._sorted_minutes[a] = [m for m, _ in ranked]
+
+    def __len__(self) -> int:
+        return len(self.branch_ids)
+
+    def minutes(self, a: str, b: str) -> Optional[int]:
+        """Shortest travel time from a to b, or None if either is unknown or unreachable."""
+        i, j = self._index.get(a), self._index.get(b)
+        if i is None or j is None or self._dist[i][j] == math.inf:
+            return None
+        return int(self._dist[i][j])
+
+    def nearest(self, branch_id: str, k: int) -> List[Tuple[str, int]]:
+        """The k closest other branches as (branch_id, minutes), nearest first."""
+        return self._sorted.get(branch_id, [])[: max(0, k)]
+
+    def within(self, branch_id: str, radius_min: float, limit: Optional[int] = None) -> List[Tuple[str, int]]:
+        """Other branches at most radius_min minutes away as (branch_id, minutes), nearest first."""
+        ranked = self._sorted.get(branch_id)
+        if not ranked:
+            return []
+        end = bisect_right(self._sorted_minutes[branch_id], radius_min)
+        if limit is not None:
+            end = min(end, max(0, limit))
+        return ranked[:end]
+
+
+def _minutes(entry: Dict[str, Any], where: str) -> int:
+    values = {k: entry[k] for k in ("minutes", "drive_minutes") if k in entry}
+    if not values:
+        raise ValueError(f"{where}: missing 'minutes'")
+    if len(set(values.values())) > 1:
+        raise ValueError(f"{where}: 'minutes' and 'drive_minutes' disagree ({values['minutes']} vs {values['drive_minutes']})")
+    m = next(iter(values.values()))
+    if isinstance(m, bool) or not isinstance(m, (int, float)) or not math.isfinite(m) or m < 0:
+        raise ValueError(f"{where}: minutes must be a non-negative number, not {m!r}")
+    return int(round(m))
+
+
+def parse(raw: Any, source: str = "branch_proximity") -> Proximity:
+    """Validate the config's shape and build the matrix; ValueError names the bad entry."""
+    if not isinstance(raw, dict):
+        raise ValueError(f"{source}: expected an object of branch_id -> neighbours")
+    edges: Dict[Tuple[str, str], int] = {}
+    for branch_id, neighbours in raw.items():
+        if not isinstance(neighbours, list):
+            raise ValueError(f"{source}[{branch_id!r}]: expected a list of neighbours")
+        for n, entry in enumerate(neighbours):
+            where = f"{source}[{branch_id!r}][{n}]"
+            if not isinstance(entry, dict):
+                raise ValueError(f"{where}: expected an object")
+            other = entry.get("branch_id")
+            if not isinstance(other, str) or not other:
+                raise ValueError(f"{where}: missing 'branch_id'")
+            if other == branch_id:
+                raise ValueError(f"{where}: a branch cannot be its own neighbour")
+            minutes = _minutes(entry, where)
+            key = (branch_id, other)
+            edges[key] = min(minutes, edges.get(key, minutes))
+    return Proximity(edges)
+
+
+# a missing file means no proximity data; a malformed one raises ValueError at startup
+PROXIMITY: ConfigFile[Proximity] = ConfigFile("branch_proximity.json", parse, missing=lambda: Proximity({}))
+
+
+def get() -> Proximity:
+    """The current proximity graph (rebuilt when branch_proximity.json changes)."""
+    return PROXIMITY.get()
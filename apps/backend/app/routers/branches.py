@@ -1,14 +1,26 @@
-import json
-from pathlib import Path
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Query
 
-router = APIRouter()
+from .. import proximity
+from ..config_registry import FACILITIES
 
-ROOT_DIR = Path(__file__).resolve().parents[2]   # /app (Docker) or ~/Olivia/apps/backend (local)
-CONFIG_DIR = Path(__file__).resolve().parents[2] / "configs" if (Path(__file__).resolve().parents[2] / "configs").exists() else Path(__file__).resolve().parents[4] / "configs"
-FACILITIES_PATH = CONFIG_DIR / "facilities.json"
+router = APIRouter()
 
 @router.get("/branches")
 def list_branches():
-    data = json.loads(FACILITIES_PATH.read_text())
-    return {"branches": data["branches"]}
+    return {"branches": [dict(b) for b in FACILITIES.get().records]}
+
+@router.get("/branches/{branch_id}/nearby")
+def nearby_branches(
+    branch_id: str,
+    within_min: float = Query(30, ge=0, description="travel-time radius in minutes"),
+    limit: int | None = Query(None, ge=1),
+):
+    facilities = FACILITIES.get()
+    if branch_id not in facilities.by_id:
+        raise HTTPException(status_code=404, detail="branch not found")
+    near = proximity.get().within(branch_id, within_min, limit)
+    return {
+        "branch_id": branch_id,
+        "within_min": within_min,
+        "branches": [{"branch_id": b, "branch_name": facilities.name(b), "minutes": m} for b, m in near],
+    }
@@ -1,9 +1,13 @@
-import json
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 
-from fastapi import APIRouter, Query
-from ..calendar_store import conn, availability_color
+from fastapi import APIRouter, Header, Query, Response
+from fastapi.responses import JSONResponse
+from .. import metrics, timing
+from ..calendar_cache import CALENDAR_CACHE
+from ..calendar_store import conn, availability_color, class_tags
+from ..data_version import ALL, VERSIONS, not_modified
+from ..schedule_index import SCHEDULE_INDEX
 
 TZ = ZoneInfo("America/New_York")
 router = APIRouter()
@@ -14,7 +18,8 @@ def get_calendar(
     end: str = Query(..., description="YYYY-MM-DD"),
     branch_ids: str | None = Query(None, description="comma-separated, optional"),
     buckets: str | None = Query(None, description="comma-separated, optional"),
-    has_spots: bool = Query(False)
+    has_spots: bool = Query(False),
+    if_none_match: str | None = Header(None),
 ):
     start_dt = datetime.fromisoformat(start).replace(tzinfo=TZ)
     end_dt = datetime.fromisoformat(end).replace(tzinfo=TZ) + timedelta(days=1)
@@ -22,38 +27,53 @@ def get_calendar(
     branch_list = [x.strip() for x in branch_ids.split(",")] if branch_ids else None
     bucket_list = [x.strip() for x in buckets.split(",")] if buckets else None
 
-    c = conn()
-    q = """
-    SELECT
-      s.id AS session_id,
-      s.start_ts, s.end_ts, s.location, s.instructor, s.capacity,
-      b.id AS branch_id, b.name AS branch_name,
-      cl.id AS class_id, cl.name AS class_name, cl.bucket, cl.tags_json,
-      e.enrolled AS enrolled
-    FROM sessions s
-    JOIN branches b ON b.id = s.branch_id
-    JOIN classes cl ON cl.id = s.class_id
-    JOIN enrollments e ON e.session_id = s.id
-    WHERE s.status='scheduled'
-      AND s.start_ts >= ?
-      AND s.start_ts < ?
-    """
-    params = [start_dt.isoformat(), end_dt.isoformat()]
+    # versions of the branches in view ("*" for all of them): an unchanged schedule is a 304 without SQLite
+    key = f"{start_dt.date()}|{end_dt.date()}|{','.join(sorted(set(branch_list or [])))}|{','.join(sorted(set(bucket_list or [])))}|{int(has_spots)}"
+    etag = VERSIONS.etag("calendar", key, branch_list or [ALL])
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if not_modified(if_none_match, etag):
+        metrics.inc("olivia_conditional_get_total", route="/calendar", result="not_modified")
+        return Response(status_code=304, headers=headers)
+    metrics.inc("olivia_conditional_get_total", route="/calendar", result="full")
+    body = CALENDAR_CACHE.get(key, etag)
+    if body is not None:
+        return Response(content=body, media_type="application/json", headers=headers)
 
-    if branch_list:
-        ph = ",".join(["?"] * len(branch_list))
-        q += f" AND b.id IN ({ph})"
-        params.extend(branch_list)
+    rows = SCHEDULE_INDEX.query(start_dt.isoformat(), end_dt.isoformat(), branch_list, bucket_list, has_spots=has_spots)
+    if rows is None:
+        c = conn()
+        q = """
+        SELECT
+          s.id AS session_id,
+          s.start_ts, s.end_ts, s.location, s.instructor, s.capacity,
+          b.id AS branch_id, b.name AS branch_name,
+          cl.id AS class_id, cl.name AS class_name, cl.bucket,
+          e.enrolled AS enrolled
+        FROM sessions s
+        JOIN branches b ON b.id = s.branch_id
+        JOIN classes cl ON cl.id = s.class_id
+        JOIN enrollments e ON e.session_id = s.id
+        WHERE s.status='scheduled'
+          AND s.start_ts >= ?
+          AND s.start_ts < ?
+        """
+        params = [start_dt.isoformat(), end_dt.isoformat()]
 
-    if bucket_list:
-        ph = ",".join(["?"] * len(bucket_list))
-        q += f" AND cl.bucket IN ({ph})"
-        params.extend(bucket_list)
+        if branch_list:
+            ph = ",".join(["?"] * len(branch_list))
+            q += f" AND b.id IN ({ph})"
+            params.extend(branch_list)
 
-    q += " ORDER BY s.start_ts ASC"
+        if bucket_list:
+            ph = ",".join(["?"] * len(bucket_list))
+            q += f" AND cl.bucket IN ({ph})"
+            params.extend(bucket_list)
 
-    rows = c.execute(q, params).fetchall()
-    c.close()
+        q += " ORDER BY s.start_ts ASC"
+
+        with timing.stage("db"):
+            rows = c.execute(q, params).fetchall()
+        c.close()
 
     events = []
     for r in rows:
@@ -76,7 +96,7 @@ def get_calendar(
                 "branch_name": r["branch_name"],
                 "class_id": r["class_id"],
                 "bucket": r["bucket"],
-                "tags": json.loads(r["tags_json"]),
+                "tags": class_tags(r["class_id"]),
                 "location": r["location"],
                 "instructor": r["instructor"],
                 "capacity": cap,
@@ -87,4 +107,6 @@ def get_calendar(
             }
         })
 
-    return {"events": events}
+    out = JSONResponse({"events": events}, headers=headers)
+    CALENDAR_CACHE.put(key, etag, out.body, branch_list)
+    return out
@@ -1,96 +1,39 @@
 import json
+import os
 import re
 from datetime import datetime, timedelta
-from datetime import date, timedelta
-from pathlib import Path
 from typing import Any, Dict, List, Optional
 from zoneinfo import ZoneInfo
 
 OLIVIA_GREETING = "This is Olivia with the YMCA! How may I help you?"
 
-BUCKET_ALIASES = {
-    "kids_club": "kids",
-    "kidsclub": "kids",
-    "childcare": "kids",
-    "daycare": "kids",
-    "kids": "kids",
-    "swim": "swim",
-    "swimming": "swim",
-    "sports": "sports",
-    "gym": "gym",
-    "run": "run",
-    "running": "run",
-    "run_club": "run",
-    "runclub": "run",
-}
-
-
 
+import httpx
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel, Field
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, ValidationError, field_validator
 
+from .. import gazetteer, hours_engine, members, metrics, proximity, temporal, timing
 from ..calendar_store import conn, availability_color
-from ..llm import ollama_chat_json
+from ..config_registry import FACILITIES
+from ..data_version import VERSIONS
+from ..llm import ollama_chat_json, ollama_chat_stream
+from ..circuit_breaker import CircuitOpen
+from ..llm_gate import GateFull, PRIORITY_FRONT_DESK, PRIORITY_MEMBER
+from ..session_search import BUCKET_ALIASES
+from ..schedule_index import SCHEDULE_INDEX
+from ..session_store import STORE, SessionState
+from ..suggestions import suggest_sessions
 
 TZ = ZoneInfo("America/New_York")
-REPO_ROOT = Path(__file__).resolve().parents[2]  # /app (Docker) or ~/Olivia/apps/backend (local)
-CONFIGS = Path(__file__).resolve().parents[2] / "configs" if (Path(__file__).resolve().parents[2] / "configs").exists() else Path(__file__).resolve().parents[4] / "configs"
-FACILITIES_PATH = CONFIGS / "facilities.json"
 
 router = APIRouter()
 
-MAX_HISTORY = 12
-CHAT_HISTORY: Dict[str, List[Dict[str, str]]] = {}
-PENDING_CONTEXT: Dict[str, Dict[str, Any]] = {}
-LAST_SUGGESTIONS: Dict[str, List[Dict[str, Any]]] = {}
-
-DEFAULT_FRONT_DESK_BRANCH_ID = "campbell_county"
-_MEMBER_HOME_CACHE: dict[str, str] = {}
-
-def _member_home_branch(member_id: str | None) -> str | None:
-    if not member_id:
-        return None
-    if member_id in _MEMBER_HOME_CACHE:
-        return _MEMBER_HOME_CACHE[member_id]
-    try:
-        # REPO_ROOT/CONFIGS is already set near the top of this file
-        mp = (CONFIGS / 'member_profiles.json')
-        if not mp.exists():
-            return None
-        import json
-        data = json.loads(mp.read_text())
-        prof = data.get(member_id) or {}
-        hb = prof.get('home_branch_id')
-        if hb:
-            _MEMBER_HOME_CACHE[member_id] = hb
-        return hb
-    except Exception:
-        return None
-
-
 # ----------------------------
 # Member defaults + bucket aliases
 # ----------------------------
 FRONT_DESK_DEFAULT_BRANCH = "campbell_county"
-_MEMBER_PROFILES_CACHE: Optional[Dict[str, Any]] = None
-
-def _load_member_profiles() -> Dict[str, Any]:
-    cfg = CONFIGS / "member_profiles.json"
-    if not cfg.exists():
-        return {}
-    try:
-        return json.loads(cfg.read_text())
-    except Exception:
-        return {}
-
-def _get_member_home_branch(member_id: Optional[str]) -> Optional[str]:
-    global _MEMBER_PROFILES_CACHE
-    if not member_id:
-        return None
-    if _MEMBER_PROFILES_CACHE is None:
-        _MEMBER_PROFILES_CACHE = _load_member_profiles()
-    prof = (_MEMBER_PROFILES_CACHE.get(member_id) or {})
-    return prof.get("home_branch_id")
 
 def _default_branch_ids(req) -> Optional[List[str]]:
     # front desk defaults to Campbell County unless explicitly chosen
@@ -98,8 +41,8 @@ def _default_branch_ids(req) -> Optional[List[str]]:
         return [FRONT_DESK_DEFAULT_BRANCH]
     if getattr(req.ui_context, "default_branch_id", None):
         return [req.ui_context.default_branch_id]
-    mid = getattr(req.ui_context, "member_id", None)
-    hb = _get_member_home_branch(mid)
+    # indexed lookup behind a small LRU (app/members.py); blocking, so callers hop to the threadpool
+    hb = members.home_branch(getattr(req.ui_context, "member_id", None))
     if hb:
         return [hb]
     return None
@@ -132,32 +75,6 @@ def _extract_buckets_from_message(message: Optional[str]) -> Optional[List[str]]
             extracted.add(bucket)
     return list(extracted) if extracted else None
 
-def _match_branch_id_from_text(branches: List[Dict[str, Any]], message: Optional[str]) -> Optional[str]:
-    if not message:
-        return None
-    msg = message.strip().lower()
-    msg_u = msg.replace("-", " ").replace("_", " ")
-
-    # id-ish matches
-    for b in branches:
-        bid = (b.get("id") or "").lower()
-        if not bid:
-            continue
-        if msg == bid or msg.replace(" ", "_") == bid or msg_u.replace(" ", "_") == bid:
-            return b.get("id")
-
-    # name substring matches
-    for b in branches:
-        name = (b.get("name") or "").lower()
-        if name and name in msg:
-            return b.get("id")
-        if name:
-            core = name.replace("ymca", "").strip()
-            toks = [t for t in core.split() if t]
-            if toks and all(t in msg for t in toks):
-                return b.get("id")
-    return None
-
 
 def _now_iso() -> str:
     return datetime.now(TZ).isoformat()
@@ -170,286 +87,8 @@ def _week_range_from_now() -> tuple[str, str]:
     return start.date().isoformat(), end.date().isoformat()
 
 def _load_branches() -> List[Dict[str, Any]]:
-    cfg = json.loads(FACILITIES_PATH.read_text())
-    return cfg["branches"]
-
-def _resolve_branch_id_from_text(branches: list[dict], text: str) -> str | None:
-    """
-    Match user text like 'Campbell County' or 'Blue Ash YMCA' to a branch_id.
-    Deterministic: exact id match, then substring match on branch name.
-    """
-    if not text:
-        return None
-    t = text.strip().lower()
-
-    # exact id match
-    for b in branches:
-        bid = (b.get("id") or "").lower()
-        if bid and bid == t:
-            return b.get("id")
-
-    # substring match on branch name
-    for b in branches:
-        name = (b.get("name") or "").lower()
-        if name and t in name:
-            return b.get("id")
-
-    # loose match: remove 'ymca' and punctuation-ish
-    t2 = re.sub(r'[^a-z0-9 ]+', ' ', t).replace("ymca", "").strip()
-    for b in branches:
-        name = re.sub(r'[^a-z0-9 ]+', ' ', (b.get("name") or "").lower()).replace("ymca", "").strip()
-        if t2 and name and t2 in name:
-            return b.get("id")
-
-    return None
-
-
-def _resolve_branch_ids_from_text(branches: List[Dict[str, Any]], text: str) -> Optional[List[str]]:
-    t = (text or "").strip().lower()
-    if not t:
-        return None
-
-    # exact id match
-    for b in branches:
-        if (b.get("id") or "").lower() == t:
-            return [b["id"]]
-
-    # name substring match (handles e.g. "Campbell County")
-    t2 = t.replace("ymca", "").strip()
-    hits = []
-    for b in branches:
-        name = (b.get("name") or "").lower()
-        if t in name or (t2 and t2 in name):
-            hits.append(b)
-
-    if len(hits) == 1:
-        return [hits[0]["id"]]
-    return None
-def _search_sessions(
-    date_start: str,
-    date_end: str,
-    branch_ids: Optional[List[str]],
-    buckets: Optional[List[str]],
-    tags: Optional[List[str]],
-    has_spots: bool,
-    limit: int = 5,
-) -> List[Dict[str, Any]]:
-    c = conn()
-    rows = c.execute(
-        """
-        SELECT
-          s.id AS session_id,
-          s.start_ts, s.end_ts, s.location, s.instructor, s.capacity,
-          b.id AS branch_id, b.name AS branch_name,
-          cl.id AS class_id, cl.name AS class_name, cl.bucket, cl.tags_json,
-          e.enrolled AS enrolled
-        FROM sessions s
-        JOIN branches b ON b.id = s.branch_id
-        JOIN classes cl ON cl.id = s.class_id
-        JOIN enrollments e ON e.session_id = s.id
-        WHERE s.status='scheduled'
-          AND date(s.start_ts) >= date(?)
-          AND date(s.start_ts) <= date(?)
-        """,
-        (date_start, date_end),
-    ).fetchall()
-    c.close()
-
-    out: List[Dict[str, Any]] = []
-    tag_set = set([t.lower() for t in (tags or [])])
-    bucket_set = set([BUCKET_ALIASES.get(b.lower(), b.lower()) for b in (buckets or [])])
-
-    for r in rows:
-        if branch_ids and r["branch_id"] not in branch_ids:
-            continue
-
-        r_bucket_raw = (r["bucket"] or "").lower()
-        r_bucket = BUCKET_ALIASES.get(r_bucket_raw, r_bucket_raw)
-        if bucket_set and r_bucket not in bucket_set:
-            continue
-
-        r_tags = [t.lower() for t in json.loads(r["tags_json"])]
-        if tag_set and not (tag_set.intersection(r_tags)):
-            continue
-
-        cap = int(r["capacity"])
-        enrolled = int(r["enrolled"])
-        remaining = cap - enrolled
-        if has_spots and remaining <= 0:
-            continue
-
-        color = availability_color(enrolled, cap)
-        out.append(
-            {
-                "session_id": r["session_id"],
-                "class_id": r["class_id"],
-                "class_name": r["class_name"],
-                "bucket": r["bucket"],
-                "tags": json.loads(r["tags_json"]),
-                "branch_id": r["branch_id"],
-                "branch_name": r["branch_name"],
-                "start_time": r["start_ts"],
-                "end_time": r["end_ts"],
-                "location": r["location"],
-                "instructor": r["instructor"],
-                "capacity": cap,
-                "enrolled": enrolled,
-                "remaining": remaining,
-                "percent_full": (enrolled / cap) if cap else 1.0,
-                "availability_color": color,
-            }
-        )
-
-    out.sort(key=lambda x: x["start_time"])
-    return out[: max(1, min(limit, 10))]
-
-
-
-# ----------------------------
-# Intelligent suggestion policy (deterministic)
-# ----------------------------
-def _repo_root_from_here() -> Path:
-    here = Path(__file__).resolve()
-    for p in here.parents:
-        if (p / "configs").exists():
-            return p
-    # fallback: go up a few levels
-    return here.parents[4]
-
-def _load_branch_proximity() -> Dict[str, List[Dict[str, Any]]]:
-    root = _repo_root_from_here()
-    cfg = root / "configs" / "branch_proximity.json"
-    if not cfg.exists():
-        return {}
-    try:
-        return json.loads(cfg.read_text())
-    except Exception:
-        return {}
-
-
-def _fmt_day(d: str) -> str:
-    # d is YYYY-MM-DD
-    try:
-        dt = date.fromisoformat(d)
-        return dt.strftime('%a %b %-d')
-    except Exception:
-        return d
-
-def _intelligent_suggest_sessions(
-    date_start: str,
-    date_end: str,
-    home_branch_ids: Optional[List[str]],
-    buckets: Optional[List[str]],
-    tags: Optional[List[str]],
-    has_spots: bool,
-    limit: int,
-    primary_branch_id: Optional[str] = None,
-) -> tuple[List[Dict[str, Any]], str]:
-    """Return (suggested_sessions, suggestion_note)."""
-    home_branch_ids = home_branch_ids or []
-    home_id = home_branch_ids[0] if home_branch_ids else None
-
-    # 1) primary: requested day(s) at your Y
-    primary = _search_sessions(date_start, date_end, home_branch_ids or None, buckets, tags, has_spots, limit)
-    for ss in primary:
-        ss['suggestion_tier'] = 'primary'
-    if primary:
-        bn = primary[0].get('branch_name') or 'your Y'
-        note = f"Here are the top options at {bn}:"
-        return primary, note
-
-    # widen window for other days (±7d)
-    try:
-        ds = date.fromisoformat(date_start)
-        de = date.fromisoformat(date_end)
-    except Exception:
-        ds = None
-        de = None
-
-    if ds and de:
-        win_start = (ds - timedelta(days=7)).isoformat()
-        win_end = (de + timedelta(days=7)).isoformat()
-    else:
-        win_start, win_end = date_start, date_end
-
-    # 2) other day at your Y
-    other = _search_sessions(win_start, win_end, home_branch_ids or None, buckets, tags, has_spots, limit)
-    # remove anything that matches requested day window
-    filtered = []
-    for ss in other:
-        d0 = (ss.get('start_time') or '')[:10]
-        if d0 and (d0 < date_start or d0 > date_end):
-            filtered.append(ss)
-    other = filtered[:limit]
-    for ss in other:
-        ss['suggestion_tier'] = 'other_day_at_y'
-    if other:
-        bn = other[0].get('branch_name') or 'your Y'
-        first_day = (other[0].get('start_time') or '')[:10] or ''
-        note = f"I’m not seeing anything on {_fmt_day(date_start)} at {bn}, but here are a few options on other days (starting {_fmt_day(first_day)}):"
-        return other, note
-
-    # 3) nearby Ys: same day
-    prox = _load_branch_proximity() if home_id else {}
-    nearby = (prox.get(home_id) or []) if home_id else []
-    nearby_ids = [x.get('branch_id') for x in nearby if x.get('branch_id')]
-    near_out = []
-    for cand in nearby:
-        bid = cand.get('branch_id')
-        mins = cand.get('drive_minutes')
-        if not bid:
-            continue
-        got = _search_sessions(date_start, date_end, [bid], buckets, tags, has_spots, limit)
-        for ss in got:
-            ss['suggestion_tier'] = 'nearby_same_day'
-            ss['drive_minutes'] = mins
-            ss['home_branch_id'] = home_id
-        near_out.extend(got)
-        if len(near_out) >= limit:
-            break
-    near_out = sorted(near_out, key=lambda x: x.get('start_time') or '')[:limit]
-    if near_out:
-        note = f"I’m not seeing matches at your Y on {_fmt_day(date_start)}, but here are a few nearby options the same day:"
-        return near_out, note
-
-    # 4) nearby Ys: other days
-    near2 = []
-    for cand in nearby:
-        bid = cand.get('branch_id')
-        mins = cand.get('drive_minutes')
-        if not bid:
-            continue
-        got = _search_sessions(win_start, win_end, [bid], buckets, tags, has_spots, limit)
-        for ss in got:
-            ss['suggestion_tier'] = 'nearby_other_day'
-            ss['drive_minutes'] = mins
-            ss['home_branch_id'] = home_id
-        near2.extend(got)
-        if len(near2) >= limit:
-            break
-    near2 = sorted(near2, key=lambda x: x.get('start_time') or '')[:limit]
-    if near2:
-        first_day = (near2[0].get('start_time') or '')[:10] or ''
-        note = f"I’m not seeing matches at your Y right now, but here are a few nearby options on other days (starting {_fmt_day(first_day)}):"
-        return near2, note
-
-    # nothing
-    return [], "I couldn't find any matching sessions."
-
-def _branch_name(branches: List[Dict[str, Any]], branch_id: str) -> str:
-    for b in branches or []:
-        if b.get("id") == branch_id:
-            return b.get("name") or b.get("branch_name") or branch_id
-    return branch_id
-
-def _is_single_day_range(date_start: str, date_end: str) -> bool:
-    try:
-        from datetime import date
-        ds = date.fromisoformat(date_start)
-        de = date.fromisoformat(date_end)
-        return (de - ds).days == 1
-    except Exception:
-        return False
+    # parsed once by the config registry; read-only {id, name, aliases} mappings
+    return list(FACILITIES.get().records)
 
 def _search_sessions_with_fallback(
     date_start: str,
@@ -460,105 +99,10 @@ def _search_sessions_with_fallback(
     has_spots: bool,
     limit: int,
     branches: List[Dict[str, Any]],
-) -> (List[Dict[str, Any]], Dict[str, Any]):
-    """
-    Deterministic policy:
-      1) Primary branch + requested window
-      2) If none and single-day: same branch nearby days
-      3) If still thin: nearby branches same day (with minutes if known)
-    """
-    limit = int(limit or 5)
-    branch_ids = branch_ids or []
-    primary = branch_ids[0] if branch_ids else None
-
-    meta: Dict[str, Any] = {
-        "primary_branch_id": primary,
-        "primary_branch_name": _branch_name(branches, primary) if primary else None,
-        "requested_date_start": date_start,
-        "requested_date_end": date_end,
-        "strategy": "primary",
-        "fallback_used": None,
-    }
-
-    def tag_results(xs: List[Dict[str, Any]], tier: str, minutes_map: Dict[str, int] = None):
-        out = []
-        for x in xs:
-            x = dict(x)
-            x["suggestion_tier"] = tier
-            if minutes_map and x.get("branch_id") in minutes_map:
-                x["drive_minutes"] = minutes_map[x["branch_id"]]
-            out.append(x)
-        return out
-
-    # 1) Primary branch first (if provided)
-    if primary:
-        primary_results = _search_sessions(date_start, date_end, [primary], buckets, tags, has_spots, limit)
-        primary_results = tag_results(primary_results, "primary")
-    else:
-        # no branch constraint -> behave like original search
-        primary_results = _search_sessions(date_start, date_end, None, buckets, tags, has_spots, limit)
-        primary_results = tag_results(primary_results, "primary")
-
-    results = list(primary_results)
-    meta["primary_count"] = len(primary_results)
-
-    # Decide whether to expand (not pushy)
-    thin = len(results) <= 1
-    none = len(results) == 0
-
-    # 2) Other day at same branch (only if single-day request AND none)
-    if primary and none and _is_single_day_range(date_start, date_end):
-        from datetime import date, timedelta
-        ds = date.fromisoformat(date_start)
-        de = date.fromisoformat(date_end)
-        ds2 = (ds - timedelta(days=3)).isoformat()
-        de2 = (de + timedelta(days=3)).isoformat()
-        alt = _search_sessions(ds2, de2, [primary], buckets, tags, has_spots, limit)
-        alt = tag_results(alt, "other_day")
-        # Keep only those NOT on the originally requested day (makes the "other day" claim true)
-        alt = [x for x in alt if not (date_start <= (x.get("start_time","")[:10]) < date_end)]
-        if alt:
-            meta["strategy"] = "same_branch_other_day"
-            meta["fallback_used"] = "same_branch_other_day"
-            meta["other_day_window"] = {"date_start": ds2, "date_end": de2}
-            take = alt[: max(0, limit - len(results))]
-            results.extend(take)
-
-    # 3) Nearby branches same day (only if still thin OR none)
-    if primary and (len(results) == 0 or thin):
-        prox = _load_branch_proximity()
-        neigh = prox.get(primary, []) or []
-        neigh = [x for x in neigh if isinstance(x, dict) and x.get("branch_id")]
-        # take up to 3 nearest
-        neigh = sorted(neigh, key=lambda x: int(x.get("minutes", 999)))[:3]
-        neigh_ids = [x["branch_id"] for x in neigh]
-        minutes_map = {x["branch_id"]: int(x.get("minutes", 0)) for x in neigh if x.get("minutes") is not None}
-
-        if neigh_ids:
-            near = _search_sessions(date_start, date_end, neigh_ids, buckets, tags, has_spots, limit)
-            near = tag_results(near, "nearby", minutes_map=minutes_map)
-
-            if near:
-                # Only mark strategy if we actually used nearby results
-                meta["strategy"] = "nearby_same_day" if meta["strategy"] == "primary" else "mixed"
-                meta["fallback_used"] = meta["fallback_used"] or "nearby_same_day"
-                meta["nearby_branches"] = [
-                    {"branch_id": x["branch_id"], "branch_name": _branch_name(branches, x["branch_id"]), "minutes": int(x.get("minutes", 0))}
-                    for x in neigh
-                ]
-
-                take = near[: max(0, limit - len(results))]
-                results.extend(take)
-
-    # Final trim + counts
-    results = results[:limit]
-    meta["total"] = len(results)
-    meta["tiers"] = {
-        "primary": sum(1 for x in results if x.get("suggestion_tier") == "primary"),
-        "other_day": sum(1 for x in results if x.get("suggestion_tier") == "other_day"),
-        "nearby": sum(1 for x in results if x.get("suggestion_tier") == "nearby"),
-    }
-    return results, meta
+    band: Optional[List[str]] = None,
+) -> tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Tiered suggestions (primary, other day, nearby) from one query; see app/suggestions.py."""
+    return suggest_sessions(date_start, date_end, branch_ids, buckets, tags, has_spots, limit, branches, proximity.get(), band, hours_engine.get())
 
 def _enroll_member(session_id: str, member_id: str = "demo_member") -> Dict[str, Any]:
     c = conn()
@@ -566,7 +110,7 @@ def _enroll_member(session_id: str, member_id: str = "demo_member") -> Dict[str,
 
     row = cur.execute(
         """
-        SELECT s.capacity, e.enrolled
+        SELECT s.capacity, s.branch_id, e.enrolled
         FROM sessions s
         JOIN enrollments e ON e.session_id = s.id
         WHERE s.id = ? AND s.status='scheduled'
@@ -602,6 +146,7 @@ def _enroll_member(session_id: str, member_id: str = "demo_member") -> Dict[str,
         "UPDATE enrollments SET enrolled = enrolled + 1, updated_at=? WHERE session_id=?",
         (now, session_id),
     )
+    versions = VERSIONS.bump(c, [row["branch_id"]])
     c.commit()
 
     row2 = cur.execute(
@@ -618,6 +163,9 @@ def _enroll_member(session_id: str, member_id: str = "demo_member") -> Dict[str,
     capacity2 = int(row2["capacity"])
     enrolled2 = int(row2["enrolled"])
     remaining2 = capacity2 - enrolled2
+    # index first: a reader that sees the new ETag must also see the new count
+    SCHEDULE_INDEX.patch_enrolled(session_id, enrolled2)
+    VERSIONS.note(versions)
     return {
         "ok": True,
         "already_enrolled": False,
@@ -649,25 +197,195 @@ class ChatResponse(BaseModel):
     follow_up_question: Optional[str] = None
     suggested_sessions: List[Dict[str, Any]] = Field(default_factory=list)
 
-def _planner_prompt(branches: List[Dict[str, Any]], req: ChatRequest) -> List[Dict[str, str]]:
-    start_week, end_week = _week_range_from_now()
-    ui = req.ui_context.model_dump()
-    last = LAST_SUGGESTIONS.get(req.session_id, [])[:5]
+# ----------------------------
+# Structured LLM output (Ollama `format` schema + validation of message.content)
+# ----------------------------
+# "schema" sends the JSON schemas below as `format`; "json" falls back to plain JSON mode (Ollama < 0.5)
+STRUCTURED_MODE = os.getenv("OLIVIA_OLLAMA_STRUCTURED", "schema").strip().lower()
+
+PLANNER_OPTIONS: Dict[str, Any] = {"num_predict": int(os.getenv("OLIVIA_PLANNER_NUM_PREDICT", "192"))}
+NARRATOR_OPTIONS: Dict[str, Any] = {"num_predict": int(os.getenv("OLIVIA_NARRATOR_NUM_PREDICT", "320"))}
+
+# Per-stage latency budgets; past these the turn is finished without the LLM
+PLANNER_TIMEOUT_S = float(os.getenv("OLIVIA_PLANNER_TIMEOUT_S", "20"))
+NARRATOR_TIMEOUT_S = float(os.getenv("OLIVIA_NARRATOR_TIMEOUT_S", "30"))
+
+metrics.describe("olivia_chat_degraded_total", "counter", "Chat LLM stages skipped because Ollama was down, slow or the breaker was open.")
+
+# sessions per planned search: PLANNER_SCHEMA, the "limit": 1-5 in _PLANNER_RULES and PlanParams agree
+PLAN_MAX_LIMIT = 5
+
+_NULLABLE_STR = {"type": ["string", "null"]}
+_NULLABLE_STR_LIST = {"type": ["array", "null"], "items": {"type": "string"}}
+
+PLANNER_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "action": {"type": "string", "enum": ["find_sessions", "enroll", "clarify"]},
+        "params": {
+            "type": "object",
+            "properties": {
+                "date_start": _NULLABLE_STR,
+                "date_end": _NULLABLE_STR,
+                "branch_ids": _NULLABLE_STR_LIST,
+                "buckets": _NULLABLE_STR_LIST,
+                "tags": _NULLABLE_STR_LIST,
+                "has_spots": {"type": "boolean"},
+                "limit": {"type": "integer", "minimum": 1, "maximum": PLAN_MAX_LIMIT},
+            },
+        },
+        "enroll": {
+            "type": "object",
+            "properties": {
+                "session_id": _NULLABLE_STR,
+                "option": {"type": ["integer", "null"]},
+                "member_id": _NULLABLE_STR,
+            },
+        },
+        "follow_up_question": _NULLABLE_STR,
+    },
+    "required": ["action"],
+}
 
-    system = f"""
-You are Olivia, a YMCA schedule assistant. Return ONLY JSON.
+NARRATOR_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {"assistant_message": {"type": "string"}},
+    "required": ["assistant_message"],
+}
 
-Today's datetime: {_now_iso()}
-Default "this week": {start_week}..{end_week}
+_ISO_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+
+class PlanParams(BaseModel):
+    date_start: Optional[str] = None
+    date_end: Optional[str] = None
+    branch_ids: Optional[List[str]] = None
+    buckets: Optional[List[str]] = None
+    tags: Optional[List[str]] = None
+    has_spots: bool = True
+    limit: int = 5
+
+    @field_validator("date_start", "date_end", mode="before")
+    @classmethod
+    def _iso_date_or_none(cls, v):
+        return v if isinstance(v, str) and _ISO_DATE_RE.match(v.strip()) else None
+
+    @field_validator("branch_ids", "buckets", "tags", mode="before")
+    @classmethod
+    def _str_list_or_none(cls, v):
+        if isinstance(v, str):
+            v = [v]
+        if not isinstance(v, list):
+            return None
+        return [str(x) for x in v if x] or None
+
+    @field_validator("limit", mode="before")
+    @classmethod
+    def _clamp_limit(cls, v):
+        try:
+            return max(1, min(int(v), PLAN_MAX_LIMIT))
+        except (TypeError, ValueError):
+            return 5
+
+
+class PlanEnroll(BaseModel):
+    session_id: Optional[str] = None
+    option: Optional[int] = None
+    member_id: Optional[str] = None
+
+
+class PlannerPlan(BaseModel):
+    action: Optional[str] = None
+    params: PlanParams = Field(default_factory=PlanParams)
+    enroll: PlanEnroll = Field(default_factory=PlanEnroll)
+    follow_up_question: Optional[str] = None
+
+    @field_validator("action", mode="before")
+    @classmethod
+    def _known_action(cls, v):
+        a = str(v or "").strip().lower()
+        return a if a in ("find_sessions", "enroll", "clarify") else None
 
-Branches (use exact ids):
-{json.dumps(branches, indent=2)}
+    @field_validator("params", "enroll", mode="before")
+    @classmethod
+    def _object_or_default(cls, v):
+        return v if isinstance(v, dict) else {}
 
-UI context:
-{json.dumps(ui, indent=2)}
 
-Recent suggested options:
-{json.dumps(last, indent=2)}
+class NarratorReply(BaseModel):
+    assistant_message: str
+
+
+def _llm_format(schema: Dict[str, Any]):
+    return schema if STRUCTURED_MODE == "schema" else "json"
+
+
+def _plan_from_llm(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Validated planner plan as a dict ({} if the model's output is unusable)."""
+    try:
+        return PlannerPlan.model_validate(data).model_dump()
+    except ValidationError:
+        return {}
+
+
+def _narration_from_llm(data: Dict[str, Any]) -> Optional[str]:
+    try:
+        return NarratorReply.model_validate(data).assistant_message.strip() or None
+    except ValidationError:
+        return None
+
+
+def _llm_priority(req: "ChatRequest") -> int:
+    # staff at the desk are queued ahead of member chats
+    return PRIORITY_FRONT_DESK if req.ui_context.user_group == "front_desk" else PRIORITY_MEMBER
+
+
+def _busy(exc: GateFull) -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Olivia is helping a lot of people right now. Please try again in a moment.",
+        headers={"Retry-After": str(exc.retry_after_s)},
+    )
+
+
+async def _run_planner(branches: List[Dict[str, Any]], req: "ChatRequest", state: SessionState) -> Optional[Dict[str, Any]]:
+    """Validated plan, or None when Ollama is down/slow (circuit open, error, bad body, stage budget spent queued or generating)."""
+    try:
+        with timing.stage("planner"):
+            data = await ollama_chat_json(
+                _planner_prompt(branches, req, state),
+                options=PLANNER_OPTIONS,
+                format=_llm_format(PLANNER_SCHEMA),
+                stage="planner",
+                priority=_llm_priority(req),
+                timeout_s=PLANNER_TIMEOUT_S,
+            )
+    except (CircuitOpen, httpx.HTTPError, ValueError):  # ValueError: a body that isn't JSON
+        metrics.inc("olivia_chat_degraded_total", stage="planner")
+        return None
+    return _plan_from_llm(data)
+
+
+async def _run_narrator(req: "ChatRequest", tool_payload: Dict[str, Any]) -> Optional[str]:
+    """Narrated message, or None (templated rendering) when the narrator is unavailable."""
+    try:
+        with timing.stage("narrator"):
+            data = await ollama_chat_json(
+                _narrator_prompt(req, tool_payload),
+                options=NARRATOR_OPTIONS,
+                format=_llm_format(NARRATOR_SCHEMA),
+                stage="narrator",
+                priority=_llm_priority(req),
+                timeout_s=NARRATOR_TIMEOUT_S,
+            )
+    except (GateFull, CircuitOpen, httpx.HTTPError, ValueError):
+        metrics.inc("olivia_chat_degraded_total", stage="narrator")
+        return None
+    return _narration_from_llm(data)
+
+
+_PLANNER_RULES = """
+You are Olivia, a YMCA schedule assistant. Return ONLY JSON.
 
 Pick ONE action:
 - "find_sessions"
@@ -675,9 +393,9 @@ Pick ONE action:
 - "clarify"
 
 Schema:
-{{
+{
   "action": "find_sessions" | "enroll" | "clarify",
-  "params": {{
+  "params": {
     "date_start": "YYYY-MM-DD or null",
     "date_end": "YYYY-MM-DD or null",
     "branch_ids": ["branch_id"] or null,
@@ -685,93 +403,68 @@ Schema:
     "tags": ["hiit","yoga","swim", ...] or null,
     "has_spots": true/false,
     "limit": 1-5
-  }},
-  "enroll": {{
+  },
+  "enroll": {
     "session_id": "string or null",
     "option": 1-5 or null,
     "member_id": "string"
-  }},
+  },
   "follow_up_question": "string or null"
-}}
+}
 
 Rules:
 - If user says “my Y” and UI has no selected_branch_ids and you can't infer a branch confidently, use action="clarify".
 - For enroll, use option if user says “option 2”.
+- Dates are relative to "Today" in the context message that follows.
 """
-    return [{"role": "system", "content": system.strip()}, {"role": "user", "content": req.message.strip()}]
 
-def _infer_date_range_from_message(message: str):
-    """
-    Return (date_start, date_end) as YYYY-MM-DD strings.
-    date_end is treated as an exclusive bound (start + 1 day for single-day queries).
-    """
-    if not message:
-        return None
+_PLANNER_PREFIX_CACHE: Dict[tuple, str] = {}
 
-    msg = message.lower()
 
-    # quick phrases
-    if "today" in msg:
-        d = date.today()
-        return (d.isoformat(), (d + timedelta(days=1)).isoformat())
-    if "tomorrow" in msg:
-        d = date.today() + timedelta(days=1)
-        return (d.isoformat(), (d + timedelta(days=1)).isoformat())
-
-    # this week / next week (Mon-Sun windows)
-    if "next week" in msg:
-        d = date.today()
-        # next week's Monday
-        days_to_mon = (0 - d.weekday()) % 7
-        next_mon = d + timedelta(days=days_to_mon or 7)
-        start = next_mon
-        end = start + timedelta(days=7)
-        return (start.isoformat(), end.isoformat())
-
-    if "this week" in msg:
-        d = date.today()
-        start = d - timedelta(days=d.weekday())  # Monday
-        end = start + timedelta(days=7)
-        return (start.isoformat(), end.isoformat())
-
-    # weekday parsing (handles "next thursday", "thursday", etc.)
-    wd_map = {
-        "monday": 0, "mon": 0,
-        "tuesday": 1, "tue": 1, "tues": 1,
-        "wednesday": 2, "wed": 2,
-        "thursday": 3, "thu": 3, "thur": 3, "thurs": 3,
-        "friday": 4, "fri": 4,
-        "saturday": 5, "sat": 5,
-        "sunday": 6, "sun": 6,
-    }
+def _planner_prefix(branches: List[Dict[str, Any]]) -> str:
+    """
+    Static part of the planner prompt (rules, schema, compact branch table).
+    Byte-identical across calls so Ollama can reuse the KV cache for it.
+    """
+    key = tuple((b.get("id"), b.get("name"), tuple(b.get("aliases") or [])) for b in branches)
+    prefix = _PLANNER_PREFIX_CACHE.get(key)
+    if prefix is None:
+        rows = []
+        for bid, name, aliases in key:
+            alias_txt = f" (aka {', '.join(aliases)})" if aliases else ""
+            rows.append(f"{bid}: {name}{alias_txt}")
+        prefix = _PLANNER_RULES.strip() + "\n\nBranches (use exact ids):\n" + "\n".join(rows)
+        _PLANNER_PREFIX_CACHE.clear()  # only the current branch list is ever needed
+        _PLANNER_PREFIX_CACHE[key] = prefix
+    return prefix
 
-    # find any weekday token
-    tokens = sorted(wd_map.keys(), key=len, reverse=True)
-    found = None
-    for t in tokens:
-        if re.search(r"\b" + re.escape(t) + r"\b", msg):
-            found = t
-            break
-    if not found:
-        return None
 
-    target = wd_map[found]
-    d = date.today()
-    days_ahead = (target - d.weekday()) % 7
-    if days_ahead == 0:
-        days_ahead = 7  # "Thursday" on a Thursday => next week's Thursday by default
-    target_date = d + timedelta(days=days_ahead)
+def _compact_json(obj: Any) -> str:
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
 
-    # If phrase explicitly says "this <weekday>", allow same-week upcoming (including 0 days ahead)
-    if re.search(r"\bthis\s+" + re.escape(found) + r"\b", msg):
-        days_ahead2 = (target - d.weekday()) % 7
-        target_date = d + timedelta(days=days_ahead2)
 
-    start = target_date
-    end = start + timedelta(days=1)
-    return (start.isoformat(), end.isoformat())
+def _planner_context(req: ChatRequest, state: SessionState) -> str:
+    """Small per-turn suffix: today's date, week window, non-empty UI context, recent options."""
+    start_week, end_week = _week_range_from_now()
+    today = datetime.now(TZ)
+    ui = {k: v for k, v in req.ui_context.model_dump().items() if v not in (None, [], "")}
+    last = [{"option": x["option"], "label": x["label"]} for x in state.options(5)]
+    lines = [
+        f"Today: {today.date().isoformat()} ({today.strftime('%A')})",
+        f'Default "this week": {start_week}..{end_week}',
+        f"UI context: {_compact_json(ui)}",
+    ]
+    if last:
+        lines.append(f"Recent suggested options: {_compact_json(last)}")
+    return "\n".join(lines)
 
 
+def _planner_prompt(branches: List[Dict[str, Any]], req: ChatRequest, state: SessionState) -> List[Dict[str, str]]:
+    return [
+        {"role": "system", "content": _planner_prefix(branches)},
+        {"role": "system", "content": _planner_context(req, state)},
+        {"role": "user", "content": req.message.strip()},
+    ]
 
 def _build_suggestion_preface(req: ChatRequest, search_meta: Dict[str, Any], suggested: List[Dict[str, Any]]) -> str:
     primary_name = (search_meta or {}).get('primary_branch_name') or 'your Y'
@@ -803,16 +496,25 @@ def _build_options_header(search_meta: Dict[str, Any], suggested: List[Dict[str,
         if near_branch and near_min:
             return f"I didn’t see anything on that day at {primary_name}, but {near_branch} is about ~{near_min} minutes away and has a few options:"
         return f"I didn’t see anything on that day at {primary_name}, but a nearby Y has a few options:"
+    if primary_ct == 0 and int(tiers.get("nearby_other_day", 0) or 0) > 0:
+        return f"I didn’t see anything around that day at {primary_name} or the closest Ys, but here are a few nearby options on other days:"
     if primary_ct > 0 and (other_ct > 0 or near_ct > 0):
         if near_branch and near_min:
             return f"I found options at {primary_name}. If you’re open to nearby Ys too, {near_branch} is ~{near_min} minutes away and also has options:"
         return f"I found options at {primary_name}. If you’d like, I can also check nearby Ys or other days."
     return f"Here are the top options I found:" 
 
-def _narrator_prompt(req: ChatRequest, tool_result: Dict[str, Any]) -> List[Dict[str, str]]:
-    system = """
+_NARRATOR_JSON_FORMAT = """
 Return ONLY JSON:
 {"assistant_message":"..."}
+"""
+
+_NARRATOR_TEXT_FORMAT = """
+Reply in plain text (no JSON). The options header has already been shown to the user; do not repeat it.
+"""
+
+def _narrator_prompt(req: ChatRequest, tool_result: Dict[str, Any], stream: bool = False) -> List[Dict[str, str]]:
+    system = (_NARRATOR_TEXT_FORMAT if stream else _NARRATOR_JSON_FORMAT).strip() + """
 Keep it short. If listing sessions, label as options 1..N and include open spots.
 IMPORTANT: Do NOT change any numbers (capacity/enrolled/remaining). Copy them exactly from the provided suggested_sessions/tool payload. Do not recalculate.
 If tool payload includes search_meta, be friendly and human:
@@ -825,57 +527,6 @@ If tool payload includes search_meta, be friendly and human:
             {"role": "user", "content": f"User: {req.message}\n\nTool result:\n{json.dumps(tool_result)}"}]
 
 
-def _match_branch_id(branches: list, text: str):
-    """Best-effort branch matcher from free text (name/aliases/substring)."""
-    if not text:
-        return None
-    t = text.strip().lower()
-    if not t:
-        return None
-    # exact/alias match
-    for b in branches or []:
-        bid = (b.get("id") if isinstance(b, dict) else None)
-        name = (b.get("name") if isinstance(b, dict) else None) or (b.get("branch_name") if isinstance(b, dict) else None) or ""
-        aliases = (b.get("aliases") if isinstance(b, dict) else None) or []
-        name_l = str(name).lower()
-        if t == name_l:
-            return bid
-        for a in aliases:
-            if t == str(a).lower():
-                return bid
-    # substring/token match (e.g., "campbell county")
-    for b in branches or []:
-        bid = (b.get("id") if isinstance(b, dict) else None)
-        name = (b.get("name") if isinstance(b, dict) else None) or (b.get("branch_name") if isinstance(b, dict) else None) or ""
-        aliases = (b.get("aliases") if isinstance(b, dict) else None) or []
-        hay = " ".join([str(name)] + [str(a) for a in aliases]).lower()
-        if t in hay:
-            return bid
-    return None
-
-
-def _bucket_label(bucket: str) -> str:
-    m = {
-        "kids_club": "Kids Club",
-        "mind_body": "Mind & Body",
-        "strength": "Strength",
-        "run": "Run",
-        "sports": "Sports",
-        "gym": "Gym",
-        "swim": "Swim",
-    }
-    b = (bucket or "").strip().lower()
-    return m.get(b, (bucket or "").replace("_", " ").title() or "Classes")
-
-def _pretty_day(iso_date: str) -> str:
-    # iso_date: YYYY-MM-DD
-    try:
-        from datetime import date as _date
-        d = _date.fromisoformat(iso_date)
-        return d.strftime("%a %b %d")
-    except Exception:
-        return iso_date
-
 def _pretty_time(iso_dt: str) -> str:
     # iso_dt: 2026-01-22T06:10:00-05:00
     try:
@@ -885,190 +536,144 @@ def _pretty_time(iso_dt: str) -> str:
     except Exception:
         return iso_dt
 
-def _branch_name_map(branches):
-    return {b.get("id"): b.get("name") for b in (branches or [])}
+# ----------------------------
+# Rules-first intent router (skips the planner LLM when the message is already parsed)
+# ----------------------------
+RULES_MIN_CONFIDENCE = float(os.getenv("OLIVIA_RULES_MIN_CONFIDENCE", "0.8"))
+
+_ENROLL_WORDS = ("sign me up", "enroll", "register", "book", "reserve")
+_QUERY_WORDS = ("availability", "available", "schedule", "classes", "calendar", "open spots", "spots")
+# Intents the rules can't serve (leave these to the planner)
+_NON_SEARCH_WORDS = ("hours", "cancel", "price", "cost", "waitlist", "refund")
 
-def _suggest_sessions_tiered(
-    *,
-    branches,
-    date_start: str,
-    date_end: str,
-    home_branch_id: str | None,
-    buckets,
-    tags,
-    has_spots: bool,
-    limit: int,
-):
+metrics.describe("olivia_chat_planner_total", "counter", "Chat turns by plan source (rules, pending, llm, degraded).")
+metrics.describe("olivia_chat_planner_bypass_ratio", "gauge", "Share of planned chat turns that skipped the planner LLM.")
+
+
+def _rules_plan(branches: List[Dict[str, Any]], req: ChatRequest, state: SessionState) -> tuple[Optional[Dict[str, Any]], float]:
     """
-    Returns (suggested_sessions, suggestion_context)
-    suggestion_tier: primary | other_day | nearby_branch | nearby_other_day
+    Build a plan from the deterministic helpers. Returns (plan, confidence);
+    plan is None when the rules have nothing to offer.
     """
-    from datetime import date, timedelta
-
-    bmap = _branch_name_map(branches)
-    home_name = bmap.get(home_branch_id, home_branch_id) if home_branch_id else None
+    msg_l = (req.message or "").lower()
 
-    ctx = {
-        "home_branch_id": home_branch_id,
-        "home_branch_name": home_name,
-        "target_date_start": date_start,
-        "target_date_end": date_end,
-        "tier_used": "none",
+    # "Sign me up for option 2" -> enroll from the last suggested options
+    opt_m = re.search(r"\boption\s*(\d+)\b", msg_l)
+    if opt_m:
+        opt = int(opt_m.group(1))
+        if state.option(opt):
+            return {"action": "enroll", "enroll": {"option": opt, "member_id": "demo_member"}}, 1.0
+        return {"action": "clarify", "follow_up_question": "I don't have recent options yet. Ask for availability first."}, 1.0
+
+    if any(w in msg_l for w in _ENROLL_WORDS) or any(w in msg_l for w in _NON_SEARCH_WORDS):
+        return None, 0.0
+
+    confidence = 0.0
+    buckets = _extract_buckets_from_message(req.message)
+    if buckets:
+        confidence += 0.4
+    elif req.ui_context.selected_buckets:
+        buckets = req.ui_context.selected_buckets
+        confidence += 0.3
+
+    branch_ids = req.ui_context.selected_branch_ids or gazetteer.get().branch_ids(req.message) or None
+    if branch_ids:
+        confidence += 0.3
+
+    when = temporal.parse(req.message)
+    if when:
+        confidence += 0.2
+    elif any(w in msg_l for w in _QUERY_WORDS):
+        confidence += 0.1
+
+    if not buckets and not branch_ids:
+        return None, 0.0
+
+    date_start, date_end = when.bounds() if when and when.start else (None, None)
+    plan = {
+        "action": "find_sessions",
+        "params": {
+            "date_start": date_start,
+            "date_end": date_end,
+            "branch_ids": branch_ids,
+            "buckets": buckets,
+            "tags": None,
+            "has_spots": bool(req.ui_context.only_has_spots),
+            "limit": 5,
+            "band": when.band if when else None,
+        },
     }
+    return plan, round(min(confidence, 1.0), 2)
 
-    # 1) primary: same day at home branch
-    if home_branch_id:
-        primary = _search_sessions(date_start, date_end, [home_branch_id], buckets, tags, has_spots, limit)
-    else:
-        primary = _search_sessions(date_start, date_end, None, buckets, tags, has_spots, limit)
 
-    if primary:
-        for s in primary:
-            s["suggestion_tier"] = "primary"
-            s.pop("drive_minutes", None)
-        ctx["tier_used"] = "primary"
-        return primary, ctx
+def _pending_plan(branches: List[Dict[str, Any]], req: ChatRequest, state: SessionState) -> Optional[Dict[str, Any]]:
+    """Complete a stashed clarify intent once the user names a branch (consumes the pending context)."""
+    pending = state.pending
+    if not pending:
+        return None
+    ui_branch_ids = req.ui_context.selected_branch_ids or []
+    branch_ids = ui_branch_ids if ui_branch_ids else None
+    if not branch_ids:
+        bid = gazetteer.get().resolve_reply(req.message)
+        branch_ids = [bid] if bid else None
+    if not branch_ids:
+        return None
+    merged = dict(pending)
+    merged["branch_ids"] = branch_ids
+    # also keep UI-selected buckets as hard constraint if present
+    if req.ui_context.selected_buckets:
+        merged["buckets"] = req.ui_context.selected_buckets
+    merged["has_spots"] = bool(getattr(req.ui_context, "only_has_spots", merged.get("has_spots", True)))
+    state.pending = None
+    return {"action": "find_sessions", "params": merged}
 
-    single_day = (date_start == date_end)
-    if not home_branch_id:
-        return [], ctx
 
-    # helper: parse target date
-    try:
-        target = date.fromisoformat(date_start)
-    except Exception:
-        target = None
-
-    # 2) other_day at home branch (only makes sense for single-day asks)
-    if single_day and target:
-        w_start = (target - timedelta(days=3)).isoformat()
-        w_end = (target + timedelta(days=7)).isoformat()
-        other = _search_sessions(w_start, w_end, [home_branch_id], buckets, tags, has_spots, max(limit, 8))
-        other = [x for x in other if (x.get("start_time","")[:10] != date_start)]
-        if other:
-            for s in other:
-                s["suggestion_tier"] = "other_day"
-                s.pop("drive_minutes", None)
-            ctx.update({"tier_used": "other_day", "widened_start": w_start, "widened_end": w_end})
-            return other[:limit], ctx
-
-    # 3) nearby branches same day
-    prox = _load_branch_proximity()
-    neighbors = prox.get(home_branch_id, []) or []
-    gathered = []
-    for nb in neighbors:
-        nb_id = nb.get("branch_id") or nb.get("id")
-        mins = nb.get("drive_minutes") or nb.get("minutes")
-        if not nb_id:
-            continue
-        res = _search_sessions(date_start, date_end, [nb_id], buckets, tags, has_spots, max(limit, 8))
-        for s in res:
-            s["suggestion_tier"] = "nearby_branch"
-            if mins is not None:
-                try:
-                    s["drive_minutes"] = int(mins)
-                except Exception:
-                    s["drive_minutes"] = mins
-            gathered.append(s)
-
-    if gathered:
-        gathered.sort(key=lambda x: (x.get("drive_minutes", 9999), x.get("start_time","")))
-        ctx["tier_used"] = "nearby_branch"
-        return gathered[:limit], ctx
-
-    # 4) nearby branches other days
-    if single_day and target and neighbors:
-        w_start = (target - timedelta(days=3)).isoformat()
-        w_end = (target + timedelta(days=7)).isoformat()
-        gathered2 = []
-        for nb in neighbors:
-            nb_id = nb.get("branch_id") or nb.get("id")
-            mins = nb.get("drive_minutes") or nb.get("minutes")
-            if not nb_id:
-                continue
-            res = _search_sessions(w_start, w_end, [nb_id], buckets, tags, has_spots, max(limit, 12))
-            res = [x for x in res if (x.get("start_time","")[:10] != date_start)]
-            for s in res:
-                s["suggestion_tier"] = "nearby_other_day"
-                if mins is not None:
-                    try:
-                        s["drive_minutes"] = int(mins)
-                    except Exception:
-                        s["drive_minutes"] = mins
-                gathered2.append(s)
-        if gathered2:
-            gathered2.sort(key=lambda x: (x.get("drive_minutes", 9999), x.get("start_time","")))
-            ctx.update({"tier_used": "nearby_other_day", "widened_start": w_start, "widened_end": w_end})
-            return gathered2[:limit], ctx
-
-    return [], ctx
-
-def _build_suggestions_message(req, suggested, suggestion_context, branches):
-    # Friendly, human-ish, not pushy. Deterministic.
-    bmap = _branch_name_map(branches)
-    home_id = (suggestion_context or {}).get("home_branch_id") or (getattr(req, "ui_context", None) and req.ui_context.selected_branch_ids[:1] or [None])[0]
-    home_name = (suggestion_context or {}).get("home_branch_name") or bmap.get(home_id, home_id) or "your Y"
-
-    target = (suggestion_context or {}).get("target_date_start") or ""
-    tier = (suggestion_context or {}).get("tier_used") or "none"
-
-    # bucket label
-    bucket = None
-    try:
-        bucket = (req.ui_context.selected_buckets or [None])[0]
-    except Exception:
-        bucket = None
-    bucket_name = _bucket_label(bucket or "")
+def _record_planner(source: str) -> None:
+    metrics.inc("olivia_chat_planner_total", source=source)
+    total = sum(metrics.value("olivia_chat_planner_total", source=s) for s in ("rules", "pending", "llm", "degraded"))
+    if total:
+        llm_ct = metrics.value("olivia_chat_planner_total", source="llm")
+        metrics.set_gauge("olivia_chat_planner_bypass_ratio", 1.0 - llm_ct / total)
 
-    if not suggested:
-        if target:
-            return f"I’m not seeing any {bucket_name} sessions for {home_name} on {_pretty_day(target)}. If you’d like, I can widen the date range or check nearby Ys."
-        return f"I’m not seeing any matching {bucket_name} sessions right now. Want me to widen the date range or check nearby Ys?"
-
-    # intro line based on tier
-    if tier == "primary":
-        intro = f"Here are the top options at {home_name}:"
-    elif tier == "other_day":
-        intro = f"I don’t see any {bucket_name} sessions at {home_name} on {_pretty_day(target)}, but here are a few coming up at your Y:"
-    elif tier == "nearby_branch":
-        intro = f"I don’t see any {bucket_name} sessions at {home_name} on {_pretty_day(target)}. The closest options that day are:"
-    elif tier == "nearby_other_day":
-        intro = f"I don’t see any {bucket_name} sessions at {home_name} on {_pretty_day(target)}. Here are a few nearby options on other days:"
-    else:
-        intro = "Here are the top options:"
-
-    # numbered list
-    lines = [intro]
-    for i,s in enumerate(suggested, 1):
-        when = _pretty_time(s.get("start_time",""))
-        bname = s.get("branch_name") or bmap.get(s.get("branch_id")) or ""
-        rem = s.get("remaining")
-        col = s.get("availability_color")
-        mins = s.get("drive_minutes")
-        drive = f" (~{mins} min drive)" if mins is not None else ""
-        place = f"{bname}{drive}".strip()
-        lines.append(f"{i}) {s.get('class_name')} @ {place} {when} — {rem} spots ({col})")
 
-    return "\n".join(lines)
+async def _remember(state: SessionState, role: Optional[str] = None, content: str = "") -> None:
+    """Append a message (if given) and write the conversation back to the store (in the threadpool: the sqlite store commits)."""
+    with timing.stage("history"):
+        if role:
+            state.add(role, content)
+        await run_in_threadpool(STORE.save, state)
 
-@router.post("/chat", response_model=ChatResponse)
-def chat(req: ChatRequest):
-    branches = _load_branches()
 
-    # resolve branch from user text OR apply defaults when none selected
-    if not (req.ui_context.selected_branch_ids or []):
-        bid = _match_branch_id_from_text(branches, req.message)
-        if bid:
-            req.ui_context.selected_branch_ids = [bid]
-        else:
-            defaults = _default_branch_ids(req)
-            if defaults:
-                req.ui_context.selected_branch_ids = defaults
+def _load_turn(req: ChatRequest, need_defaults: bool):
+    """The blocking reads a turn starts with, in one threadpool hop: conversation state and (if asked) the default branches."""
+    return STORE.get(req.session_id), (_default_branch_ids(req) if need_defaults else None)
+
+
+async def _prepare_turn(req: ChatRequest):
+    """
+    Run everything in a chat turn up to (not including) the narrator.
+    Returns a final ChatResponse for turns that never need the narrator,
+    otherwise a turn dict that `_finish_turn` completes.
+    """
+    need_defaults = False
+    with timing.stage("branch"):
+        branches = _load_branches()
+
+        # resolve branch from user text OR apply defaults when none selected
+        if not (req.ui_context.selected_branch_ids or []):
+            mentioned = gazetteer.get().branch_ids(req.message)
+            if mentioned:
+                req.ui_context.selected_branch_ids = mentioned
+            else:
+                need_defaults = True
 
     suggestion_note = ""
 
-    hist = CHAT_HISTORY.get(req.session_id, [])
-    is_new_session = len(hist) == 0
+    state, defaults = await run_in_threadpool(_load_turn, req, need_defaults)
+    if defaults:
+        req.ui_context.selected_branch_ids = defaults
+    hist = state.history
+    is_new_session = state.is_new
 
 
     # branch reply follow-up: if we just asked "Which branch is your Y?", treat this message as the branch,
@@ -1076,19 +681,20 @@ def chat(req: ChatRequest):
     if not (req.ui_context.selected_branch_ids or []):
         ask_idx = None
         for _i in range(len(hist) - 2, -1, -1):  # ignore current user msg at end
-            m = hist[_i]
-            if m.get("role") == "assistant" and "Which branch is" in (m.get("content", "")):
+            role, content = hist[_i]
+            if role == "assistant" and "Which branch is" in content:
                 ask_idx = _i
                 break
 
         if ask_idx is not None:
             prior_q = None
             for _j in range(ask_idx - 1, -1, -1):
-                if hist[_j].get("role") == "user":
-                    prior_q = hist[_j].get("content", "")
+                if hist[_j][0] == "user":
+                    prior_q = hist[_j][1]
                     break
 
-            bid = _match_branch_id(branches, req.message)
+            with timing.stage("branch"):
+                bid = gazetteer.get().resolve_reply(req.message)
             if bid:
                 try:
                     ui2 = req.ui_context.model_copy(deep=True)
@@ -1106,8 +712,7 @@ def chat(req: ChatRequest):
                     req = ChatRequest(session_id=req.session_id, message=req.message, ui_context=ui2)
             else:
                 q = "Sorry — which YMCA branch should I use? (For example: “Campbell County YMCA”.)"
-                hist.append({"role": "assistant", "content": q})
-                CHAT_HISTORY[req.session_id] = hist[-MAX_HISTORY:]
+                await _remember(state, "assistant", q)
                 return ChatResponse(assistant_message=q, follow_up_question=q, suggested_sessions=[])
 
     def _maybe_greet(msg: str) -> str:
@@ -1115,18 +720,17 @@ def chat(req: ChatRequest):
             return f"{OLIVIA_GREETING}\n\n{msg}"
         return msg
 
-    hist.append({"role": "user", "content": req.message})
-    CHAT_HISTORY[req.session_id] = hist[-MAX_HISTORY:]
+    await _remember(state, "user", req.message)
 
 
     # Pending follow-up: user is answering the branch question (avoid LLM planner here)
-    pending = PENDING_CONTEXT.get(req.session_id)
+    pending = state.pending
     if pending and pending.get("type") == "awaiting_branch":
-        branch_id = _resolve_branch_id_from_text(branches, req.message)
+        with timing.stage("branch"):
+            branch_id = gazetteer.get().resolve_reply(req.message)
         if not branch_id:
             q = "Which branch should I use? (You can say e.g. “Blue Ash YMCA”.)"
-            hist.append({"role": "assistant", "content": q})
-            CHAT_HISTORY[req.session_id] = hist[-MAX_HISTORY:]
+            await _remember(state, "assistant", q)
             return ChatResponse(assistant_message=q, follow_up_question=q)
 
         # consume pending + run the original search against the chosen branch
@@ -1137,75 +741,56 @@ def chat(req: ChatRequest):
         tags = pending.get("tags")
         has_spots = bool(pending.get("has_spots", True))
         limit = int(pending.get("limit", 5))
+        band = pending.get("band")
 
-        PENDING_CONTEXT.pop(req.session_id, None)
+        state.pending = None
 
-        # Prefer intelligent policy if present, else basic search
-        try:
-            suggested = _intelligent_suggest_sessions(
-                date_start=date_start,
-                date_end=date_end,
-                primary_branch_id=branch_id,
-                buckets=buckets,
-                tags=tags,
-                has_spots=has_spots,
-                limit=limit,
+        with timing.stage("pending"):
+            suggested, search_meta = await run_in_threadpool(
+                _search_sessions_with_fallback, date_start, date_end, [branch_id], buckets, tags, has_spots, limit, branches, band
             )
-        except NameError:
-            suggested = _search_sessions(date_start, date_end, [branch_id], buckets, tags, has_spots, limit)
 
-        # Update LAST_SUGGESTIONS for enroll-by-option
-        LAST_SUGGESTIONS[req.session_id] = [
-            {"option": i + 1, "session_id": s["session_id"], "label": f'{s["class_name"]} @ {s["branch_name"]} {s["start_time"]}'}
-            for i, s in enumerate(suggested)
-        ]
+        # Remember the options for enroll-by-option
+        state.set_suggestions(suggested)
 
         # Deterministic friendly message (avoid narrator LLM here)
         bname = next((b.get("name") for b in branches if b.get("id") == branch_id), "your Y")
         if suggested:
-            lines_ = [f"Here are the top options at {bname}:"]
+            lines_ = [_build_options_header(search_meta, suggested)]
             for i, ss in enumerate(suggested, 1):
-                lines_.append(f"{i}) {ss.get('class_name')} {ss.get('start_time')} — {ss.get('remaining')} spots ({ss.get('availability_color')})")
+                where = "" if ss.get("branch_id") == branch_id else f" @ {ss.get('branch_name')}"
+                lines_.append(f"{i}) {ss.get('class_name')}{where} {ss.get('start_time')} — {ss.get('remaining')} spots ({ss.get('availability_color')})")
             assistant_message = "\n".join(lines_)
         else:
             assistant_message = f"I’m not seeing any matches at {bname} for that request. Want me to check nearby Ys or a different day?"
 
-        hist.append({"role": "assistant", "content": assistant_message})
-        CHAT_HISTORY[req.session_id] = hist[-MAX_HISTORY:]
+        await _remember(state, "assistant", assistant_message)
         return ChatResponse(assistant_message=assistant_message, suggested_sessions=suggested)
 
 
-    # Quick-path: handle follow-ups like "Sign me up for option 1" using LAST_SUGGESTIONS
-    msg_l = (req.message or "").lower()
-    opt_m = re.search(r"\boption\s*(\d+)\b", msg_l)
-    if opt_m:
-        opt = int(opt_m.group(1))
-        last = LAST_SUGGESTIONS.get(req.session_id, [])
-        if any(x.get("option") == opt for x in last):
-            plan = {"action": "enroll", "enroll": {"option": opt, "member_id": "demo_member"}}
-        else:
-            plan = {"action": "clarify", "follow_up_question": "I don't have recent options yet. Ask for availability first."}
-    else:
-        pending = PENDING_CONTEXT.get(req.session_id)
-        if pending:
-            ui_branch_ids = req.ui_context.selected_branch_ids or []
-            branch_ids = ui_branch_ids if ui_branch_ids else None
-            if not branch_ids:
-                bid = _match_branch_id(branches, req.message)
-                branch_ids = [bid] if bid else None
-            if branch_ids:
-                merged = dict(pending)
-                merged["branch_ids"] = branch_ids
-                # also keep UI-selected buckets as hard constraint if present
-                if req.ui_context.selected_buckets:
-                    merged["buckets"] = req.ui_context.selected_buckets
-                merged["has_spots"] = bool(getattr(req.ui_context, "only_has_spots", merged.get("has_spots", True)))
-                plan = {"action": "find_sessions", "params": merged}
-                PENDING_CONTEXT.pop(req.session_id, None)
+    # Rules first (option N / fully parsed requests), then pending follow-up, then the planner LLM
+    with timing.stage("rules"):
+        plan, confidence = _rules_plan(branches, req, state)
+    planner = "rules"
+    if plan is None or plan.get("action") == "find_sessions":
+        with timing.stage("pending"):
+            pending_plan = _pending_plan(branches, req, state)
+        if pending_plan is not None:
+            plan, planner = pending_plan, "pending"
+        elif plan is None or confidence < RULES_MIN_CONFIDENCE:
+            try:
+                llm_plan = await _run_planner(branches, req, state)
+            except GateFull as exc:
+                # nothing was answered; drop this turn so the client's retry starts clean
+                hist.pop()
+                await _remember(state)
+                raise _busy(exc)
+            if llm_plan is None:
+                # degraded: take the rules plan at any confidence, else the intent heuristics below
+                plan, planner = plan or {}, "degraded"
             else:
-                plan = ollama_chat_json(_planner_prompt(branches, req))
-        else:
-            plan = ollama_chat_json(_planner_prompt(branches, req))
+                plan, planner = llm_plan, "llm"
+    _record_planner(planner)
 
     # --- Harden planner output so demos never 400 on missing/invalid action ---
     if not isinstance(plan, dict):
@@ -1247,27 +832,24 @@ def chat(req: ChatRequest):
         plan["action"] = action
 
     if action == "clarify" or follow_up:
-        # stash pending intent for branch follow-up (preserve date/buckets)
-        try:
-            inferred = _infer_date_range_from_message(req.message)
-        except Exception:
-            inferred = None
-        if inferred:
-            ds, de = inferred
+        # stash pending intent for branch follow-up (preserve date/time/buckets)
+        when = temporal.parse(req.message)
+        if when and when.start:
+            ds, de = when.bounds()
         else:
             ds, de = _week_range_from_now()
-        PENDING_CONTEXT[req.session_id] = {
+        state.pending = {
             "date_start": ds,
             "date_end": de,
             "buckets": (req.ui_context.selected_buckets or None),
             "tags": None,
             "has_spots": bool(getattr(req.ui_context, "only_has_spots", True)),
             "limit": 6,
+            "band": when.band if when else None,
         }
         assistant = follow_up or "Which branch should I use?"
         assistant = _maybe_greet(assistant)
-        hist.append({"role": "assistant", "content": assistant})
-        CHAT_HISTORY[req.session_id] = hist[-MAX_HISTORY:]
+        await _remember(state, "assistant", assistant)
         return ChatResponse(assistant_message=assistant, follow_up_question=assistant)
 
     suggested: List[Dict[str, Any]] = []
@@ -1277,10 +859,11 @@ def chat(req: ChatRequest):
         p = plan.get("params") or {}
         date_start = p.get("date_start")
         date_end = p.get("date_end")
-        if not date_start and not date_end:
-            inferred = _infer_date_range_from_message(req.message)
-            if inferred:
-                date_start, date_end = inferred
+        when = temporal.parse(req.message)
+        if not date_start and not date_end and when and when.start:
+            date_start, date_end = when.bounds()
+        # planner dates are whole days; the time of day still comes from the message
+        band = p.get("band") or (when.band if when else None)
         if not date_start or not date_end:
             ws, we = _week_range_from_now()
             date_start = date_start or ws
@@ -1291,7 +874,9 @@ def chat(req: ChatRequest):
             branch_ids = req.ui_context.selected_branch_ids or None
             # apply defaults if still unset
             if not branch_ids:
-                branch_ids = _default_branch_ids(req) or None
+                if not need_defaults:
+                    defaults = await run_in_threadpool(_default_branch_ids, req)
+                branch_ids = defaults or None
         
         # For buckets: prioritize extracted message buckets, then LLM parsed, then UI selection
         msg_buckets = _extract_buckets_from_message(req.message)
@@ -1326,7 +911,7 @@ def chat(req: ChatRequest):
 
         if branch_ids is None and "my y" in req.message.lower():
             # remember the user's original request so the next message (branch name) can complete it deterministically
-            PENDING_CONTEXT[req.session_id] = {
+            state.pending = {
                 "type": "awaiting_branch",
                 "original_message": req.message,
                 "date_start": date_start,
@@ -1335,15 +920,19 @@ def chat(req: ChatRequest):
                 "tags": tags,
                 "has_spots": has_spots,
                 "limit": limit,
+                "band": band,
             }
 
             q = "Which branch is “your Y”? (Pick one in the branch filters, or say e.g. “Blue Ash YMCA”.)"
             q = _maybe_greet(q)
-            hist.append({"role": "assistant", "content": q})
-            CHAT_HISTORY[req.session_id] = hist[-MAX_HISTORY:]
+            await _remember(state, "assistant", q)
             return ChatResponse(assistant_message=q, follow_up_question=q)
 
-        suggested, search_meta = _search_sessions_with_fallback(date_start, date_end, branch_ids, buckets, tags, has_spots, limit, branches)
+        # SQLite work stays on the threadpool so the event loop keeps serving other requests
+        with timing.stage("search"):
+            suggested, search_meta = await run_in_threadpool(
+                _search_sessions_with_fallback, date_start, date_end, branch_ids, buckets, tags, has_spots, limit, branches, band
+            )
 
         # Post-filter for specific intents (e.g., "full" classes, "available" classes)
         msg_lower = req.message.lower()
@@ -1354,23 +943,21 @@ def chat(req: ChatRequest):
             # Only show classes with remaining spots
             suggested = [s for s in suggested if s.get("remaining", 0) > 0]
 
-        LAST_SUGGESTIONS[req.session_id] = [
-            {"option": i + 1, "session_id": s["session_id"], "label": f'{s["class_name"]} @ {s["branch_name"]} {s["start_time"]}'}
-            for i, s in enumerate(suggested)
-        ]
+        state.set_suggestions(suggested)
 
         if suggestion_note:
             tool_payload["suggestion_note"] = suggestion_note
 
         tool_payload.update({"date_start": date_start, "date_end": date_end, "suggested_sessions": suggested, "search_meta": search_meta})
+        if band:
+            tool_payload["time_band"] = list(band)
         tool_payload["suggestion_preface"] = _build_suggestion_preface(req, search_meta, suggested)
         tool_payload["options_header"] = _build_options_header(search_meta, suggested)
 
 
         if not suggested:
             assistant_message = _maybe_greet(tool_payload.get("suggestion_preface") or "I couldn’t find any matching sessions.")
-            hist.append({"role": "assistant", "content": assistant_message})
-            CHAT_HISTORY[req.session_id] = hist[-MAX_HISTORY:]
+            await _remember(state, "assistant", assistant_message)
             return ChatResponse(assistant_message=assistant_message, suggested_sessions=[])
 
     elif action == "enroll":
@@ -1380,29 +967,55 @@ def chat(req: ChatRequest):
         option = e.get("option")
 
         if not session_id and option:
-            last = LAST_SUGGESTIONS.get(req.session_id, [])
-            match = next((x for x in last if x.get("option") == option), None)
-            session_id = match.get("session_id") if match else None
+            session_id = state.option(int(option))
 
         if not session_id:
             q = "Which class should I enroll you in? Say “option 1” (or click Enroll)."
             q = _maybe_greet(q)
-            hist.append({"role": "assistant", "content": q})
-            CHAT_HISTORY[req.session_id] = hist[-MAX_HISTORY:]
+            await _remember(state, "assistant", q)
             return ChatResponse(assistant_message=q, follow_up_question=q)
 
-        tool_payload["enroll_result"] = _enroll_member(session_id=session_id, member_id=member_id)
+        with timing.stage("enroll"):
+            tool_payload["enroll_result"] = await run_in_threadpool(_enroll_member, session_id=session_id, member_id=member_id)
 
     else:
         q = "Do you want class availability, hours, or to enroll in a session?"
         q = _maybe_greet(q)
-        hist.append({"role": "assistant", "content": q})
-        CHAT_HISTORY[req.session_id] = hist[-MAX_HISTORY:]
+        await _remember(state, "assistant", q)
         return ChatResponse(assistant_message=q, follow_up_question=q)
 
-    narrated = ollama_chat_json(_narrator_prompt(req, tool_payload))
-    assistant_message = narrated.get("assistant_message") if isinstance(narrated, dict) else None
+    return {
+        "req": req,
+        "state": state,
+        "action": action,
+        "suggested": suggested,
+        "tool_payload": tool_payload,
+        "is_new_session": is_new_session,
+    }
+
+
+def _render_options(header: str, suggested: List[Dict[str, Any]]) -> str:
+    out = [header]
+    for j, ss in enumerate(suggested, 1):
+        out.append(
+            f"{j}) {ss.get('class_name')} @ {ss.get('branch_name')} {_pretty_time(ss.get('start_time') or '')} — {ss.get('remaining')} spots ({ss.get('availability_color')})"
+        )
+    return "\n".join(out)
+
+
+async def _finish_turn(turn: Dict[str, Any], assistant_message: Optional[str]) -> ChatResponse:
+    """Merge the narrator output with the deterministic header/fallbacks and record history."""
+    req = turn["req"]
+    state = turn["state"]
+    action = turn["action"]
+    suggested = turn["suggested"]
+    tool_payload = turn["tool_payload"]
+    is_new_session = turn["is_new_session"]
+
     hdr = tool_payload.get("options_header")
+    if not assistant_message and action == "find_sessions" and suggested:
+        # no narration (degraded mode / narrator unavailable): templated list under the header
+        assistant_message = _render_options(hdr or "Here are the top options:", suggested)
     if hdr and suggested and hdr not in (assistant_message or ""):
         if assistant_message and assistant_message.startswith(OLIVIA_GREETING):
             rest = assistant_message[len(OLIVIA_GREETING):].lstrip("\n ")
@@ -1414,12 +1027,7 @@ def chat(req: ChatRequest):
     if (not assistant_message) or (assistant_message.strip().lower() in ("done", "done.")):
         if action == "find_sessions":
             if suggested:
-                out = ["Here are the top options:"]
-                for j, ss in enumerate(suggested, 1):
-                    out.append(
-                        f"{j}) {ss.get('class_name')} @ {ss.get('branch_name')} {ss.get('start_time')} — {ss.get('remaining')} spots ({ss.get('availability_color')})"
-                    )
-                assistant_message = "\n".join(out)
+                assistant_message = _render_options("Here are the top options:", suggested)
             else:
                 assistant_message = "I couldn't find any matching sessions."
         elif action == "enroll":
@@ -1437,7 +1045,81 @@ def chat(req: ChatRequest):
         else:
             assistant_message = OLIVIA_GREETING
 
-    hist.append({"role": "assistant", "content": assistant_message})
-    CHAT_HISTORY[req.session_id] = hist[-MAX_HISTORY:]
+    await _remember(state, "assistant", assistant_message)
 
     return ChatResponse(assistant_message=assistant_message, suggested_sessions=suggested)
+
+
+@router.post("/chat", response_model=ChatResponse)
+async def chat(req: ChatRequest):
+    turn = await _prepare_turn(req)
+    if isinstance(turn, ChatResponse):
+        return turn
+
+    assistant_message = await _run_narrator(turn["req"], turn["tool_payload"])
+    return await _finish_turn(turn, assistant_message)
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post("/chat/stream")
+async def chat_stream(req: ChatRequest):
+    """
+    Server-Sent Events variant of /chat.
+    Events: `meta` (options header + suggested_sessions, sent before any LLM work),
+    `token` (narrator text as Ollama produces it), `done` (the final ChatResponse;
+    `narration_replaced: true` when the narrator failed partway and the streamed
+    tokens were replaced by the templated reply).
+    """
+    turn = await _prepare_turn(req)
+
+    async def events():
+        if isinstance(turn, ChatResponse):
+            yield _sse("meta", {
+                "greeting": None,
+                "options_header": None,
+                "follow_up_question": turn.follow_up_question,
+                "suggested_sessions": turn.suggested_sessions,
+            })
+            yield _sse("done", turn.model_dump())
+            return
+
+        yield _sse("meta", {
+            "greeting": OLIVIA_GREETING if turn["is_new_session"] else None,
+            "options_header": turn["tool_payload"].get("options_header") or None,
+            "follow_up_question": None,
+            "suggested_sessions": turn["suggested"],
+        })
+
+        parts: List[str] = []
+        finished = False
+        try:
+            with timing.stage("narrator_stream"):
+                async for piece in ollama_chat_stream(
+                    _narrator_prompt(turn["req"], turn["tool_payload"], stream=True),
+                    options=NARRATOR_OPTIONS,
+                    stage="narrator",
+                    priority=_llm_priority(turn["req"]),
+                    timeout_s=NARRATOR_TIMEOUT_S,
+                ):
+                    parts.append(piece)
+                    yield _sse("token", {"text": piece})
+            finished = True
+        except (httpx.HTTPError, ValueError, GateFull, CircuitOpen):
+            # deterministic rendering in _finish_turn covers a failed narrator;
+            # a cut-off narration is dropped, never committed as the reply
+            pass
+
+        narration = ("".join(parts).strip() or None) if finished else None
+        done = (await _finish_turn(turn, narration)).model_dump()
+        if parts and not finished:
+            done["narration_replaced"] = True  # the client swaps the streamed tokens for assistant_message
+        yield _sse("done", done)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
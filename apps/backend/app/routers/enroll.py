@@ -5,6 +5,8 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 
 from ..calendar_store import conn, availability_color
+from ..data_version import VERSIONS
+from ..schedule_index import SCHEDULE_INDEX
 
 TZ = ZoneInfo("America/New_York")
 router = APIRouter()
@@ -19,7 +21,7 @@ def enroll(req: EnrollRequest):
     cur = c.cursor()
 
     row = cur.execute("""
-    SELECT s.capacity, e.enrolled
+    SELECT s.capacity, s.branch_id, e.enrolled
     FROM sessions s
     JOIN enrollments e ON e.session_id = s.id
     WHERE s.id = ? AND s.status='scheduled'
@@ -65,6 +67,7 @@ def enroll(req: EnrollRequest):
         "UPDATE enrollments SET enrolled = enrolled + 1, updated_at = ? WHERE session_id = ?",
         (now, req.session_id)
     )
+    versions = VERSIONS.bump(c, [row["branch_id"]])
     c.commit()
 
     updated = cur.execute("""
@@ -77,6 +80,9 @@ def enroll(req: EnrollRequest):
 
     capacity2 = int(updated["capacity"])
     enrolled2 = int(updated["enrolled"])
+    # index first: a reader that sees the new ETag must also see the new count
+    SCHEDULE_INDEX.patch_enrolled(req.session_id, enrolled2)
+    VERSIONS.note(versions)
     remaining2 = capacity2 - enrolled2
     color2 = availability_color(enrolled2, capacity2)
 
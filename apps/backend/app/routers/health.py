@@ -1,7 +1,10 @@
 from fastapi import APIRouter
 
+from ..circuit_breaker import BREAKER
+
 router = APIRouter()
 
 @router.get("/health")
 def health():
-    return {"status": "ok"}
+    state, bad, window = BREAKER.snapshot()
+    return {"status": "ok", "llm": {"breaker": state, "recent_failures": bad, "recent_calls": window}}
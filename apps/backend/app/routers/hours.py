@@ -1,58 +1,75 @@
-import json
-from datetime import datetime
-from pathlib import Path
-from zoneinfo import ZoneInfo
-from fastapi import APIRouter, Query
+from datetime import date as Date, datetime, timedelta
+
+from fastapi import APIRouter, HTTPException, Query, Response
+
+from .. import hours_engine
+from ..config_registry import FACILITIES
 
 router = APIRouter()
 
-ROOT_DIR = Path(__file__).resolve().parents[2]   # /app (Docker) or ~/Olivia/apps/backend (local)
-CONFIG_DIR = Path(__file__).resolve().parents[2] / "configs" if (Path(__file__).resolve().parents[2] / "configs").exists() else Path(__file__).resolve().parents[4] / "configs"
-HOURS_PATH = CONFIG_DIR / "hours.json"
 
-TZ = ZoneInfo("America/New_York")
+def _date(value: str, name: str) -> Date:
+    try:
+        return Date.fromisoformat(value[:10])
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{name} must be YYYY-MM-DD")
+
+
+def _branches(branch_ids: str | None) -> list[str]:
+    if branch_ids:
+        return [x.strip() for x in branch_ids.split(",") if x.strip()]
+    return [b.id for b in FACILITIES.get().branches]
+
 
 @router.get("/hours")
 def get_hours(branch_id: str = Query(...), date: str = Query(..., description="YYYY-MM-DD")):
-    cfg = json.loads(HOURS_PATH.read_text())
-    day = datetime.fromisoformat(date).astimezone(TZ).strftime("%a").lower()
-    rules = cfg["default_hours"]
+    day = hours_engine.get().day(branch_id, _date(date, "date"))
+    return {"branch_id": branch_id, **hours_engine.day_json(day), "date": date}
 
-    hours = rules.get(day)
-    if day == "sun":
-        if branch_id == cfg["sunday_override"]["open_branch_id"]:
-            hours = cfg["sunday_override"]["hours"]
-        else:
-            hours = None
 
+@router.get("/hours/range")
+def get_hours_range(
+    start: str = Query(..., description="YYYY-MM-DD"),
+    end: str = Query(..., description="YYYY-MM-DD, inclusive"),
+    branch_ids: str | None = Query(None, description="comma-separated, optional (default: every branch)"),
+):
+    first, last = _date(start, "start"), _date(end, "end")
+    if last < first or (last - first).days >= hours_engine.MAX_RANGE_D:
+        raise HTTPException(status_code=400, detail=f"end must be on or after start, at most {hours_engine.MAX_RANGE_D} days")
+    engine = hours_engine.get()
+    facilities = FACILITIES.get()
     return {
-        "branch_id": branch_id,
-        "date": date,
-        "is_closed": hours is None,
-        "open_time": None if hours is None else hours[0],
-        "close_time": None if hours is None else hours[1]
+        "start": first.isoformat(),
+        "end": last.isoformat(),
+        "branches": [
+            {"branch_id": b, "branch_name": facilities.name(b), "days": [hours_engine.day_json(d) for d in engine.days(b, first, last)]}
+            for b in _branches(branch_ids)
+        ],
     }
 
+
+@router.get("/hours/status")
+def hours_status(response: Response, branch_ids: str | None = Query(None, description="comma-separated, optional (default: every branch)")):
+    """Open-now for many branches in one call; cacheable until the next branch opens or closes."""
+    engine = hours_engine.get()
+    now = datetime.now(engine.tz)
+    by_branch, valid_until = engine.status(now)
+    names = {b.id: b.name for b in FACILITIES.get().branches}
+    wanted = _branches(branch_ids) if branch_ids else list(by_branch)
+    response.headers["Cache-Control"] = f"max-age={max(0, int((valid_until - now) / timedelta(seconds=1)))}"
+    return {
+        "now": now.isoformat(),
+        "valid_until": valid_until.isoformat(),
+        "branches": [hours_engine.status_json(by_branch.get(b) or engine.open_now(b, now), names) for b in wanted],
+    }
+
+
 @router.get("/hours/open-now")
 def open_now(branch_id: str = Query(...)):
-    cfg = json.loads(HOURS_PATH.read_text())
-    now = datetime.now(TZ)
-    day = now.strftime("%a").lower()
-    rules = cfg["default_hours"]
-    hours = rules.get(day)
-
-    if day == "sun":
-        if branch_id == cfg["sunday_override"]["open_branch_id"]:
-            hours = cfg["sunday_override"]["hours"]
-        else:
-            hours = None
-
-    if hours is None:
-        return {"branch_id": branch_id, "open_now": False, "reason": "closed_today"}
-
-    open_h, open_m = map(int, hours[0].split(":"))
-    close_h, close_m = map(int, hours[1].split(":"))
-    o = now.replace(hour=open_h, minute=open_m, second=0, microsecond=0)
-    c = now.replace(hour=close_h, minute=close_m, second=0, microsecond=0)
-
-    return {"branch_id": branch_id, "open_now": o <= now < c, "now": now.isoformat()}
+    engine = hours_engine.get()
+    now = datetime.now(engine.tz)
+    status = engine.open_now(branch_id, now)
+    out = {**hours_engine.status_json(status), "now": now.isoformat()}
+    if not status.is_open and engine.day(branch_id, now.date()).hours is None:
+        out["reason"] = "closed_today"
+    return out
@@ -1,18 +1,60 @@
-import json
-from fastapi import APIRouter, HTTPException
-from ..calendar_store import conn, availability_color
+import threading
+from collections import OrderedDict
+
+from fastapi import APIRouter, Header, HTTPException, Response
+from .. import metrics, timing
+from ..calendar_store import conn, availability_color, class_tags
+from ..data_version import VERSIONS, not_modified
 
 router = APIRouter()
 
+# session id -> branch id (never changes): which counter a session's ETag follows
+_BRANCH_OF: "OrderedDict[str, str]" = OrderedDict()
+_BRANCH_OF_MAX = 65536
+_LOCK = threading.Lock()
+
+
+def _branch_of(session_id: str) -> str | None:
+    with _LOCK:
+        branch_id = _BRANCH_OF.get(session_id)
+        if branch_id is not None:
+            _BRANCH_OF.move_to_end(session_id)
+        return branch_id
+
+
+def _remember_branch(session_id: str, branch_id: str) -> None:
+    with _LOCK:
+        _BRANCH_OF[session_id] = branch_id
+        if len(_BRANCH_OF) > _BRANCH_OF_MAX:
+            _BRANCH_OF.popitem(last=False)
+
+
+def _etag(session_id: str, branch_id: str) -> str:
+    return VERSIONS.etag("session", session_id, [branch_id])
+
+
+def _not_modified(etag: str) -> Response:
+    metrics.inc("olivia_conditional_get_total", route="/sessions/{session_id}", result="not_modified")
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+
 @router.get("/sessions/{session_id}")
-def get_session(session_id: str):
+def get_session(session_id: str, response: Response, if_none_match: str | None = Header(None)):
+    # a session seen before: its branch's version answers If-None-Match without SQLite
+    branch_id = _branch_of(session_id) if if_none_match else None
+    if branch_id is not None:
+        etag = _etag(session_id, branch_id)
+        if not_modified(if_none_match, etag):
+            return _not_modified(etag)
+
     c = conn()
-    row = c.execute("""
+    with timing.stage("db"):
+        row = c.execute("""
     SELECT
       s.id AS session_id,
       s.start_ts, s.end_ts, s.location, s.instructor, s.capacity, s.status,
       b.id AS branch_id, b.name AS branch_name,
-      cl.id AS class_id, cl.name AS class_name, cl.bucket, cl.tags_json,
+      cl.id AS class_id, cl.name AS class_name, cl.bucket,
       e.enrolled AS enrolled
     FROM sessions s
     JOIN branches b ON b.id = s.branch_id
@@ -25,6 +67,13 @@ def get_session(session_id: str):
     if not row:
         raise HTTPException(status_code=404, detail="session not found")
 
+    _remember_branch(session_id, row["branch_id"])
+    etag = _etag(session_id, row["branch_id"])
+    if not_modified(if_none_match, etag):
+        return _not_modified(etag)
+    metrics.inc("olivia_conditional_get_total", route="/sessions/{session_id}", result="full")
+    response.headers.update({"ETag": etag, "Cache-Control": "no-cache"})
+
     cap = int(row["capacity"])
     enrolled = int(row["enrolled"])
     remaining = cap - enrolled
@@ -35,7 +84,7 @@ def get_session(session_id: str):
         "class_id": row["class_id"],
         "class_name": row["class_name"],
         "bucket": row["bucket"],
-        "tags": json.loads(row["tags_json"]),
+        "tags": class_tags(row["class_id"]),
         "branch_id": row["branch_id"],
         "branch_name": row["branch_name"],
         "start_time": row["start_ts"],
@@ -0,0 +1,293 @@
+"""
+Optional in-process columnar index over upcoming sessions.
+
+When NumPy is installed (and OLIVIA_SCHEDULE_INDEX is not 0), every
+scheduled session from today on is held as parallel arrays sorted by
+start time:
+
+    start     int64 epoch seconds
+    branch    int32 code into branch_ids
+    bucket    int32 code into bucket names (as stored)
+    klass     int32 code into class_ids (tag filters match on class)
+    minute    int16 local start time, minutes after midnight
+    capacity  int32
+    enrolled  int32
+
+A range is two binary searches on `start`; branch, bucket, tag, time-of-day
+and has-spots filters are vectorized masks over that slice, and only the rows
+that come back are turned into dicts (same keys as the SQL rows, so the
+callers' formatting code is shared).
+
+Freshness:
+  - /enroll in this process patches `enrolled` in place right after commit
+  - writes by any other connection (other workers, seeding) bump SQLite's
+    data_version; at most every OLIVIA_SCHEDULE_INDEX_REFRESH_S the index
+    notices, re-reads enrollment rows updated since its last sync
+    (idx_enrollments_updated), and rebuilds outright if the schedule itself
+    (sessions, classes, branches) changed, inserts, deletes and in-place
+    edits alike: triggers count those writes in data_versions['#schedule']
+
+query() returns None when the index is off or the window starts before the
+index horizon; callers then run their SQL as before.
+"""
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from zoneinfo import ZoneInfo
+
+from . import metrics, timing
+from .calendar_store import conn
+
+try:
+    import numpy as np
+except ImportError:  # optional: without NumPy every read goes to SQLite
+    np = None
+
+TZ = ZoneInfo("America/New_York")
+
+ENABLED = os.getenv("OLIVIA_SCHEDULE_INDEX", "1").strip().lower() not in ("0", "false", "no", "off")
+REFRESH_S = float(os.getenv("OLIVIA_SCHEDULE_INDEX_REFRESH_S", "1"))
+# enrollment rows are stamped just before commit; re-read a few seconds back to cover that gap
+_SYNC_SKEW = timedelta(seconds=5)
+
+metrics.describe("olivia_schedule_index_sessions", "gauge", "Sessions held in the in-process schedule index.")
+metrics.describe("olivia_schedule_index_rebuilds_total", "counter", "Schedule index rebuilds, by reason (initial, schedule).")
+metrics.describe("olivia_schedule_index_queries_total", "counter", "Schedule reads, by result (hit = served from the index, miss = fell back to SQL).")
+
+_ROWS = """
+    SELECT
+      s.id AS session_id,
+      s.start_ts, s.end_ts, s.location, s.instructor, s.capacity,
+      s.branch_id, b.name AS branch_name,
+      s.class_id, cl.name AS class_name, cl.bucket,
+      e.enrolled AS enrolled
+    FROM sessions s
+    JOIN branches b ON b.id = s.branch_id
+    JOIN classes cl ON cl.id = s.class_id
+    JOIN enrollments e ON e.session_id = s.id
+    WHERE s.status='scheduled'
+      AND s.start_ts >= ?
+    ORDER BY s.start_ts ASC, s.rowid ASC
+"""
+
+# bumped by triggers on every sessions/classes/branches write (calendar_store.init_db)
+_FINGERPRINT = "SELECT version FROM data_versions WHERE scope = '#schedule'"
+
+
+def _epoch(ts: str) -> float:
+    """ISO date or datetime -> epoch seconds; naive values are local (TZ) time."""
+    dt = datetime.fromisoformat(ts)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=TZ)
+    return dt.timestamp()
+
+
+def _clock(hhmm: str) -> int:
+    """'HH:MM' (as in start_ts[11:16], '24:00' allowed) -> minutes after midnight."""
+    return int(hhmm[:2]) * 60 + int(hhmm[3:5])
+
+
+def _codes(values: List[str]) -> Tuple[List[str], Dict[str, int]]:
+    names = sorted(set(values))
+    return names, {v: i for i, v in enumerate(names)}
+
+
+class _Columns:
+    """One immutable build of the index (except `enrolled`, patched in place)."""
+
+    def __init__(self, rows: List[Any], class_tags: Dict[str, frozenset], horizon: str) -> None:
+        self.horizon = _epoch(horizon)
+        self.session_ids = [r["session_id"] for r in rows]
+        self.start_ts = [r["start_ts"] for r in rows]
+        self.end_ts = [r["end_ts"] for r in rows]
+        self.location = [r["location"] for r in rows]
+        self.instructor = [r["instructor"] for r in rows]
+        self.pos = {sid: i for i, sid in enumerate(self.session_ids)}
+
+        self.branch_ids, branch_code = _codes([r["branch_id"] for r in rows])
+        self.class_ids, class_code = _codes([r["class_id"] for r in rows])
+        self.buckets, bucket_code = _codes([r["bucket"] for r in rows])
+        self.branch_names = {r["branch_id"]: r["branch_name"] for r in rows}
+        self.class_names = {r["class_id"]: r["class_name"] for r in rows}
+        self.class_buckets = {r["class_id"]: r["bucket"] for r in rows}
+        self.class_tags = [class_tags.get(cid, frozenset()) for cid in self.class_ids]
+
+        self.start = np.fromiter((_epoch(ts) for ts in self.start_ts), dtype=np.int64, count=len(rows))
+        self.branch = np.fromiter((branch_code[r["branch_id"]] for r in rows), dtype=np.int32, count=len(rows))
+        self.klass = np.fromiter((class_code[r["class_id"]] for r in rows), dtype=np.int32, count=len(rows))
+        self.bucket = np.fromiter((bucket_code[r["bucket"]] for r in rows), dtype=np.int32, count=len(rows))
+        self.minute = np.fromiter((_clock(ts[11:16]) for ts in self.start_ts), dtype=np.int16, count=len(rows))
+        self.capacity = np.fromiter((int(r["capacity"]) for r in rows), dtype=np.int32, count=len(rows))
+        self.enrolled = np.fromiter((int(r["enrolled"]) for r in rows), dtype=np.int32, count=len(rows))
+
+    def __len__(self) -> int:
+        return len(self.session_ids)
+
+    def row(self, i: int) -> Dict[str, Any]:
+        branch_id = self.branch_ids[self.branch[i]]
+        class_id = self.class_ids[self.klass[i]]
+        return {
+            "session_id": self.session_ids[i],
+            "start_ts": self.start_ts[i],
+            "end_ts": self.end_ts[i],
+            "location": self.location[i],
+            "instructor": self.instructor[i],
+            "capacity": int(self.capacity[i]),
+            "branch_id": branch_id,
+            "branch_name": self.branch_names[branch_id],
+            "class_id": class_id,
+            "class_name": self.class_names[class_id],
+            "bucket": self.class_buckets[class_id],
+            "enrolled": int(self.enrolled[i]),
+        }
+
+
+class ScheduleIndex:
+    def __init__(self, enabled: bool = ENABLED, refresh_s: float = REFRESH_S) -> None:
+        self.enabled = enabled and np is not None
+        self.refresh_s = refresh_s
+        self._lock = threading.Lock()
+        self._cols: Optional[_Columns] = None
+        self._db: Optional[sqlite3.Connection] = None
+        self._version: Optional[int] = None
+        self._fingerprint: Optional[Tuple[int, ...]] = None
+        self._synced_at: Optional[datetime] = None
+        self._checked = 0.0
+
+    def invalidate(self) -> None:
+        """Force a full rebuild on the next read (e.g. after reseeding or swapping DB_PATH)."""
+        with self._lock:
+            self._cols = None
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def expire(self) -> None:
+        """Re-check SQLite on the next read instead of waiting out the refresh interval."""
+        self._checked = 0.0
+
+    def _build_locked(self, reason: str) -> _Columns:
+        self._synced_at = datetime.now(TZ)
+        horizon = self._synced_at.date().isoformat()
+        rows = self._db.execute(_ROWS, (horizon,)).fetchall()
+        tags: Dict[str, set] = {}
+        for r in self._db.execute("SELECT class_id, tag FROM class_tags"):
+            tags.setdefault(r["class_id"], set()).add(r["tag"])
+        cols = _Columns(rows, {cid: frozenset(t) for cid, t in tags.items()}, horizon)
+        metrics.inc("olivia_schedule_index_rebuilds_total", reason=reason)
+        metrics.set_gauge("olivia_schedule_index_sessions", len(cols))
+        return cols
+
+    def _since_locked(self, now: datetime) -> str:
+        since = self._synced_at - _SYNC_SKEW
+        if since.utcoffset() != now.utcoffset():
+            # DST fall-back: the repeated hour's local timestamps sort before the last sync
+            since -= timedelta(hours=1)
+        return since.isoformat()
+
+    def _reload_enrolled_locked(self, cols: _Columns) -> None:
+        now = datetime.now(TZ)
+        rows = self._db.execute(
+            "SELECT session_id, enrolled FROM enrollments WHERE updated_at >= ?", (self._since_locked(now),)
+        ).fetchall()
+        self._synced_at = now
+        for sid, n in rows:
+            i = cols.pos.get(sid)
+            if i is not None:
+                cols.enrolled[i] = n
+
+    def _current(self) -> _Columns:
+        now = time.monotonic()
+        cols = self._cols
+        if cols is not None and now - self._checked < self.refresh_s:
+            return cols
+        with self._lock:
+            if self._cols is not None and now - self._checked < self.refresh_s:
+                return self._cols
+            if self._db is None:
+                self._db = conn()
+            # data_version moves whenever another connection commits (any process)
+            version = int(self._db.execute("PRAGMA data_version").fetchone()[0])
+            if self._cols is None or version != self._version:
+                fingerprint = tuple(self._db.execute(_FINGERPRINT).fetchone() or ())
+                if self._cols is None or fingerprint != self._fingerprint:
+                    self._cols = self._build_locked("initial" if self._cols is None else "schedule")
+                    self._fingerprint = fingerprint
+                else:
+                    self._reload_enrolled_locked(self._cols)
+                self._version = version
+            self._checked = now
+            return self._cols
+
+    def warm(self) -> None:
+        """Build at startup instead of on the first calendar request."""
+        if self.enabled:
+            self._current()
+
+    def patch_enrolled(self, session_id: str, enrolled: int) -> None:
+        """Apply this process's own enrollment without waiting for the refresh."""
+        cols = self._cols
+        if cols is not None:
+            i = cols.pos.get(session_id)
+            if i is not None:
+                cols.enrolled[i] = enrolled
+
+    def query(
+        self,
+        start: str,
+        end: str,
+        branch_ids: Optional[List[str]] = None,
+        buckets: Optional[Iterable[str]] = None,
+        tags: Optional[List[str]] = None,
+        has_spots: bool = False,
+        limit: Optional[int] = None,
+        fold_case: bool = False,
+        band: Optional[Sequence[str]] = None,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Sessions starting in [start, end) in start order, or None when the
+        caller should use SQL. Buckets match as stored (fold_case compares
+        them lowercased); tags match any, lowercased; band ("HH:MM", "HH:MM")
+        keeps local start times in [band[0], band[1]).
+        """
+        if not self.enabled:
+            return None
+        with timing.stage("index"):
+            cols = self._current()
+            lo = _epoch(start)
+            if lo < cols.horizon:
+                metrics.inc("olivia_schedule_index_queries_total", result="miss")
+                return None
+            metrics.inc("olivia_schedule_index_queries_total", result="hit")
+            a, b = (int(x) for x in np.searchsorted(cols.start, [lo, _epoch(end)], side="left"))
+            if a >= b:
+                return []
+            mask = np.ones(b - a, dtype=bool)
+            if branch_ids:
+                wanted = set(branch_ids)
+                mask &= np.isin(cols.branch[a:b], [i for i, v in enumerate(cols.branch_ids) if v in wanted])
+            if buckets:
+                wanted = set(buckets)
+                mask &= np.isin(
+                    cols.bucket[a:b], [i for i, v in enumerate(cols.buckets) if (v.lower() if fold_case else v) in wanted]
+                )
+            if tags:
+                wanted = {t.lower() for t in tags}
+                mask &= np.isin(cols.klass[a:b], [i for i, t in enumerate(cols.class_tags) if t & wanted])
+            if band:
+                minute = cols.minute[a:b]
+                mask &= (minute >= _clock(band[0])) & (minute < _clock(band[1]))
+            if has_spots:
+                mask &= cols.enrolled[a:b] < cols.capacity[a:b]
+            hits = np.flatnonzero(mask)
+            if limit is not None:
+                hits = hits[:limit]
+            return [cols.row(a + int(i)) for i in hits]
+
+
+SCHEDULE_INDEX = ScheduleIndex()
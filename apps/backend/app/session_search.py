@@ -0,0 +1,209 @@
+"""
+Session search for the chat pipeline.
+
+Every filter is pushed into SQL so the cost follows the size of the
+answer, not the size of the schedule:
+  - the date window is a plain range on start_ts (local-date ISO strings
+    sort correctly), which idx_sessions_start / idx_sessions_branch_start
+    can serve; chat narrows it to a time of day where the message says one
+    (app/temporal.py), and a band over several days compares the start_ts
+    clock digits
+  - branch, bucket (with aliases expanded), tags (class_tags index) and
+    has-spots are WHERE clauses, and ORDER BY start_ts LIMIT stops after
+    the first few matches
+  - tag lists come from the per-class cache, so no row parses JSON
+  - windows from today on are answered by the in-process schedule index
+    when it is enabled (app/schedule_index.py)
+  - sessions outside their branch's opening hours that day are dropped
+    against the compiled hours (app/hours_engine.py) when chat passes them
+"""
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .calendar_store import availability_color, class_tags, conn
+from .hours_engine import HoursEngine
+from .schedule_index import SCHEDULE_INDEX
+
+MAX_RESULTS = 10
+
+BUCKET_ALIASES = {
+    "kids_club": "kids",
+    "kidsclub": "kids",
+    "childcare": "kids",
+    "daycare": "kids",
+    "kids": "kids",
+    "swim": "swim",
+    "swimming": "swim",
+    "sports": "sports",
+    "gym": "gym",
+    "run": "run",
+    "running": "run",
+    "run_club": "run",
+    "runclub": "run",
+}
+
+_SELECT = """
+    SELECT
+      s.id AS session_id,
+      s.start_ts, s.end_ts, s.location, s.instructor, s.capacity,
+      b.id AS branch_id, b.name AS branch_name,
+      cl.id AS class_id, cl.name AS class_name, cl.bucket,
+      e.enrolled AS enrolled
+    FROM sessions s
+    JOIN branches b ON b.id = s.branch_id
+    JOIN classes cl ON cl.id = s.class_id
+    JOIN enrollments e ON e.session_id = s.id
+    WHERE s.status='scheduled'
+      AND s.start_ts >= ?
+      AND s.start_ts < ?
+"""
+
+
+def _bound(value: str, end: bool) -> str:
+    s = str(value).strip()
+    if len(s) > 10:
+        return datetime.fromisoformat(s).strftime("%Y-%m-%dT%H:%M")
+    d = date.fromisoformat(s)
+    return (d + timedelta(days=1) if end else d).isoformat()
+
+
+def date_window(date_start: str, date_end: str) -> Optional[Tuple[str, str]]:
+    """
+    Search bounds -> half-open [start, end) for start_ts. YYYY-MM-DD bounds
+    are whole days (date_end inclusive); YYYY-MM-DDTHH:MM bounds are used as
+    given (date_end exclusive).
+    """
+    try:
+        return _bound(date_start, False), _bound(date_end, True)
+    except ValueError:
+        return None
+
+
+def bucket_values(buckets: Iterable[str]) -> List[str]:
+    """Every stored bucket spelling that normalizes to one of `buckets`."""
+    wanted = {BUCKET_ALIASES.get(b.lower(), b.lower()) for b in buckets if b}
+    return sorted(wanted | {raw for raw, canon in BUCKET_ALIASES.items() if canon in wanted})
+
+
+def _placeholders(values: List[Any]) -> str:
+    return ",".join("?" * len(values))
+
+
+def row_to_session(r: Any) -> Dict[str, Any]:
+    cap = int(r["capacity"])
+    enrolled = int(r["enrolled"])
+    return {
+        "session_id": r["session_id"],
+        "class_id": r["class_id"],
+        "class_name": r["class_name"],
+        "bucket": r["bucket"],
+        "tags": class_tags(r["class_id"]),
+        "branch_id": r["branch_id"],
+        "branch_name": r["branch_name"],
+        "start_time": r["start_ts"],
+        "end_time": r["end_ts"],
+        "location": r["location"],
+        "instructor": r["instructor"],
+        "capacity": cap,
+        "enrolled": enrolled,
+        "remaining": cap - enrolled,
+        "percent_full": (enrolled / cap) if cap else 1.0,
+        "availability_color": availability_color(enrolled, cap),
+    }
+
+
+def query_sessions(
+    window: Tuple[str, str],
+    branch_ids: Optional[List[str]],
+    buckets: Optional[List[str]],
+    tags: Optional[List[str]],
+    has_spots: bool,
+    limit: Optional[int] = None,
+    ordered: bool = True,
+    band: Optional[Sequence[str]] = None,
+    hours: Optional[HoursEngine] = None,
+) -> List[Any]:
+    """
+    Rows for sessions starting in [window[0], window[1]), in start order
+    unless ordered=False (callers that rank the rows themselves skip the
+    sort); no LIMIT when limit is None. `band` ("HH:MM", "HH:MM") keeps
+    sessions whose local start time falls in [band[0], band[1]) on any day;
+    `hours` keeps sessions that fit their branch's opening hours.
+    """
+    rows = _query(window, branch_ids, buckets, tags, has_spots, limit, ordered, band)
+    if hours is None:
+        return rows
+    kept = hours.filter(rows)
+    if limit is not None and len(rows) == limit and len(kept) < limit:
+        # the LIMIT was spent partly on closed-hours sessions: take the whole window instead
+        kept = hours.filter(_query(window, branch_ids, buckets, tags, has_spots, None, ordered, band))[:limit]
+    return kept
+
+
+def _query(
+    window: Tuple[str, str],
+    branch_ids: Optional[List[str]],
+    buckets: Optional[List[str]],
+    tags: Optional[List[str]],
+    has_spots: bool,
+    limit: Optional[int],
+    ordered: bool,
+    band: Optional[Sequence[str]],
+) -> List[Any]:
+    rows = SCHEDULE_INDEX.query(
+        window[0], window[1], branch_ids, bucket_values(buckets) if buckets else None, tags, has_spots, limit,
+        fold_case=True, band=band,
+    )
+    if rows is not None:
+        return rows
+
+    q = _SELECT
+    params: List[Any] = list(window)
+    if branch_ids:
+        q += f" AND s.branch_id IN ({_placeholders(branch_ids)})"
+        params.extend(branch_ids)
+    if buckets:
+        values = bucket_values(buckets)
+        q += f" AND LOWER(cl.bucket) IN ({_placeholders(values)})"
+        params.extend(values)
+    if tags:
+        wanted = sorted({t.lower() for t in tags})
+        q += f" AND EXISTS (SELECT 1 FROM class_tags ct WHERE ct.tag IN ({_placeholders(wanted)}) AND ct.class_id = s.class_id)"
+        params.extend(wanted)
+    if has_spots:
+        q += " AND e.enrolled < s.capacity"
+    if band:
+        q += " AND substr(s.start_ts, 12, 5) >= ? AND substr(s.start_ts, 12, 5) < ?"
+        params.extend(band)
+    if ordered or limit is not None:
+        q += " ORDER BY s.start_ts ASC"
+    if limit is not None:
+        q += " LIMIT ?"
+        params.append(limit)
+
+    c = conn()
+    try:
+        return c.execute(q, params).fetchall()
+    finally:
+        c.close()
+
+
+def search_sessions(
+    date_start: str,
+    date_end: str,
+    branch_ids: Optional[List[str]],
+    buckets: Optional[List[str]],
+    tags: Optional[List[str]],
+    has_spots: bool,
+    limit: int = 5,
+    band: Optional[Sequence[str]] = None,
+    hours: Optional[HoursEngine] = None,
+) -> List[Dict[str, Any]]:
+    """Earliest matching sessions in the date_window of [date_start, date_end], at most 10."""
+    window = date_window(date_start, date_end)
+    if window is None:
+        return []
+    rows = query_sessions(window, branch_ids, buckets, tags, has_spots, max(1, min(int(limit), MAX_RESULTS)), band=band, hours=hours)
+    return [row_to_session(r) for r in rows]
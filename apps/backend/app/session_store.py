@@ -0,0 +1,264 @@
+"""
+Per-conversation chat state (history, pending follow-up, last suggested
+options), keyed by the client's session_id.
+
+Bounded two ways: at most OLIVIA_SESSION_MAX_ENTRIES conversations (least
+recently used evicted first), and conversations idle for longer than
+OLIVIA_SESSION_IDLE_TTL_S are dropped. History is a deque capped at
+MAX_HISTORY, so trimming happens on append.
+
+Backends (OLIVIA_SESSION_STORE):
+  memory  -> per-process LRU (default; single uvicorn worker only)
+  sqlite  -> one WAL-mode file (OLIVIA_SESSION_DB) shared by every worker
+             and every container on the host that mounts it, so "option 2"
+             and branch follow-ups work whichever process takes the turn
+"""
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Optional, Tuple, Union
+
+from . import metrics
+from .calendar_store import DB_PATH as _CALENDAR_DB_PATH
+
+MAX_HISTORY = int(os.getenv("OLIVIA_CHAT_MAX_HISTORY", "12"))
+MAX_ENTRIES = int(os.getenv("OLIVIA_SESSION_MAX_ENTRIES", "10000"))
+IDLE_TTL_S = float(os.getenv("OLIVIA_SESSION_IDLE_TTL_S", "3600"))
+BACKEND = os.getenv("OLIVIA_SESSION_STORE", "memory").strip().lower()
+DB_PATH = os.getenv("OLIVIA_SESSION_DB", "").strip() or str(_CALENDAR_DB_PATH.parent / "chat_sessions.db")
+# sqlite backend: how often one worker runs the idle/LRU sweep for everyone
+SWEEP_EVERY_S = float(os.getenv("OLIVIA_SESSION_SWEEP_EVERY_S", "30"))
+
+# rough per-record overhead (object, deque, slots) on top of the text it holds
+_BASE_BYTES = 600
+
+metrics.describe("olivia_session_store_entries", "gauge", "Conversations held in the chat session store.")
+metrics.describe("olivia_session_store_bytes", "gauge", "Approximate bytes of chat state held (text plus per-record overhead).")
+metrics.describe("olivia_session_store_evictions_total", "counter", "Chat sessions evicted, by reason (lru, idle).")
+
+
+class SessionState:
+    """One conversation. History entries are (role, content) tuples."""
+
+    __slots__ = ("session_id", "history", "pending", "suggestions", "last_seen", "nbytes")
+
+    def __init__(self, session_id: str) -> None:
+        self.session_id = session_id
+        self.history: Deque[Tuple[str, str]] = deque(maxlen=MAX_HISTORY)
+        self.pending: Optional[Dict[str, Any]] = None
+        self.suggestions: List[Tuple[str, str]] = []  # (session_id, label); option N is index N-1
+        self.last_seen = time.monotonic()
+        self.nbytes = _BASE_BYTES
+
+    @property
+    def is_new(self) -> bool:
+        return not self.history
+
+    def add(self, role: str, content: str) -> None:
+        self.history.append((role, content))
+
+    def set_suggestions(self, suggested: List[Dict[str, Any]]) -> None:
+        self.suggestions = [
+            (s["session_id"], f'{s["class_name"]} @ {s["branch_name"]} {s["start_time"]}') for s in suggested
+        ]
+
+    def option(self, n: int) -> Optional[str]:
+        """Session id behind "option n" of the last suggestions."""
+        if 1 <= n <= len(self.suggestions):
+            return self.suggestions[n - 1][0]
+        return None
+
+    def options(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        items = self.suggestions if limit is None else self.suggestions[:limit]
+        return [{"option": i, "session_id": sid, "label": label} for i, (sid, label) in enumerate(items, 1)]
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {"history": list(self.history), "pending": self.pending, "suggestions": self.suggestions},
+            separators=(",", ":"),
+            ensure_ascii=False,
+        )
+
+    @classmethod
+    def from_json(cls, session_id: str, raw: str) -> "SessionState":
+        data = json.loads(raw)
+        state = cls(session_id)
+        state.history.extend((role, content) for role, content in data.get("history") or [])
+        state.pending = data.get("pending")
+        state.suggestions = [(sid, label) for sid, label in data.get("suggestions") or []]
+        return state
+
+    def size(self) -> int:
+        n = _BASE_BYTES + sum(len(c) + 16 for _, c in self.history)
+        n += sum(len(sid) + len(label) + 16 for sid, label in self.suggestions)
+        if self.pending:
+            n += len(repr(self.pending))
+        return n
+
+
+class SessionStore:
+    def __init__(self, max_entries: int = MAX_ENTRIES, idle_ttl_s: float = IDLE_TTL_S) -> None:
+        self.max_entries = max(1, max_entries)
+        self.idle_ttl_s = idle_ttl_s
+        self._lock = threading.Lock()
+        self._states: "OrderedDict[str, SessionState]" = OrderedDict()  # least recently used first
+        self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def _publish(self) -> None:
+        metrics.set_gauge("olivia_session_store_entries", len(self._states))
+        metrics.set_gauge("olivia_session_store_bytes", self._bytes)
+
+    def _drop_locked(self, session_id: str, reason: str) -> None:
+        state = self._states.pop(session_id)
+        self._bytes -= state.nbytes
+        metrics.inc("olivia_session_store_evictions_total", reason=reason)
+
+    def _sweep_locked(self, now: float) -> int:
+        # LRU order is also idle order, so expired sessions sit at the front
+        dropped = 0
+        while self._states:
+            sid, state = next(iter(self._states.items()))
+            if now - state.last_seen < self.idle_ttl_s:
+                break
+            self._drop_locked(sid, "idle")
+            dropped += 1
+        return dropped
+
+    def get(self, session_id: str) -> SessionState:
+        """The conversation's state; a fresh one for unknown or expired sessions."""
+        now = time.monotonic()
+        with self._lock:
+            if self._sweep_locked(now):
+                self._publish()
+            state = self._states.get(session_id)
+            if state is None:
+                return SessionState(session_id)
+            self._states.move_to_end(session_id)
+            state.last_seen = now
+            return state
+
+    def save(self, state: SessionState) -> None:
+        """Store (or re-account) a conversation after it changed."""
+        now = time.monotonic()
+        with self._lock:
+            old = self._states.get(state.session_id)
+            if old is not None:
+                self._bytes -= old.nbytes
+            state.last_seen = now
+            state.nbytes = state.size()
+            self._states[state.session_id] = state
+            self._states.move_to_end(state.session_id)
+            self._bytes += state.nbytes
+            self._sweep_locked(now)
+            while len(self._states) > self.max_entries:
+                self._drop_locked(next(iter(self._states)), "lru")
+            self._publish()
+
+    def drop(self, session_id: str) -> None:
+        with self._lock:
+            if session_id in self._states:
+                state = self._states.pop(session_id)
+                self._bytes -= state.nbytes
+                self._publish()
+
+
+class SQLiteSessionStore:
+    """
+    Same interface as SessionStore, backed by a table every process reads
+    and writes. Each turn re-reads the row, so two workers never act on
+    stale options; concurrent turns of the *same* conversation are last
+    write wins (a browser tab sends one message at a time). Calls block
+    on sqlite (a commit per save), so async callers run them in the
+    threadpool.
+    """
+
+    def __init__(
+        self,
+        path: str = DB_PATH,
+        max_entries: int = MAX_ENTRIES,
+        idle_ttl_s: float = IDLE_TTL_S,
+        sweep_every_s: float = SWEEP_EVERY_S,
+    ) -> None:
+        self.max_entries = max(1, max_entries)
+        self.idle_ttl_s = idle_ttl_s
+        self.sweep_every_s = sweep_every_s
+        self._lock = threading.Lock()
+        self._last_sweep = 0.0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # timeout: wait out another worker's write instead of failing with "database is locked"
+        self._db = sqlite3.connect(path, timeout=5.0, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL;")
+        self._db.execute("PRAGMA synchronous=NORMAL;")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS chat_sessions ("
+            " session_id TEXT PRIMARY KEY, updated_at REAL NOT NULL, nbytes INTEGER NOT NULL, state TEXT NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_chat_sessions_updated ON chat_sessions(updated_at)")
+        self._db.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return int(self._db.execute("SELECT COUNT(*) FROM chat_sessions").fetchone()[0])
+
+    def _sweep_locked(self, now: float) -> None:
+        self._last_sweep = now
+        idle = self._db.execute("DELETE FROM chat_sessions WHERE updated_at < ?", (now - self.idle_ttl_s,)).rowcount
+        lru = self._db.execute(
+            "DELETE FROM chat_sessions WHERE session_id IN ("
+            " SELECT session_id FROM chat_sessions ORDER BY updated_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        ).rowcount
+        self._db.commit()
+        if idle > 0:
+            metrics.inc("olivia_session_store_evictions_total", idle, reason="idle")
+        if lru > 0:
+            metrics.inc("olivia_session_store_evictions_total", lru, reason="lru")
+        entries, nbytes = self._db.execute("SELECT COUNT(*), COALESCE(SUM(nbytes), 0) FROM chat_sessions").fetchone()
+        metrics.set_gauge("olivia_session_store_entries", entries)
+        metrics.set_gauge("olivia_session_store_bytes", nbytes)
+
+    def get(self, session_id: str) -> SessionState:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT updated_at, state FROM chat_sessions WHERE session_id=?", (session_id,)
+            ).fetchone()
+        if row is None or time.time() - float(row[0]) >= self.idle_ttl_s:
+            return SessionState(session_id)
+        return SessionState.from_json(session_id, row[1])
+
+    def save(self, state: SessionState) -> None:
+        now = time.time()
+        state.nbytes = state.size()
+        raw = state.to_json()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO chat_sessions(session_id, updated_at, nbytes, state) VALUES (?,?,?,?)",
+                (state.session_id, now, state.nbytes, raw),
+            )
+            self._db.commit()
+            if now - self._last_sweep >= self.sweep_every_s:
+                self._sweep_locked(now)
+
+    def drop(self, session_id: str) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM chat_sessions WHERE session_id=?", (session_id,))
+            self._db.commit()
+
+
+def _make_store() -> Union[SessionStore, SQLiteSessionStore]:
+    if BACKEND == "sqlite":
+        return SQLiteSessionStore()
+    if BACKEND != "memory":
+        raise ValueError(f"OLIVIA_SESSION_STORE must be 'memory' or 'sqlite', not {BACKEND!r}")
+    return SessionStore()
+
+
+STORE = _make_store()
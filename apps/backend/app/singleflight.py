@@ -0,0 +1,62 @@
+"""
+Single-flight: concurrent callers with the same key share one in-flight
+coroutine instead of each starting their own (e.g. a burst of identical
+chat messages after a branch email blast).
+
+The shared work runs as its own task, so a leader whose client
+disconnects doesn't cancel the result the other waiters are holding out for.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from . import metrics
+
+metrics.describe("olivia_singleflight_calls_total", "counter", "Single-flight calls by role (leader runs the work, shared reuses it).")
+metrics.describe("olivia_singleflight_saved_seconds_total", "counter", "Work time deduplicated by single-flight (leader duration x shared waiters).")
+metrics.describe("olivia_singleflight_inflight", "gauge", "Distinct keys currently in flight.")
+metrics.describe("olivia_singleflight_waiters", "gauge", "Callers currently waiting on someone else's in-flight work.")
+
+
+class SingleFlight:
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._inflight: Dict[str, "asyncio.Task[Any]"] = {}
+        self._shared: Dict[str, int] = {}
+        self._waiters = 0
+
+    def _publish(self) -> None:
+        metrics.set_gauge("olivia_singleflight_inflight", len(self._inflight), group=self.name)
+        metrics.set_gauge("olivia_singleflight_waiters", self._waiters, group=self.name)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is not None:
+            metrics.inc("olivia_singleflight_calls_total", group=self.name, role="shared")
+            self._shared[key] = self._shared.get(key, 0) + 1
+            self._waiters += 1
+            self._publish()
+            try:
+                return await asyncio.shield(task)
+            finally:
+                self._waiters -= 1
+                self._publish()
+
+        metrics.inc("olivia_singleflight_calls_total", group=self.name, role="leader")
+        started = time.monotonic()
+        task = asyncio.ensure_future(fn())
+        self._inflight[key] = task
+        self._publish()
+
+        def _done(_: "asyncio.Task[Any]") -> None:
+            if self._inflight.get(key) is task:
+                del self._inflight[key]
+            shared = self._shared.pop(key, 0)
+            if shared > 0 and not task.cancelled() and task.exception() is None:
+                metrics.inc("olivia_singleflight_saved_seconds_total", shared * (time.monotonic() - started), group=self.name)
+            self._publish()
+
+        task.add_done_callback(_done)
+        return await asyncio.shield(task)
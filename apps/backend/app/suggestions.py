@@ -0,0 +1,178 @@
+"""
+Tiered session suggestions for chat, from a single query.
+
+Tiers, in priority order:
+  primary    the requested window at the primary branch
+  other_day  the primary branch, +/- OTHER_DAY_RADIUS_D days around a
+             single-day ask that found nothing (never before today)
+  nearby     up to NEARBY_BRANCHES branches within OLIVIA_NEARBY_RADIUS_MIN
+             minutes of the primary (nearest first, shortest-path travel
+             times from app/proximity.py), requested window, when the
+             primary branch has at most one match
+  nearby_other_day
+             those branches on the other days, when a single-day ask
+             still has nothing at all
+
+A time-of-day band from the message ("saturday morning") applies to every
+tier, so the other days are the same part of the day, and so do the
+branches' opening hours (holiday closures included) when an hours engine
+is passed.
+
+Candidates for every tier come back from one SQL query over the union of
+those branches and windows (the legacy chain ran up to eight). Rows are assigned a tier in memory and each
+tier keeps only its earliest `limit` rows (heapq.nsmallest, not a sort of
+the whole candidate set); only the rows that are returned get decoded
+into response dicts.
+"""
+from __future__ import annotations
+
+import heapq
+import os
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from zoneinfo import ZoneInfo
+
+from .hours_engine import HoursEngine
+from .proximity import Proximity
+from .session_search import MAX_RESULTS, date_window, query_sessions, row_to_session, search_sessions
+
+TZ = ZoneInfo("America/New_York")
+
+NEARBY_BRANCHES = int(os.getenv("OLIVIA_NEARBY_MAX_BRANCHES", "3"))
+NEARBY_RADIUS_MIN = float(os.getenv("OLIVIA_NEARBY_RADIUS_MIN", "30"))
+OTHER_DAY_RADIUS_D = 3
+
+
+def _single_day(date_start: str, date_end: str, window: Tuple[str, str]) -> Optional[Tuple[date, date]]:
+    """
+    (first day, last day) of the window when the ask is about one day: the
+    window covers a single day, or date-only bounds one day apart (the
+    exclusive-end form planners tend to send).
+    """
+    first = date.fromisoformat(window[0][:10])
+    last = (datetime.fromisoformat(window[1]) - timedelta(microseconds=1)).date()
+    if first == last:
+        return first, last
+    if len(str(date_start)) == 10 and len(str(date_end)) == 10 and (last - first).days == 1:
+        return first, last
+    return None
+
+
+def _tagged(row: Any, tier: str, minutes: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+    x = row_to_session(row)
+    x["suggestion_tier"] = tier
+    if minutes and x["branch_id"] in minutes:
+        x["drive_minutes"] = minutes[x["branch_id"]]
+    return x
+
+
+def _earliest(rows: List[Any], k: int) -> List[Any]:
+    return heapq.nsmallest(k, rows, key=lambda r: r["start_ts"]) if k > 0 else []
+
+
+def suggest_sessions(
+    date_start: str,
+    date_end: str,
+    branch_ids: Optional[List[str]],
+    buckets: Optional[List[str]],
+    tags: Optional[List[str]],
+    has_spots: bool,
+    limit: int,
+    branches: List[Dict[str, Any]],
+    proximity: Optional[Proximity] = None,
+    band: Optional[Sequence[str]] = None,
+    hours: Optional[HoursEngine] = None,
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Returns (suggested_sessions, meta); without `proximity` there is no
+    nearby tier. `band` ("HH:MM", "HH:MM") limits every tier to that part of
+    the day, `hours` to sessions inside their branch's opening hours.
+    """
+    limit = max(1, min(int(limit or 5), MAX_RESULTS))
+    primary = (branch_ids or [None])[0]
+    names = {b.get("id"): b.get("name") or b.get("branch_name") or b.get("id") for b in branches or []}
+
+    meta: Dict[str, Any] = {
+        "primary_branch_id": primary,
+        "primary_branch_name": names.get(primary, primary) if primary else None,
+        "requested_date_start": date_start,
+        "requested_date_end": date_end,
+        "strategy": "primary",
+        "fallback_used": None,
+    }
+
+    window = date_window(date_start, date_end)
+    if not primary or window is None:
+        # no branch constraint -> plain search across every branch
+        results = search_sessions(date_start, date_end, None, buckets, tags, has_spots, limit, band=band, hours=hours)
+        for x in results:
+            x["suggestion_tier"] = "primary"
+        return results, _summarize(meta, results, len(results))
+
+    near = proximity.within(primary, NEARBY_RADIUS_MIN, limit=NEARBY_BRANCHES) if proximity else []
+    near_ids = [b for b, _ in near]
+    minutes = dict(near)
+
+    lo, hi = window
+    wide: Optional[Tuple[str, str]] = None
+    day = _single_day(date_start, date_end, window)
+    if day is not None:
+        today = datetime.now(TZ).date()
+        wide = (
+            max(day[0] - timedelta(days=OTHER_DAY_RADIUS_D), today).isoformat(),
+            (day[1] + timedelta(days=OTHER_DAY_RADIUS_D + 1)).isoformat(),
+        )
+        lo, hi = min(lo, wide[0]), max(hi, wide[1])
+
+    primary_rows: List[Any] = []
+    other_rows: List[Any] = []
+    near_rows: List[Any] = []
+    near_other_rows: List[Any] = []
+    for r in query_sessions((lo, hi), [primary] + near_ids, buckets, tags, has_spots, ordered=False, band=band, hours=hours):
+        ts = r["start_ts"]
+        if window[0] <= ts < window[1]:
+            (primary_rows if r["branch_id"] == primary else near_rows).append(r)
+        elif wide is not None and wide[0] <= ts < wide[1]:
+            (other_rows if r["branch_id"] == primary else near_other_rows).append(r)
+
+    results = [_tagged(r, "primary") for r in _earliest(primary_rows, limit)]
+    primary_count = len(results)
+
+    # other days at the same branch: only when a single-day ask found nothing
+    if not results and other_rows:
+        meta["strategy"] = "same_branch_other_day"
+        meta["fallback_used"] = "same_branch_other_day"
+        meta["other_day_window"] = {
+            "date_start": wide[0],
+            "date_end": (day[1] + timedelta(days=OTHER_DAY_RADIUS_D)).isoformat(),
+        }
+        results.extend(_tagged(r, "other_day") for r in _earliest(other_rows, limit))
+
+    # nearby branches, same window: only while the answer is still thin
+    if len(results) <= 1 and near_rows:
+        meta["strategy"] = "nearby_same_day" if meta["strategy"] == "primary" else "mixed"
+        meta["fallback_used"] = meta["fallback_used"] or "nearby_same_day"
+        meta["nearby_branches"] = _nearby_meta(near, names)
+        results.extend(_tagged(r, "nearby", minutes) for r in _earliest(near_rows, limit - len(results)))
+
+    # nearby branches, other days: last resort before "nothing found"
+    if not results and near_other_rows:
+        meta["strategy"] = "nearby_other_day"
+        meta["fallback_used"] = "nearby_other_day"
+        meta["nearby_branches"] = _nearby_meta(near, names)
+        results.extend(_tagged(r, "nearby_other_day", minutes) for r in _earliest(near_other_rows, limit))
+
+    return results, _summarize(meta, results, primary_count)
+
+
+def _nearby_meta(near: List[Tuple[str, int]], names: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"branch_id": b, "branch_name": names.get(b, b), "minutes": m} for b, m in near]
+
+
+def _summarize(meta: Dict[str, Any], results: List[Dict[str, Any]], primary_count: int) -> Dict[str, Any]:
+    meta["primary_count"] = primary_count
+    meta["total"] = len(results)
+    meta["tiers"] = {
+        tier: sum(1 for x in results if x.get("suggestion_tier") == tier) for tier in ("primary", "other_day", "nearby", "nearby_other_day")
+    }
+    return meta
@@ -0,0 +1,286 @@
+"""
+Dates and times of day in chat messages -> a precise search window.
+
+    "swim saturday morning"   Sat 05:00 .. 12:00
+    "yoga after 5pm tomorrow" tomorrow 17:00 .. midnight
+    "june 12" / "6/12"        that day
+    "next 3 days"             today .. today + 3
+    "evenings this week"      today .. Sunday, sessions starting 17:00-21:00
+    "this weekend"            Saturday .. Sunday
+    "from 5 to 7"             today 17:00 .. 19:00 (a bare end follows the start)
+
+The day and the time of day are read independently, each by one compiled
+pattern scanned once over the message: the first day expression wins,
+time-of-day expressions are intersected ("morning after 9" -> 09:00-12:00).
+A time of day without a day means today, or tomorrow once that band is over
+today; plural parts ("mornings") leave the days to the caller's default.
+"sat" and "sun" are days only after "on", "this" or "next".
+
+Bands are ("HH:MM", "HH:MM") on session start times, end exclusive, with
+"24:00" for midnight; they compare directly against start_ts[11:16].
+"""
+from __future__ import annotations
+
+import re
+from datetime import date, datetime, timedelta
+from typing import NamedTuple, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+TZ = ZoneInfo("America/New_York")
+
+ONE_DAY = timedelta(days=1)
+AROUND_MIN = 30  # "at 6pm" / "around 6" -> 17:30-18:30
+
+Band = Tuple[str, str]
+
+_MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+_WEEKDAYS = {
+    "monday": 0, "mon": 0,
+    "tuesday": 1, "tues": 1, "tue": 1,
+    "wednesday": 2, "wed": 2,
+    "thursday": 3, "thurs": 3, "thur": 3, "thu": 3,
+    "friday": 4, "fri": 4,
+    "saturday": 5, "sat": 5,
+    "sunday": 6, "sun": 6,
+}
+_COUNTS = {"a": 1, "one": 1, "two": 2, "couple": 2, "couple of": 2, "three": 3, "few": 3, "four": 4, "five": 5, "six": 6, "seven": 7}
+_PARTS = {
+    "early morning": ("05:00", "08:00"),
+    "morning": ("05:00", "12:00"),
+    "lunch": ("11:00", "14:00"),
+    "lunchtime": ("11:00", "14:00"),
+    "midday": ("11:00", "14:00"),
+    "afternoon": ("12:00", "17:00"),
+    "after school": ("15:00", "18:00"),
+    "after work": ("17:00", "21:00"),
+    "evening": ("17:00", "21:00"),
+    "tonight": ("17:00", "24:00"),
+    "night": ("18:00", "24:00"),
+}
+
+_MONTH = r"(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|sept?(?:ember)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)"
+# also plain English ("I sat by the pool"): a weekday only after "on", "this" or "next"
+_AMBIGUOUS_WEEKDAYS = ("sat", "sun")
+_WEEKDAY = "|".join(sorted((w for w in _WEEKDAYS if w not in _AMBIGUOUS_WEEKDAYS), key=len, reverse=True))
+_COUNT = r"\d{1,2}|" + "|".join(sorted(_COUNTS, key=len, reverse=True)).replace(" ", r"\s+")
+_PART = "|".join(sorted(_PARTS, key=len, reverse=True)).replace(" ", r"\s+")
+
+_DAY_RE = re.compile(
+    rf"""\b(?:
+        (?P<iso>\d{{4}}-\d{{2}}-\d{{2}})
+      | (?P<mon1>{_MONTH})\.?\s+(?P<dom1>\d{{1,2}})(?:st|nd|rd|th)?\b
+      | (?P<dom2>\d{{1,2}})(?:st|nd|rd|th)?\s+(?:of\s+)?(?P<mon2>{_MONTH})\b
+      | (?P<num_m>\d{{1,2}})/(?P<num_d>\d{{1,2}})(?:/(?P<num_y>\d{{4}}|\d{{2}}))?\b
+      | (?:the\s+)?(?:next|coming)\s+(?P<span>{_COUNT})\s+days?\b
+      | in\s+(?P<ahead>{_COUNT})\s+days?\b
+      | (?P<after_tomorrow>day\s+after\s+tomorrow)
+      | (?P<today>today|tonight)
+      | (?P<tomorrow>tomorrow|tomorow|tmrw|tmr)
+      | (?:(?P<weekend_rel>this|next)\s+)?(?P<weekend>weekend)
+      | (?P<week_rel>this|next)\s+week\b
+      | (?:(?P<weekday_rel>this|next)\s+)?(?P<weekday>{_WEEKDAY})s?\b
+      | (?:(?P<abbr_rel>this|next)|on)\s+(?P<abbr>{"|".join(_AMBIGUOUS_WEEKDAYS)})\b
+    )""",
+    re.X,
+)
+
+
+def _clock(p: str) -> str:
+    return rf"(?:(?P<{p}h>\d{{1,2}})(?::(?P<{p}m>[0-5]\d))?\s*(?P<{p}ap>[ap]\.?m\b\.?)?|(?P<{p}word>noon|midnight))"
+
+
+_TIME_RE = re.compile(
+    rf"""\b(?:
+        (?:between|from)\s+{_clock("a")}\s*(?:and|to|-|–)\s*{_clock("b")}
+      | {_clock("c")}\s*(?:-|–|to)\s*{_clock("d")}
+      | (?P<op>after|past|from|starting(?:\s+at)?|before|by|until|till|at|around|about)\s+{_clock("e")}
+      | {_clock("f")}
+      | (?P<part>{_PART})(?P<plural>s)?\b
+    )""",
+    re.X,
+)
+
+
+class When(NamedTuple):
+    start: Optional[date]  # first day; None when only a time of day was given
+    end: Optional[date]  # day after the last day
+    band: Optional[Band]
+
+    def bounds(self) -> Tuple[str, str]:
+        """
+        (date_start, date_end) for session_search.date_window: whole days as
+        inclusive YYYY-MM-DD, a single day with a band as [start, end) timestamps.
+        """
+        if self.band and self.end - self.start == ONE_DAY:
+            lo, hi = self.band
+            return f"{self.start.isoformat()}T{lo}", _stamp(self.start, hi)
+        return self.start.isoformat(), (self.end - ONE_DAY).isoformat()
+
+
+def _stamp(day: date, hhmm: str) -> str:
+    if hhmm == "24:00":
+        return f"{(day + ONE_DAY).isoformat()}T00:00"
+    return f"{day.isoformat()}T{hhmm}"
+
+
+def _count(raw: str) -> int:
+    return int(raw) if raw.isdigit() else _COUNTS[re.sub(r"\s+", " ", raw)]
+
+
+def _upcoming(month: int, day: int, today: date, year: Optional[int] = None) -> date:
+    """The date with that month/day; without a year, the next one on or after today."""
+    if year is not None:
+        return date(year + 2000 if year < 100 else year, month, day)
+    d = date(today.year, month, day)
+    return d if d >= today else date(today.year + 1, month, day)
+
+
+def _day_range(m: re.Match, today: date) -> Tuple[date, date]:
+    """(first day, day after the last day) for one _DAY_RE match; ValueError for impossible dates."""
+    g = m.groupdict()
+    if g["iso"]:
+        d = date.fromisoformat(g["iso"])
+    elif g["mon1"] or g["mon2"]:
+        d = _upcoming(_MONTHS[(g["mon1"] or g["mon2"])[:3]], int(g["dom1"] or g["dom2"]), today)
+    elif g["num_m"]:
+        d = _upcoming(int(g["num_m"]), int(g["num_d"]), today, int(g["num_y"]) if g["num_y"] else None)
+    elif g["span"]:
+        return today, today + timedelta(days=max(1, _count(g["span"])))
+    elif g["ahead"]:
+        d = today + timedelta(days=_count(g["ahead"]))
+    elif g["after_tomorrow"]:
+        d = today + timedelta(days=2)
+    elif g["today"]:
+        d = today
+    elif g["tomorrow"]:
+        d = today + ONE_DAY
+    elif g["weekend"]:
+        saturday = today + timedelta(days=(5 - today.weekday()) % 7)
+        if today.weekday() == 6:
+            saturday -= timedelta(days=7)  # on Sunday, "this weekend" is what's left of it
+        if g["weekend_rel"] == "next":
+            saturday += timedelta(days=7)
+        return max(saturday, today), saturday + timedelta(days=2)
+    elif g["week_rel"]:
+        monday = today - timedelta(days=today.weekday())
+        if g["week_rel"] == "next":
+            return monday + timedelta(days=7), monday + timedelta(days=14)
+        return today, monday + timedelta(days=7)  # the rest of this week, not the days already gone
+    else:
+        ahead = (_WEEKDAYS[g["weekday"] or g["abbr"]] - today.weekday()) % 7
+        if ahead == 0 and (g["weekday_rel"] or g["abbr_rel"]) != "this":
+            ahead = 7  # "Thursday" on a Thursday means next week's
+        d = today + timedelta(days=ahead)
+    return d, d + ONE_DAY
+
+
+def _minutes(g: dict, p: str, default_pm: Optional[bool] = None) -> Optional[int]:
+    """Minutes after midnight for one clock group; None if it does not read as a time."""
+    word = g[f"{p}word"]
+    if word:
+        return 12 * 60 if word == "noon" else 0
+    h, m, ap = int(g[f"{p}h"]), int(g[f"{p}m"] or 0), g[f"{p}ap"]
+    if ap:
+        if not 1 <= h <= 12:
+            return None
+        pm = ap.startswith("p")
+    elif h > 23:
+        return None
+    elif h > 12 or h == 0:
+        return h * 60 + m
+    elif default_pm is not None:
+        pm = default_pm if h != 12 else True
+    else:
+        pm = h <= 6 or h == 12  # gym hours: "after 5" is 5pm, "before 9" is 9am
+    return (h % 12 + (12 if pm else 0)) * 60 + m
+
+
+def _hhmm(minutes: int) -> str:
+    minutes = max(0, min(minutes, 24 * 60))
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def _band(m: re.Match) -> Optional[Tuple[int, int]]:
+    """(start, end) minutes for one _TIME_RE match, or None when it is not a time after all."""
+    g = m.groupdict()
+    if g["part"]:
+        lo, hi = _PARTS[re.sub(r"\s+", " ", g["part"])]
+        return int(lo[:2]) * 60 + int(lo[3:]), int(hi[:2]) * 60 + int(hi[3:])
+    for a, b in (("a", "b"), ("c", "d")):
+        if g[f"{a}h"] or g[f"{a}word"]:
+            if a == "c" and not (g["cap"] or g["dap"] or g["cword"] or g["dword"]):
+                return None  # "2-3" alone is not a time range
+            if g[f"{b}ap"] or g[f"{b}word"]:
+                # the end is pinned and lends its meridiem to a bare start
+                hi = _minutes(g, b)
+                if hi is None:
+                    return None
+                pm_hi = hi >= 12 * 60
+                lo = _minutes(g, a, default_pm=pm_hi if g[f"{b}ap"] else None)
+                if lo is None:
+                    return None
+                if lo >= hi and g[f"{b}ap"] and not g[f"{a}ap"]:
+                    lo = _minutes(g, a, default_pm=not pm_hi)  # "11-1pm"
+            else:
+                # a bare end follows the start: "5 to 7" is 17-19, "5pm to 7" too, "11 to 1" crosses noon
+                lo = _minutes(g, a)
+                if lo is None:
+                    return None
+                pm_lo = lo >= 12 * 60
+                hi = _minutes(g, b, default_pm=pm_lo)
+                if hi is not None and lo >= hi:
+                    hi = _minutes(g, b, default_pm=not pm_lo)
+            return (lo, hi) if lo is not None and hi is not None and lo < hi else None
+    if g["eh"] or g["eword"]:
+        t = _minutes(g, "e")
+        if t is None:
+            return None
+        op = g["op"].split()[0]
+        if op in ("after", "past", "from", "starting"):
+            return t, 24 * 60
+        if op in ("before", "by", "until", "till"):
+            return 0, t
+        return t - AROUND_MIN, t + AROUND_MIN
+    if not (g["fap"] or g["fword"]):
+        return None  # a bare number is not a time
+    t = _minutes(g, "f")
+    return (t - AROUND_MIN, t + AROUND_MIN) if t is not None else None
+
+
+def parse(text: str, now: Optional[datetime] = None) -> Optional[When]:
+    """The days and time of day a message asks about, or None if it names neither."""
+    msg = (text or "").lower()
+    now = now or datetime.now(TZ)
+    today = now.date()
+
+    days: Optional[Tuple[date, date]] = None
+    for m in _DAY_RE.finditer(msg):
+        try:
+            days = _day_range(m, today)
+        except ValueError:  # "feb 30", "13/45"
+            continue
+        break
+
+    band: Optional[Tuple[int, int]] = None
+    plural = False
+    for m in _TIME_RE.finditer(msg):
+        got = _band(m)
+        if got is None:
+            continue
+        plural = plural or bool(m.group("plural"))
+        if band is None:
+            band = got
+        elif max(band[0], got[0]) < min(band[1], got[1]):
+            band = max(band[0], got[0]), min(band[1], got[1])
+
+    if days is None and band is None:
+        return None
+    if days is None and not plural:
+        # "after 5pm", "this evening": today, unless that part of today is over
+        day = today if band[1] > now.hour * 60 + now.minute else today + ONE_DAY
+        days = day, day + ONE_DAY
+    start, end = days if days else (None, None)
+    return When(start, end, (_hhmm(band[0]), _hhmm(band[1])) if band else None)
@@ -0,0 +1,115 @@
+"""
+Per-request stage timing.
+
+    with timing.stage("planner"):
+        plan = await _run_planner(branches, req)
+
+Each stage feeds the olivia_stage_seconds histogram. Stages also collect
+on the current request (a contextvar, so threadpool work counts too), and
+ServerTimingMiddleware returns them as a `Server-Timing` header next to a
+per-route olivia_http_request_seconds histogram.
+"""
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from . import metrics
+
+metrics.describe("olivia_stage_seconds", "histogram", "Time spent in one request stage (chat pipeline, SQL reads), by stage.")
+metrics.describe("olivia_http_request_seconds", "histogram", "HTTP request latency up to the response headers, by method, route and status.")
+metrics.describe("olivia_http_requests_total", "counter", "HTTP requests, by method, route and status.")
+
+_STAGES: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("olivia_stages", default=None)
+
+
+def record(name: str, seconds: float, observe: bool = True) -> None:
+    """Attach an externally measured duration (e.g. Ollama's own timings) to the request."""
+    if observe:
+        metrics.observe("olivia_stage_seconds", seconds, stage=name)
+    stages = _STAGES.get()
+    if stages is not None:
+        stages.append((name, seconds))
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - t0)
+
+
+def server_timing(stages: List[Tuple[str, float]], total_s: float) -> str:
+    """Sum repeated stages and format them as a Server-Timing header value (ms)."""
+    totals: Dict[str, float] = {}
+    for name, seconds in stages:
+        totals[name] = totals.get(name, 0.0) + seconds
+    parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in totals.items()]
+    parts.append(f"total;dur={total_s * 1000:.1f}")
+    return ", ".join(parts)
+
+
+class ServerTimingMiddleware:
+    """
+    Pure ASGI (not BaseHTTPMiddleware) so streaming responses pass through
+    untouched; for SSE the header covers the work done before the first byte.
+    """
+
+    def __init__(self, app: Callable[..., Any]) -> None:
+        self.app = app
+        self._routes: Dict[Any, str] = {}
+
+    def _route(self, scope: Dict[str, Any]) -> str:
+        # label by path template, not raw path, to keep label cardinality bounded
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        if endpoint not in self._routes:
+            router = scope.get("router")
+            for r in getattr(router, "routes", []):
+                if getattr(r, "endpoint", None) is endpoint:
+                    self._routes[endpoint] = r.path
+                    break
+            else:
+                self._routes[endpoint] = getattr(endpoint, "__name__", "unknown")
+        return self._routes[endpoint]
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable[..., Any], send: Callable[..., Any]) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stages: List[Tuple[str, float]] = []
+        token = _STAGES.set(stages)
+        t0 = time.perf_counter()
+        started = False
+
+        def _observe(status: int) -> float:
+            total = time.perf_counter() - t0
+            labels = {"method": scope["method"], "route": self._route(scope), "status": str(status)}
+            metrics.observe("olivia_http_request_seconds", total, **labels)
+            metrics.inc("olivia_http_requests_total", **labels)
+            return total
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            nonlocal started
+            if message["type"] == "http.response.start":
+                started = True
+                total = _observe(message["status"])
+                headers = list(message.get("headers") or [])
+                headers.append((b"server-timing", server_timing(stages, total).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            if not started:
+                _observe(500)  # the outer error middleware renders the 500
+            raise
+        finally:
+            _STAGES.reset(token)
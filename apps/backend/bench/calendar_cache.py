@@ -0,0 +1,74 @@
+"""
+Repeat /calendar loads: building the response vs the calendar response cache.
+
+    cd apps/backend
+    python -m bench.calendar_cache --branches 60 --days 180 --rounds 200
+
+Reuses the bench.search synthetic schedule and calls the /calendar handler
+directly: each view built from scratch (cache off), then served from the
+cache, then an enrollment at one branch, to show which cached views it
+evicts.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+from app import calendar_store
+from app.calendar_cache import CALENDAR_CACHE
+from app.data_version import VERSIONS
+from app.routers.calendar import get_calendar
+from app.schedule_index import SCHEDULE_INDEX
+
+from .search import TZ, _time, build_schedule
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Calendar response cache benchmark")
+    ap.add_argument("--branches", type=int, default=60)
+    ap.add_argument("--days", type=int, default=180)
+    ap.add_argument("--rounds", type=int, default=200)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        calendar_store.DB_PATH = calendar_store.Path(os.path.join(tmp, "bench.db"))
+        n = build_schedule(args.branches, args.days)
+        SCHEDULE_INDEX.invalidate()
+        VERSIONS.invalidate()
+
+        today = datetime.now(TZ).date()
+        week_end = (today + timedelta(days=6)).isoformat()
+        month_end = (today + timedelta(days=27)).isoformat()
+        views = {
+            "1 branch, week": (today.isoformat(), week_end, "b001", None, False),
+            "5 branches, week": (today.isoformat(), week_end, "b001,b002,b003,b004,b005", None, False),
+            "all, week, swim": (today.isoformat(), week_end, None, "swim", True),
+            "1 branch, month": (today.isoformat(), month_end, "b002", None, True),
+            "all, month": (today.isoformat(), month_end, None, None, False),
+        }
+        size = CALENDAR_CACHE.max_entries
+        print(f"{n} sessions ({args.branches} branches x {args.days} days), median of {args.rounds} rounds")
+        print(f"{'view':<22}{'KiB':>8}{'build ms':>10}{'cached ms':>11}")
+        for name, q in views.items():
+            CALENDAR_CACHE.max_entries = 0
+            body = get_calendar(*q, if_none_match=None).body
+            build_ms = _time(lambda: get_calendar(*q, if_none_match=None), max(1, args.rounds // 10))
+            CALENDAR_CACHE.max_entries = size
+            assert get_calendar(*q, if_none_match=None).body == body
+            cached_ms = _time(lambda: get_calendar(*q, if_none_match=None), args.rounds)
+            print(f"{name:<22}{len(body) / 1024:>8.0f}{build_ms:>10.2f}{cached_ms:>11.3f}")
+
+        c = calendar_store.conn()
+        c.execute("UPDATE enrollments SET enrolled = enrolled WHERE session_id IN (SELECT id FROM sessions WHERE branch_id='b003' LIMIT 1)")
+        versions = VERSIONS.bump(c, ["b003"])
+        c.commit()
+        c.close()
+        before = len(CALENDAR_CACHE._entries)
+        VERSIONS.note(versions)
+        print(f"enrollment at b003: {before - len(CALENDAR_CACHE._entries)} of {before} cached views evicted (b003 and all-branch views)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Local stand-in for Ollama's /api/chat, for load tests without a model.
+
+    cd apps/backend
+    python -m bench.fake_ollama --port 11435 --latency lognormal:900,0.4 --error-rate 0.02
+    OLIVIA_OLLAMA_URL=http://127.0.0.1:11435 uvicorn app.main:app --port 8000
+
+Replies are schema-valid JSON when the request carries a `format` schema,
+a canned planner/narrator object in plain JSON mode, and NDJSON token
+chunks in stream mode. Latency, streaming speed and failures are configurable.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Any, Dict, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+class FakeConfig:
+    latency: str = "fixed:300"       # fixed:MS | uniform:LO_MS,HI_MS | lognormal:MEDIAN_MS,SIGMA
+    tokens_per_s: float = 40.0       # streaming / eval speed
+    error_rate: float = 0.0          # share of calls answered with error_status
+    error_status: int = 500
+    hang_rate: float = 0.0           # share of calls that never answer (exercise client timeouts)
+    model: str = "fake-llama"
+    seed: Optional[int] = None
+
+
+CFG = FakeConfig()
+_rng = random.Random()
+
+app = FastAPI(title="fake-ollama")
+
+
+def _latency_s() -> float:
+    kind, _, args = CFG.latency.partition(":")
+    nums = [float(x) for x in args.split(",") if x]
+    if kind == "uniform":
+        return _rng.uniform(nums[0], nums[1]) / 1000
+    if kind == "lognormal":
+        median_ms, sigma = nums[0], (nums[1] if len(nums) > 1 else 0.5)
+        return _rng.lognormvariate(0, sigma) * median_ms / 1000
+    return (nums[0] if nums else 0.0) / 1000
+
+
+def _instance(schema: Dict[str, Any]) -> Any:
+    """Smallest plausible instance of a (simple) JSON schema."""
+    t = schema.get("type")
+    if isinstance(t, list):
+        t = next((x for x in t if x != "null"), "null")
+    if "enum" in schema:
+        return schema["enum"][0]
+    if t == "object":
+        return {k: _instance(v) for k, v in (schema.get("properties") or {}).items()}
+    if t == "array":
+        return []
+    if t == "string":
+        return "ok"
+    if t == "integer":
+        return int(schema.get("minimum", 1))
+    if t == "number":
+        return float(schema.get("minimum", 0))
+    if t == "boolean":
+        return True
+    return None
+
+
+def _canned(messages: List[Dict[str, str]], fmt: Any) -> Dict[str, Any]:
+    system = " ".join(m.get("content", "") for m in messages if m.get("role") == "system")
+    if isinstance(fmt, dict):
+        obj = _instance(fmt)
+        if "assistant_message" in obj:
+            obj["assistant_message"] = "Here are a few good options for you."
+        if obj.get("action"):
+            obj["action"] = "find_sessions"
+            obj.setdefault("params", {}).update({"date_start": None, "date_end": None, "limit": 5})
+            obj["follow_up_question"] = None
+        return obj
+    if "Pick ONE action" in system:
+        return {"action": "find_sessions", "params": {"has_spots": True, "limit": 5}, "follow_up_question": None}
+    return {"assistant_message": "Here are a few good options for you."}
+
+
+def _usage(messages: List[Dict[str, str]], content: str, elapsed_s: float) -> Dict[str, Any]:
+    prompt_tokens = sum(len(m.get("content", "")) for m in messages) // 4
+    eval_tokens = max(1, len(content) // 4)
+    return {
+        "prompt_eval_count": prompt_tokens,
+        "eval_count": eval_tokens,
+        "prompt_eval_duration": int(elapsed_s * 0.3 * 1e9),
+        "eval_duration": int(elapsed_s * 0.7 * 1e9),
+        "total_duration": int(elapsed_s * 1e9),
+    }
+
+
+@app.get("/api/tags")
+async def tags():
+    return {"models": [{"name": CFG.model}]}
+
+
+@app.post("/api/chat")
+async def chat(request: Request):
+    body = await request.json()
+    messages = body.get("messages") or []
+    started = time.monotonic()
+
+    roll = _rng.random()
+    if roll < CFG.hang_rate:
+        await asyncio.sleep(3600)
+    await asyncio.sleep(_latency_s())
+    if roll < CFG.hang_rate + CFG.error_rate:
+        return JSONResponse({"error": "injected failure"}, status_code=CFG.error_status)
+
+    if body.get("stream"):
+        text = "Here are a few good options for you. Option 1 has the most open spots."
+
+        async def chunks():
+            for word in text.split(" "):
+                await asyncio.sleep(1.0 / CFG.tokens_per_s)
+                yield json.dumps({"model": body.get("model"), "message": {"role": "assistant", "content": word + " "}, "done": False}) + "\n"
+            final = {"model": body.get("model"), "message": {"role": "assistant", "content": ""}, "done": True}
+            final.update(_usage(messages, text, time.monotonic() - started))
+            yield json.dumps(final) + "\n"
+
+        return StreamingResponse(chunks(), media_type="application/x-ndjson")
+
+    content = json.dumps(_canned(messages, body.get("format")))
+    await asyncio.sleep(len(content) / 4 / CFG.tokens_per_s)
+    return {
+        "model": body.get("model"),
+        "message": {"role": "assistant", "content": content},
+        "done": True,
+        **_usage(messages, content, time.monotonic() - started),
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Fake Ollama /api/chat server")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=11435)
+    ap.add_argument("--latency", default=CFG.latency)
+    ap.add_argument("--tokens-per-s", type=float, default=CFG.tokens_per_s)
+    ap.add_argument("--error-rate", type=float, default=CFG.error_rate)
+    ap.add_argument("--error-status", type=int, default=CFG.error_status)
+    ap.add_argument("--hang-rate", type=float, default=CFG.hang_rate)
+    ap.add_argument("--seed", type=int, default=None)
+    args = ap.parse_args()
+
+    CFG.latency = args.latency
+    CFG.tokens_per_s = args.tokens_per_s
+    CFG.error_rate = args.error_rate
+    CFG.error_status = args.error_status
+    CFG.hang_rate = args.hang_rate
+    if args.seed is not None:
+        _rng.seed(args.seed)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
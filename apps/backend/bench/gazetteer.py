@@ -0,0 +1,95 @@
+"""
+Branch mention lookup: legacy per-branch scan vs the compiled gazetteer.
+
+    cd apps/backend
+    python -m bench.gazetteer --branches 300 --rounds 2000
+
+Generates a synthetic association (two-word place names, each with a
+"<place> YMCA" name and a one-word alias) and times chat-style messages
+with the old chat matcher and with Gazetteer.branch_ids.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from app.gazetteer import Gazetteer
+
+SYLLABLES = ["ash", "bel", "cam", "dor", "ell", "fen", "gal", "hal", "ing", "kes", "lan", "mor", "nor", "ost", "pem", "ros", "sel", "tor", "vin", "wes"]
+SUFFIXES = ["County", "Park", "Valley", "Heights", "Family", "Center", "Grove", "Hills"]
+
+
+def legacy_match(branches: List[Dict[str, Any]], message: Optional[str]) -> Optional[str]:
+    """The pre-gazetteer chat matcher: ids, then names, then name tokens, branch by branch."""
+    if not message:
+        return None
+    msg = message.strip().lower()
+    msg_u = msg.replace("-", " ").replace("_", " ")
+    for b in branches:
+        bid = (b.get("id") or "").lower()
+        if bid and (msg == bid or msg.replace(" ", "_") == bid or msg_u.replace(" ", "_") == bid):
+            return b.get("id")
+    for b in branches:
+        name = (b.get("name") or "").lower()
+        if name and name in msg:
+            return b.get("id")
+        if name:
+            toks = [t for t in name.replace("ymca", "").split() if t]
+            if toks and all(t in msg for t in toks):
+                return b.get("id")
+    return None
+
+
+def make_branches(n: int, seed: int = 11) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    out, seen = [], set()
+    while len(out) < n:
+        place = (rng.choice(SYLLABLES) + rng.choice(SYLLABLES) + rng.choice(SYLLABLES)).title()
+        name = f"{place} {rng.choice(SUFFIXES)}"
+        if name in seen:
+            continue
+        seen.add(name)
+        out.append({"id": name.lower().replace(" ", "_"), "name": f"{name} YMCA", "aliases": [name, place]})
+    return out
+
+
+def _time(fn: Callable[[], Any], rounds: int) -> float:
+    samples = []
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1e6)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Branch gazetteer benchmark")
+    ap.add_argument("--branches", type=int, default=300)
+    ap.add_argument("--rounds", type=int, default=2000)
+    args = ap.parse_args()
+
+    branches = make_branches(args.branches)
+    t0 = time.perf_counter()
+    g = Gazetteer(branches)
+    build_ms = (time.perf_counter() - t0) * 1000
+
+    last = branches[-1]["name"].replace(" YMCA", "")
+    messages = {
+        "no branch": "any lap swim openings tomorrow morning with spots?",
+        "first branch": f"swim at {branches[0]['name']} tomorrow",
+        "last branch": f"yoga at {last} this week",
+        "two branches": f"kids club at {branches[1]['aliases'][0]} or {last} on saturday",
+    }
+    print(f"{args.branches} branches, gazetteer build {build_ms:.1f} ms, median of {args.rounds} rounds (microseconds)")
+    print(f"{'message':<16}{'legacy us':>11}{'new us':>9}{'speedup':>9}  found")
+    for name, msg in messages.items():
+        old_us = _time(lambda: legacy_match(branches, msg), args.rounds)
+        new_us = _time(lambda: g.branch_ids(msg), args.rounds)
+        print(f"{name:<16}{old_us:>11.1f}{new_us:>9.1f}{old_us / max(new_us, 1e-6):>8.1f}x  {g.branch_ids(msg)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Opening hours: the old per-branch /hours/open-now vs the compiled hours engine.
+
+    cd apps/backend
+    python -m bench.hours --branches 60 --rounds 2000
+
+Builds a synthetic hours.json (weekly hours, a Sunday override and a year
+of holiday exceptions) and times "is every branch open now?" the old way
+(one call per branch, each re-reading and re-parsing the file) against one
+HoursEngine.status call, then the per-session hours check chat applies to
+search results.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import tempfile
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List
+from zoneinfo import ZoneInfo
+
+from app.config_registry import parse_hours
+from app.hours_engine import HoursEngine
+
+from .search import _time
+
+TZ = ZoneInfo("America/New_York")
+
+
+def synthetic_hours(branch_ids: List[str], seed: int = 11) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    start = date.today()
+    exceptions = [
+        {"date": (start + timedelta(days=d)).isoformat(), "hours": None if rng.random() < 0.5 else ["07:00", "14:00"], "note": "holiday"}
+        for d in rng.sample(range(365), 12)
+    ]
+    exceptions += [
+        {"date": (start + timedelta(days=rng.randrange(365))).isoformat(), "branch_ids": [b], "hours": None, "note": "closure"}
+        for b in rng.sample(branch_ids, min(10, len(branch_ids)))
+    ]
+    weekday = ["05:00", "22:00"]
+    return {
+        "timezone": "America/New_York",
+        "default_hours": {"mon": weekday, "tue": weekday, "wed": weekday, "thu": weekday, "fri": weekday, "sat": ["07:00", "19:00"], "sun": None},
+        "sunday_override": {"open_branch_id": branch_ids[0], "hours": ["08:00", "18:00"]},
+        "exceptions": exceptions,
+    }
+
+
+def legacy_open_now(path: Path, branch_id: str) -> bool:
+    """The pre-engine /hours/open-now: read hours.json and rebuild today's window on every call."""
+    cfg = json.loads(path.read_text())
+    now = datetime.now(TZ)
+    day = now.strftime("%a").lower()
+    if day == "sun" and cfg.get("sunday_override"):
+        hours = cfg["sunday_override"]["hours"] if branch_id == cfg["sunday_override"]["open_branch_id"] else None
+    else:
+        hours = cfg["default_hours"].get(day)
+    if hours is None:
+        return False
+    oh, om = map(int, hours[0].split(":"))
+    ch, cm = map(int, hours[1].split(":"))
+    return now.replace(hour=oh, minute=om, second=0, microsecond=0) <= now < now.replace(hour=ch, minute=cm, second=0, microsecond=0)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Opening hours benchmark")
+    ap.add_argument("--branches", type=int, default=60)
+    ap.add_argument("--rounds", type=int, default=2000)
+    args = ap.parse_args()
+
+    branch_ids = [f"b{i:03d}" for i in range(args.branches)]
+    raw = synthetic_hours(branch_ids)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "hours.json"
+        path.write_text(json.dumps(raw))
+        engine = HoursEngine(parse_hours(raw), branch_ids)
+
+        rng = random.Random(5)
+        today = datetime.now(TZ).replace(second=0, microsecond=0)
+        rows = []
+        for _ in range(5000):
+            start = today.replace(hour=rng.randrange(5, 21), minute=rng.choice([0, 15, 30, 45])) + timedelta(days=rng.randrange(30))
+            end = start + timedelta(minutes=rng.choice([30, 45, 60, 90]))
+            rows.append({"branch_id": rng.choice(branch_ids), "start_ts": start.isoformat(), "end_ts": end.isoformat()})
+
+        print(f"{args.branches} branches, {len(raw['exceptions'])} exceptions")
+        print(f"{'case':<36}{'ms':>9}")
+        cases = {
+            "open now, every branch (legacy)": lambda: [legacy_open_now(path, b) for b in branch_ids],
+            "open now, every branch (engine)": lambda: engine.status(),
+            "compile engine (config change)": lambda: HoursEngine(parse_hours(raw), branch_ids),
+            f"hours check, {len(rows)} sessions": lambda: engine.filter(rows),
+        }
+        for name, fn in cases.items():
+            print(f"{name:<36}{_time(fn, args.rounds if 'sessions' not in name else max(1, args.rounds // 20)):>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
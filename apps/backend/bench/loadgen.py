@@ -0,0 +1,147 @@
+"""
+Closed-loop load generator for the Olivia API.
+
+    cd apps/backend
+    python -m bench.loadgen --base-url http://127.0.0.1:8000 --duration 30 --concurrency 32 \\
+        --mix calendar=60,session=20,enroll=5,chat=15
+
+Drives a weighted mix of GET /calendar, GET /sessions/{id}, POST /enroll
+and POST /chat, then prints throughput and p50/p95/p99 latency per endpoint.
+Point the backend at bench/fake_ollama.py to measure the API without a
+model. Note: the enroll share really enrolls (random member ids) in the
+backend's database.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+import uuid
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Dict, List
+
+import httpx
+
+CHAT_MESSAGES = [
+    "swim tomorrow at Blue Ash",
+    "what's swim availability this week",
+    "any HIIT on thursday at Campbell County?",
+    "kids club saturday",
+    "open gym next week at Clippard",
+    "what's available today at my Y",
+]
+BUCKETS = ["swim", "gym", "sports", "kids"]
+
+
+def _pct(xs: List[float], p: float) -> float:
+    if not xs:
+        return 0.0
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(round(p / 100 * (len(xs) - 1))))]
+
+
+class Load:
+    def __init__(self, client: httpx.AsyncClient, branch_ids: List[str], session_ids: List[str]) -> None:
+        self.client = client
+        self.branch_ids = branch_ids
+        self.session_ids = session_ids
+        self.lat: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.status: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+
+    async def calendar(self) -> httpx.Response:
+        start = date.today() + timedelta(days=random.randint(0, 7))
+        params = {"start": start.isoformat(), "end": (start + timedelta(days=random.choice([0, 6]))).isoformat()}
+        if random.random() < 0.7:
+            params["branch_ids"] = ",".join(random.sample(self.branch_ids, k=random.randint(1, 2)))
+        if random.random() < 0.5:
+            params["buckets"] = random.choice(BUCKETS)
+        params["has_spots"] = random.choice(["true", "false"])
+        return await self.client.get("/api/v1/calendar", params=params)
+
+    async def session(self) -> httpx.Response:
+        return await self.client.get(f"/api/v1/sessions/{random.choice(self.session_ids)}")
+
+    async def enroll(self) -> httpx.Response:
+        body = {"session_id": random.choice(self.session_ids), "member_id": f"load_{uuid.uuid4().hex[:10]}"}
+        return await self.client.post("/api/v1/enroll", json=body)
+
+    async def chat(self) -> httpx.Response:
+        body = {
+            "session_id": f"load-{random.randint(0, 500)}",
+            "message": random.choice(CHAT_MESSAGES),
+            "ui_context": {
+                "member_id": "demo_member",
+                "user_group": "front_desk" if random.random() < 0.1 else "member",
+                "only_has_spots": True,
+            },
+        }
+        return await self.client.post("/api/v1/chat", json=body)
+
+    async def worker(self, deadline: float, names: List[str], weights: List[int]) -> None:
+        while time.monotonic() < deadline:
+            name = random.choices(names, weights=weights)[0]
+            t0 = time.perf_counter()
+            try:
+                r = await getattr(self, name)()
+                self.status[name][r.status_code] += 1
+                # 404/409 are normal answers for random session ids / full classes
+                if r.status_code >= 500:
+                    self.errors[name] += 1
+            except httpx.HTTPError:
+                self.errors[name] += 1
+            self.lat[name].append((time.perf_counter() - t0) * 1000)
+
+
+async def _seed_ids(client: httpx.AsyncClient) -> tuple[List[str], List[str]]:
+    branches = (await client.get("/api/v1/branches")).json()["branches"]
+    today = date.today()
+    events = (
+        await client.get(
+            "/api/v1/calendar", params={"start": today.isoformat(), "end": (today + timedelta(days=14)).isoformat()}
+        )
+    ).json()["events"]
+    return [b["id"] for b in branches], [e["id"] for e in events] or ["missing"]
+
+
+async def main() -> None:
+    ap = argparse.ArgumentParser(description="Olivia API load generator")
+    ap.add_argument("--base-url", default="http://127.0.0.1:8000")
+    ap.add_argument("--duration", type=float, default=30.0)
+    ap.add_argument("--concurrency", type=int, default=16)
+    ap.add_argument("--mix", default="calendar=60,session=20,enroll=5,chat=15")
+    ap.add_argument("--timeout", type=float, default=60.0)
+    args = ap.parse_args()
+
+    mix = {k: int(v) for k, v in (x.split("=") for x in args.mix.split(","))}
+    names = [n for n in mix if mix[n] > 0]
+    weights = [mix[n] for n in names]
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        branch_ids, session_ids = await _seed_ids(client)
+        load = Load(client, branch_ids, session_ids)
+        started = time.monotonic()
+        deadline = started + args.duration
+        await asyncio.gather(*(load.worker(deadline, names, weights) for _ in range(args.concurrency)))
+        elapsed = time.monotonic() - started
+
+    print(f"{args.concurrency} workers, {elapsed:.1f}s, mix {args.mix}")
+    print(f"{'endpoint':<10}{'reqs':>8}{'rps':>9}{'err':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'mean ms':>10}  status")
+    for name in names:
+        xs = load.lat[name]
+        codes = " ".join(f"{c}:{n}" for c, n in sorted(load.status[name].items()))
+        print(
+            f"{name:<10}{len(xs):>8}{len(xs) / elapsed:>9.1f}{load.errors[name]:>6}"
+            f"{_pct(xs, 50):>10.1f}{_pct(xs, 95):>10.1f}{_pct(xs, 99):>10.1f}"
+            f"{(statistics.mean(xs) if xs else 0):>10.1f}  {codes}"
+        )
+    total = sum(len(v) for v in load.lat.values())
+    print(f"{'total':<10}{total:>8}{total / elapsed:>9.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
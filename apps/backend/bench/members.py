@@ -0,0 +1,93 @@
+"""
+Member directory: whole-file member_profiles.json vs the members table.
+
+    cd apps/backend
+    python -m bench.members --members 150000
+
+Writes a synthetic roster as JSON, JSON Lines and CSV, streams each into
+a scratch database (time and peak Python memory), compares that with
+json.load of the whole file (what chat used to keep per process), then
+times home-branch lookups through the LRU (hits and misses).
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Tuple
+
+from app import calendar_store, members
+
+from .search import _time
+
+
+def _peak(fn: Callable[[], Any]) -> Tuple[Any, float, float]:
+    """(result, seconds, peak traced MiB)"""
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    out = fn()
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return out, elapsed, peak / (1 << 20)
+
+
+def write_rosters(tmp: Path, n: int, seed: int = 3) -> Tuple[Path, Path, Path]:
+    rng = random.Random(seed)
+    branches = [f"b{i:03d}" for i in range(40)]
+    rows = [
+        {"member_id": f"m{i:07d}", "home_branch_id": rng.choice(branches), "email": f"m{i}@example.com", "phone": f"+1555{i:07d}"}
+        for i in range(n)
+    ]
+    as_json, as_jsonl, as_csv = tmp / "roster.json", tmp / "roster.jsonl", tmp / "roster.csv"
+    as_json.write_text(json.dumps({r["member_id"]: {k: v for k, v in r.items() if k != "member_id"} for r in rows}, indent=2))
+    as_jsonl.write_text("".join(json.dumps(r) + "\n" for r in rows))
+    with as_csv.open("w", newline="") as fp:
+        w = csv.DictWriter(fp, fieldnames=list(rows[0]))
+        w.writeheader()
+        w.writerows(rows)
+    return as_json, as_jsonl, as_csv
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Member directory benchmark")
+    ap.add_argument("--members", type=int, default=150_000)
+    ap.add_argument("--rounds", type=int, default=20000)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        calendar_store.DB_PATH = calendar_store.Path(os.path.join(tmp, "bench.db"))
+        calendar_store.init_db()
+        paths = write_rosters(Path(tmp), args.members)
+
+        profiles, secs, mib = _peak(lambda: json.loads(paths[0].read_text()))
+        print(f"{args.members} members")
+        print(f"{'load':<28}{'seconds':>9}{'peak MiB':>10}")
+        print(f"{'json.load (legacy)':<28}{secs:>9.2f}{mib:>10.1f}")
+        for path in paths:
+            result, secs, mib = _peak(lambda: members.import_file(path))
+            print(f"{'import ' + path.suffix.lstrip('.'):<28}{secs:>9.2f}{mib:>10.1f}  ({result.rows} rows)")
+
+        members.DIRECTORY.invalidate()
+        rng = random.Random(5)
+        hot = [f"m{rng.randrange(args.members):07d}" for _ in range(256)]
+        cold = iter(f"m{i:07d}" for i in range(args.members))
+        for mid in hot:
+            members.home_branch(mid)
+        legacy = lambda: (profiles.get(rng.choice(hot)) or {}).get("home_branch_id")
+        hit = lambda: members.home_branch(rng.choice(hot))
+        miss = lambda: members.home_branch(next(cold))
+        print()
+        print(f"{'lookup':<28}{'us':>9}")
+        for name, fn in (("dict in memory (legacy)", legacy), ("directory, LRU hit", hit), ("directory, LRU miss", miss)):
+            print(f"{name:<28}{_time(fn, min(args.rounds, args.members // 2)) * 1000:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
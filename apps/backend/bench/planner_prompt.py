@@ -0,0 +1,114 @@
+"""
+Planner prompt prefill benchmark: legacy single-message prompt vs the
+stable-prefix prompt in routers/chat.py.
+
+Runs against the Ollama at OLIVIA_OLLAMA_URL (or the fake in bench/fake_ollama.py):
+
+    cd apps/backend
+    python -m bench.planner_prompt --rounds 10
+
+Ollama only reports prompt_eval_count for tokens it had to prefill, so
+KV-cache reuse of the static prefix shows up as fewer prompt tokens and
+a lower prompt_eval time.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import Any, Dict, List
+
+from app import llm
+from app.routers import chat as chat_router
+from app.session_store import SessionState
+
+MESSAGES = [
+    "swim tomorrow at Blue Ash",
+    "what's swim availability this week",
+    "any yoga on thursday?",
+    "kids club saturday at my Y",
+    "open gym next week at Clippard",
+]
+
+UI_CONTEXTS = [
+    {"selected_branch_ids": [], "selected_buckets": ["swim"], "member_id": "demo_member", "user_group": "member"},
+    {"selected_branch_ids": ["campbell_county"], "selected_buckets": [], "user_group": "front_desk"},
+    {"selected_branch_ids": ["blue_ash"], "selected_buckets": ["gym"], "member_id": "demo_member"},
+]
+
+
+def legacy_planner_prompt(
+    branches: List[Dict[str, Any]], req: chat_router.ChatRequest, state: SessionState
+) -> List[Dict[str, str]]:
+    """The pre-refactor prompt: everything (including a per-second timestamp) in one system message."""
+    start_week, end_week = chat_router._week_range_from_now()
+    ui = req.ui_context.model_dump()
+    last = state.options(5)
+    system = f"""
+You are Olivia, a YMCA schedule assistant. Return ONLY JSON.
+
+Today's datetime: {chat_router._now_iso()}
+Default "this week": {start_week}..{end_week}
+
+Branches (use exact ids):
+{json.dumps(branches, indent=2)}
+
+UI context:
+{json.dumps(ui, indent=2)}
+
+Recent suggested options:
+{json.dumps(last, indent=2)}
+""" + chat_router._PLANNER_RULES.split("Return ONLY JSON.", 1)[1]
+    return [{"role": "system", "content": system.strip()}, {"role": "user", "content": req.message.strip()}]
+
+
+async def _run(variant: str, rounds: int) -> Dict[str, float]:
+    branches = chat_router._load_branches()
+    build = legacy_planner_prompt if variant == "legacy" else chat_router._planner_prompt
+    prompt_tokens: List[int] = []
+    prefill_ms: List[float] = []
+    wall_ms: List[float] = []
+    for i in range(rounds):
+        req = chat_router.ChatRequest(
+            session_id=f"bench-{variant}-{i}",
+            message=MESSAGES[i % len(MESSAGES)],
+            ui_context=chat_router.UIContext(**UI_CONTEXTS[i % len(UI_CONTEXTS)]),
+        )
+        state = SessionState(req.session_id)
+        t0 = time.perf_counter()
+        env = await llm.ollama_chat(
+            build(branches, req, state), options=chat_router.PLANNER_OPTIONS, format="json", stage=f"bench_{variant}"
+        )
+        wall_ms.append((time.perf_counter() - t0) * 1000)
+        prompt_tokens.append(int(env.get("prompt_eval_count") or 0))
+        prefill_ms.append(int(env.get("prompt_eval_duration") or 0) / 1e6)
+    return {
+        "prompt_tokens_mean": statistics.mean(prompt_tokens),
+        "prefill_ms_mean": statistics.mean(prefill_ms),
+        "prefill_ms_p50": statistics.median(prefill_ms),
+        "wall_ms_mean": statistics.mean(wall_ms),
+        "prompt_chars": float(sum(len(m["content"]) for m in build(branches, req, state))),
+    }
+
+
+async def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--rounds", type=int, default=10)
+    args = ap.parse_args()
+
+    await llm.startup()
+    try:
+        results = {v: await _run(v, args.rounds) for v in ("legacy", "stable_prefix")}
+    finally:
+        await llm.shutdown()
+
+    cols = ["prompt_chars", "prompt_tokens_mean", "prefill_ms_mean", "prefill_ms_p50", "wall_ms_mean"]
+    print(f"{'variant':<14}" + "".join(f"{c:>20}" for c in cols))
+    for name, row in results.items():
+        print(f"{name:<14}" + "".join(f"{row[c]:>20.1f}" for c in cols))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
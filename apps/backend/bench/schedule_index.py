@@ -0,0 +1,103 @@
+"""
+Calendar and chat reads: SQLite vs the in-process schedule index.
+
+    cd apps/backend
+    pip install numpy
+    python -m bench.schedule_index --branches 60 --days 180 --rounds 20
+
+Reuses the bench.search synthetic schedule, times /calendar (the handler
+called directly) and search_sessions with the index off and on, checks
+both return the same sessions, then times the index build and an
+enrollment refresh.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from app import calendar_store
+from app.calendar_cache import CALENDAR_CACHE
+from app.routers.calendar import get_calendar
+from app.schedule_index import SCHEDULE_INDEX, np
+from app.session_search import search_sessions
+
+from .search import TZ, _time, build_schedule
+
+
+def _ids(events_or_sessions) -> list:
+    # same start_ts may come back in either order; compare as (start, id)
+    return sorted((x.get("start") or x.get("start_time"), x.get("id") or x.get("session_id")) for x in events_or_sessions)
+
+
+def _calendar(*args) -> list:
+    """/calendar events, handler called directly (the response cache is off for this bench)."""
+    return json.loads(get_calendar(*args, if_none_match=None).body)["events"]
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Schedule index benchmark")
+    ap.add_argument("--branches", type=int, default=60)
+    ap.add_argument("--days", type=int, default=180)
+    ap.add_argument("--rounds", type=int, default=20)
+    args = ap.parse_args()
+    if np is None:
+        raise SystemExit("numpy is not installed; the schedule index is disabled")
+    CALENDAR_CACHE.max_entries = 0  # time the reads, not bench.calendar_cache
+
+    with tempfile.TemporaryDirectory() as tmp:
+        calendar_store.DB_PATH = calendar_store.Path(os.path.join(tmp, "bench.db"))
+        n = build_schedule(args.branches, args.days)
+        SCHEDULE_INDEX.invalidate()
+
+        t0 = time.perf_counter()
+        SCHEDULE_INDEX.query(datetime.now(TZ).date().isoformat(), datetime.now(TZ).date().isoformat())
+        build_ms = (time.perf_counter() - t0) * 1000
+
+        today = datetime.now(TZ).date()
+        day = (today + timedelta(days=1)).isoformat()
+        week_end = (today + timedelta(days=6)).isoformat()
+        month_end = (today + timedelta(days=27)).isoformat()
+        cal = {
+            "calendar 1 branch, week": lambda: _calendar(today.isoformat(), week_end, "b001", None, False),
+            "calendar 5 branches, week": lambda: _calendar(today.isoformat(), week_end, "b001,b002,b003,b004,b005", None, False),
+            "calendar all, day": lambda: _calendar(day, day, None, None, False),
+            "calendar all, week, swim": lambda: _calendar(today.isoformat(), week_end, None, "swim", True),
+            "calendar 1 branch, month": lambda: _calendar(today.isoformat(), month_end, "b002", None, True),
+            "chat 1 branch, week, kids": lambda: search_sessions(today.isoformat(), week_end, ["b003"], ["kids"], None, True, 5),
+            "chat all, week, tag": lambda: search_sessions(today.isoformat(), week_end, None, None, ["outdoor"], True, 10),
+        }
+        print(f"{n} sessions ({args.branches} branches x {args.days} days), median of {args.rounds} rounds")
+        print(f"index build: {build_ms:.0f} ms")
+        print(f"{'query':<30}{'sql ms':>9}{'index ms':>10}{'speedup':>9}  same")
+        for name, fn in cal.items():
+            SCHEDULE_INDEX.enabled = False
+            sql_rows = fn()
+            sql_ms = _time(fn, args.rounds)
+            SCHEDULE_INDEX.enabled = True
+            idx_rows = fn()
+            idx_ms = _time(fn, args.rounds)
+            same = _ids(sql_rows) == _ids(idx_rows)
+            print(f"{name:<30}{sql_ms:>9.2f}{idx_ms:>10.2f}{sql_ms / max(idx_ms, 1e-6):>8.1f}x  {same}")
+
+        # an enrollment from "another worker": data_version moves, counts reload on the next read
+        c = calendar_store.conn()
+        c.execute(
+            "UPDATE enrollments SET enrolled = 0, updated_at = ? WHERE session_id IN (SELECT id FROM sessions WHERE branch_id='b001')",
+            (datetime.now(TZ).isoformat(),),
+        )
+        c.commit()
+        c.close()
+        SCHEDULE_INDEX._checked = 0.0
+        t0 = time.perf_counter()
+        events = _calendar(today.isoformat(), week_end, "b001", None, False)
+        refresh_ms = (time.perf_counter() - t0) * 1000
+        fresh = all(e["extendedProps"]["enrolled"] == 0 for e in events)
+        print(f"external write -> refreshed read: {refresh_ms:.1f} ms, counts current: {fresh}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""
+Session search: legacy Python-side filtering vs SQL-pushed search_sessions,
+and the per-tier suggestion fan-out vs single-query suggest_sessions.
+
+    cd apps/backend
+    python -m bench.search --branches 60 --days 180 --rounds 20
+
+Builds a synthetic schedule (branches x days x 12 sessions) in a temporary
+SQLite file with the production schema and indexes, then times typical
+chat queries with both implementations and checks they return the same
+sessions. The suggestion cases include "nothing at my Y": one branch has
+no swim sessions at all, so every fallback tier runs.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+from zoneinfo import ZoneInfo
+
+from app import calendar_store, proximity
+from app.session_search import BUCKET_ALIASES, search_sessions
+from app.suggestions import suggest_sessions
+
+TZ = ZoneInfo("America/New_York")
+
+SLOTS = [(5, 0), (6, 0), (6, 10), (6, 40), (7, 0), (8, 0), (8, 45), (9, 0), (10, 15), (11, 30), (16, 30), (17, 30)]
+CLASSES = [
+    ("lap_swim", "Lap Swim", "swim", ["lap"]),
+    ("family_swim", "Family Swim", "swim", ["open_swim", "family"]),
+    ("aqua_fit", "Aqua Fit", "swim", ["low_impact"]),
+    ("hiit", "HIIT", "gym", ["cardio", "strength"]),
+    ("yoga", "Yoga", "gym", ["mind_body"]),
+    ("cycle", "Cycle", "gym", ["cardio"]),
+    ("pickleball", "Pickleball", "sports", ["racquet"]),
+    ("open_gym", "Open Gym", "sports", ["basketball"]),
+    ("kids_club", "Kids Club", "kids_club", ["childcare"]),
+    ("run_club", "Run Club", "run", ["cardio", "outdoor"]),
+]
+
+
+def legacy_search(
+    date_start: str,
+    date_end: str,
+    branch_ids: Optional[List[str]],
+    buckets: Optional[List[str]],
+    tags: Optional[List[str]],
+    has_spots: bool,
+    limit: int = 5,
+) -> List[Dict[str, Any]]:
+    """The pre-rewrite chat search: date() window over all branches, filters in Python."""
+    c = calendar_store.conn()
+    rows = c.execute(
+        """
+        SELECT
+          s.id AS session_id,
+          s.start_ts, s.end_ts, s.location, s.instructor, s.capacity,
+          b.id AS branch_id, b.name AS branch_name,
+          cl.id AS class_id, cl.name AS class_name, cl.bucket, cl.tags_json,
+          e.enrolled AS enrolled
+        FROM sessions s
+        JOIN branches b ON b.id = s.branch_id
+        JOIN classes cl ON cl.id = s.class_id
+        JOIN enrollments e ON e.session_id = s.id
+        WHERE s.status='scheduled'
+          AND date(s.start_ts) >= date(?)
+          AND date(s.start_ts) <= date(?)
+        """,
+        (date_start, date_end),
+    ).fetchall()
+    c.close()
+    out: List[Dict[str, Any]] = []
+    tag_set = {t.lower() for t in (tags or [])}
+    bucket_set = {BUCKET_ALIASES.get(b.lower(), b.lower()) for b in (buckets or [])}
+    for r in rows:
+        if branch_ids and r["branch_id"] not in branch_ids:
+            continue
+        raw = (r["bucket"] or "").lower()
+        if bucket_set and BUCKET_ALIASES.get(raw, raw) not in bucket_set:
+            continue
+        if tag_set and not tag_set.intersection(t.lower() for t in json.loads(r["tags_json"])):
+            continue
+        cap, enrolled = int(r["capacity"]), int(r["enrolled"])
+        if has_spots and cap - enrolled <= 0:
+            continue
+        out.append({"session_id": r["session_id"], "start_time": r["start_ts"], "tags": json.loads(r["tags_json"])})
+    out.sort(key=lambda x: x["start_time"])
+    return out[: max(1, min(limit, 10))]
+
+
+def legacy_suggest(
+    date_start: str,
+    date_end: str,
+    branch_ids: List[str],
+    buckets: Optional[List[str]],
+    tags: Optional[List[str]],
+    has_spots: bool,
+    limit: int,
+    neighbors: List[Dict[str, Any]],
+) -> List[Dict[str, Any]]:
+    """The pre-rewrite suggestion chain: one search_sessions call per tier and per neighbor."""
+    primary = branch_ids[0]
+    ds, de = date.fromisoformat(date_start), date.fromisoformat(date_end)
+    single_day = (de - ds).days == 1
+    wide = (max(ds - timedelta(days=3), datetime.now(TZ).date()).isoformat(), (de + timedelta(days=3)).isoformat())
+    near = sorted(neighbors, key=lambda n: n["minutes"])[:3]
+
+    results = search_sessions(date_start, date_end, [primary], buckets, tags, has_spots, limit)
+    if not results and single_day:
+        alt = search_sessions(*wide, [primary], buckets, tags, has_spots, limit)
+        results += [x for x in alt if not (date_start <= x["start_time"][:10] <= date_end)]
+    if len(results) <= 1:
+        got: List[Dict[str, Any]] = []
+        for n in near:
+            got += search_sessions(date_start, date_end, [n["branch_id"]], buckets, tags, has_spots, limit)
+        results += sorted(got, key=lambda x: x["start_time"])[: limit - len(results)]
+    if not results and single_day:
+        got = []
+        for n in near:
+            alt = search_sessions(*wide, [n["branch_id"]], buckets, tags, has_spots, limit)
+            got += [x for x in alt if not (date_start <= x["start_time"][:10] <= date_end)]
+        results = sorted(got, key=lambda x: x["start_time"])[:limit]
+    return results
+
+
+def build_schedule(n_branches: int, days: int, seed: int = 7) -> int:
+    rng = random.Random(seed)
+    calendar_store.init_db()
+    c = calendar_store.conn()
+    c.executemany("INSERT INTO branches(id, name) VALUES (?,?)", [(f"b{i:03d}", f"Branch {i} YMCA") for i in range(n_branches)])
+    c.executemany(
+        "INSERT INTO classes(id,name,bucket,tags_json,default_location,default_duration_min) VALUES (?,?,?,?,?,?)",
+        [(cid, name, bucket, json.dumps(tags), "Main", 45) for cid, name, bucket, tags in CLASSES],
+    )
+    calendar_store.sync_class_tags(c)
+    today = datetime.now(TZ).replace(hour=0, minute=0, second=0, microsecond=0)
+    now = today.isoformat()
+    sessions, enrollments = [], []
+    for d in range(days):
+        day = today + timedelta(days=d)
+        for b in range(n_branches):
+            for hh, mm in SLOTS:
+                cid = rng.choice(CLASSES)[0]
+                start = day.replace(hour=hh, minute=mm)
+                sid = f"s_b{b:03d}_{start.strftime('%Y%m%d_%H%M')}_{cid}"
+                cap = rng.choice([8, 12, 16, 20, 25, 30])
+                sessions.append((sid, cid, f"b{b:03d}", start.isoformat(), (start + timedelta(minutes=45)).isoformat(), "Main", "Staff", cap))
+                enrollments.append((sid, cap if rng.random() < 0.15 else rng.randint(0, cap - 1), now))
+    c.executemany(
+        "INSERT INTO sessions(id,class_id,branch_id,start_ts,end_ts,location,instructor,capacity) VALUES (?,?,?,?,?,?,?,?)",
+        sessions,
+    )
+    c.executemany("INSERT INTO enrollments(session_id, enrolled, updated_at) VALUES (?,?,?)", enrollments)
+    # "nothing at my Y": b000 runs no swim classes at all
+    swim = [cid for cid, _, bucket, _ in CLASSES if bucket == "swim"]
+    c.execute(f"DELETE FROM sessions WHERE branch_id='b000' AND class_id IN ({','.join('?' * len(swim))})", swim)
+    c.commit()
+    c.execute("ANALYZE")
+    c.close()
+    return len(sessions)
+
+
+def _time(fn: Callable[[], List[Dict[str, Any]]], rounds: int) -> float:
+    samples = []
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Session search benchmark")
+    ap.add_argument("--branches", type=int, default=60)
+    ap.add_argument("--days", type=int, default=180)
+    ap.add_argument("--rounds", type=int, default=20)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        calendar_store.DB_PATH = calendar_store.Path(os.path.join(tmp, "bench.db"))
+        n = build_schedule(args.branches, args.days)
+        today = datetime.now(TZ).date()
+        tomorrow = (today + timedelta(days=1)).isoformat()
+        week_end = (today + timedelta(days=6)).isoformat()
+        cases = {
+            "1 branch, 1 day": (tomorrow, tomorrow, ["b001"], None, None, True, 5),
+            "1 branch, week, swim": (today.isoformat(), week_end, ["b002"], ["swim"], None, True, 5),
+            "3 branches, week, kids": (today.isoformat(), week_end, ["b003", "b004", "b005"], ["kids"], None, True, 8),
+            "all branches, week": (today.isoformat(), week_end, None, None, None, True, 10),
+            "all branches, week, tag": (today.isoformat(), week_end, None, None, ["outdoor"], True, 5),
+            "1 branch, week, full": (today.isoformat(), week_end, ["b006"], None, None, False, 10),
+        }
+        print(f"{n} sessions ({args.branches} branches x {args.days} days), median of {args.rounds} rounds")
+        print(f"{'query':<28}{'legacy ms':>11}{'new ms':>9}{'speedup':>9}  same")
+        for name, q in cases.items():
+            same = [x["session_id"] for x in legacy_search(*q)] == [x["session_id"] for x in search_sessions(*q)]
+            old_ms = _time(lambda: legacy_search(*q), args.rounds)
+            new_ms = _time(lambda: search_sessions(*q), args.rounds)
+            print(f"{name:<28}{old_ms:>11.2f}{new_ms:>9.2f}{old_ms / max(new_ms, 1e-6):>8.1f}x  {same}")
+
+        branches = [{"id": f"b{i:03d}", "name": f"Branch {i} YMCA"} for i in range(args.branches)]
+        neighbors = [{"branch_id": f"b{i:03d}", "minutes": 6 * i} for i in range(1, min(args.branches, 7))]
+        prox = proximity.parse({"b000": neighbors})
+        no_kids = (tomorrow, (today + timedelta(days=2)).isoformat(), ["b000"], ["kids"], ["outdoor"], True, 5)
+        suggest_cases = {
+            "primary hit": (tomorrow, (today + timedelta(days=2)).isoformat(), ["b000"], ["gym"], None, True, 5),
+            "no swim at my Y (1 day)": (tomorrow, (today + timedelta(days=2)).isoformat(), ["b000"], ["swim"], None, True, 5),
+            "no swim at my Y (week)": (today.isoformat(), week_end, ["b000"], ["swim"], None, True, 5),
+            "nothing anywhere": no_kids,
+        }
+        print()
+        print(f"{'suggestions':<28}{'fan-out ms':>11}{'new ms':>9}{'speedup':>9}  same")
+        for name, q in suggest_cases.items():
+            new = lambda: suggest_sessions(*q, branches, prox)[0]
+            old = lambda: legacy_suggest(*q, neighbors)
+            same = [x["session_id"] for x in old()] == [x["session_id"] for x in new()]
+            old_ms = _time(old, args.rounds)
+            new_ms = _time(new, args.rounds)
+            print(f"{name:<28}{old_ms:>11.2f}{new_ms:>9.2f}{old_ms / max(new_ms, 1e-6):>8.1f}x  {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Shared fixtures: a scratch SQLite database with a small hand-built schedule.
+
+    cd apps/backend
+    python -m pytest
+
+The module singletons (schedule index, data versions, calendar cache) are
+reset around every test and their refresh intervals stretched, so a test
+sees exactly the writes it makes and re-checks only when it asks to.
+"""
+from __future__ import annotations
+
+import json
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import calendar_store
+from app.calendar_cache import CALENDAR_CACHE
+from app.data_version import VERSIONS
+from app.schedule_index import SCHEDULE_INDEX
+
+TZ = calendar_store.TZ
+
+BRANCHES = {"north": "North Branch", "south": "South Branch", "east": "East Branch", "far": "Far Branch"}
+CLASSES = {
+    "lap_swim": ("Lap Swim", "swim", ["lap", "swim"]),
+    "aqua_fit": ("Aqua Fit", "swim", ["aqua", "fitness"]),
+    "yoga": ("Yoga", "gym", ["yoga", "mind-body"]),
+}
+
+
+def day(offset: int) -> datetime:
+    """Local midnight `offset` days from today."""
+    return datetime.now(TZ).replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=offset)
+
+
+def _reset() -> None:
+    SCHEDULE_INDEX.invalidate()
+    VERSIONS.invalidate()
+    CALENDAR_CACHE.clear()
+    calendar_store.reload_class_tags()
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """An initialized scratch database with the test branches and classes, no sessions."""
+    monkeypatch.setattr(calendar_store, "DB_PATH", tmp_path / "olivia.db")
+    monkeypatch.setattr(SCHEDULE_INDEX, "refresh_s", 3600.0)
+    monkeypatch.setattr(VERSIONS, "refresh_s", 3600.0)
+    _reset()
+    calendar_store.init_db()
+    c = calendar_store.conn()
+    c.executemany("INSERT INTO branches(id, name) VALUES (?, ?)", BRANCHES.items())
+    c.executemany(
+        "INSERT INTO classes(id, name, bucket, tags_json, default_location, default_duration_min) VALUES (?, ?, ?, ?, 'Pool', 45)",
+        [(cid, name, bucket, json.dumps(tags)) for cid, (name, bucket, tags) in CLASSES.items()],
+    )
+    calendar_store.sync_class_tags(c)
+    c.commit()
+    c.close()
+    _reset()
+    yield calendar_store.DB_PATH
+    _reset()
+
+
+@pytest.fixture
+def add_session(db) -> Callable[..., str]:
+    """add_session(branch_id, class_id, start, minutes=45, capacity=20, enrolled=0) -> session id."""
+
+    def add(branch_id: str, class_id: str, start: datetime, minutes: int = 45, capacity: int = 20, enrolled: int = 0, session_id: Optional[str] = None) -> str:
+        sid = session_id or f"s_{branch_id}_{start.strftime('%Y%m%d_%H%M')}_{class_id}"
+        now = datetime.now(TZ).isoformat()
+        c = calendar_store.conn()
+        c.execute(
+            "INSERT INTO sessions(id, class_id, branch_id, start_ts, end_ts, location, instructor, capacity) VALUES (?, ?, ?, ?, ?, 'Pool', 'Staff', ?)",
+            (sid, class_id, branch_id, start.isoformat(), (start + timedelta(minutes=minutes)).isoformat(), capacity),
+        )
+        c.execute("INSERT INTO enrollments(session_id, enrolled, updated_at) VALUES (?, ?, ?)", (sid, enrolled, now))
+        c.commit()
+        c.close()
+        SCHEDULE_INDEX.invalidate()
+        return sid
+
+    return add
+
+
+@pytest.fixture
+def client(db) -> TestClient:
+    """The API without its lifespan (no seeding, no model client)."""
+    from app.main import app
+
+    return TestClient(app)
+
+
+def events(body: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """/calendar events by session id."""
+    return {e["id"]: e for e in body["events"]}
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import pytest
+
+from app.calendar_cache import CALENDAR_CACHE
+from app.routers.chat import _enroll_member
+from app.schedule_index import SCHEDULE_INDEX
+
+from conftest import day, events
+
+pytestmark = pytest.mark.skipif(not SCHEDULE_INDEX.enabled, reason="needs numpy for the schedule index")
+
+
+def _calendar(client, branch_ids=None):
+    params = {"start": day(1).date().isoformat(), "end": day(7).date().isoformat()}
+    if branch_ids:
+        params["branch_ids"] = branch_ids
+    return client.get("/api/v1/calendar", params=params)
+
+
+def _read_before_patch(monkeypatch, client):
+    """Make every enrollment serve /calendar between its commit and its index patch."""
+    real = SCHEDULE_INDEX.patch_enrolled
+
+    def patch(session_id, enrolled):
+        for branch_ids in (None, "north"):
+            assert _calendar(client, branch_ids).status_code == 200
+        real(session_id, enrolled)
+
+    monkeypatch.setattr(SCHEDULE_INDEX, "patch_enrolled", patch)
+
+
+@pytest.mark.parametrize("path", ["/enroll", "chat"])
+def test_read_during_enrollment_never_caches_old_count_under_new_etag(client, add_session, monkeypatch, path):
+    sid = add_session("north", "lap_swim", day(2).replace(hour=9), enrolled=3)
+    assert events(_calendar(client).json())[sid]["extendedProps"]["enrolled"] == 3
+    _read_before_patch(monkeypatch, client)
+
+    if path == "chat":
+        _enroll_member(sid, "m1")
+    else:
+        assert client.post("/api/v1/enroll", json={"session_id": sid, "member_id": "m1"}).status_code == 200
+
+    for branch_ids in (None, "north"):
+        r = _calendar(client, branch_ids)
+        assert events(r.json())[sid]["extendedProps"]["enrolled"] == 4
+        # the cached body (if any) is the one for the ETag just handed out
+        assert _calendar(client, branch_ids).content == r.content
+
+
+def test_enrollment_evicts_only_its_branch_and_all_branch_views(client, add_session):
+    sid = add_session("north", "lap_swim", day(2).replace(hour=9))
+    add_session("south", "yoga", day(2).replace(hour=10))
+    for branch_ids in (None, "north", "south"):
+        _calendar(client, branch_ids)
+    assert len(CALENDAR_CACHE._entries) == 3
+
+    assert client.post("/api/v1/enroll", json={"session_id": sid, "member_id": "m1"}).status_code == 200
+    assert [e.scopes for e in CALENDAR_CACHE._entries.values()] == [("south",)]
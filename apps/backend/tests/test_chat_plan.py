@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+import pytest
+
+from app.routers.chat import PLAN_MAX_LIMIT, PLANNER_SCHEMA, PlanParams
+
+
+@pytest.mark.parametrize("raw, limit", [(3, 3), ("4", 4), (10, 5), (0, 1), (-2, 1), (None, 5), ("many", 5)])
+def test_plan_limit_is_clamped_to_the_schema(raw, limit):
+    assert PlanParams(limit=raw).limit == limit
+
+
+def test_schema_and_clamp_agree():
+    schema = PLANNER_SCHEMA["properties"]["params"]["properties"]["limit"]
+    assert (schema["minimum"], schema["maximum"]) == (1, PLAN_MAX_LIMIT)
+    assert PlanParams(limit=PLAN_MAX_LIMIT + 1).limit == schema["maximum"]
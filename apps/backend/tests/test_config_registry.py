@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from app import config_registry
+from app.config_registry import ConfigFile, parse_hours
+
+WEEK = {d: ["07:00", "21:00"] for d in ("mon", "tue", "wed", "thu", "fri", "sat")}
+
+
+def _hours(**changes):
+    raw = {"default_hours": {**WEEK, "sun": None}, "exceptions": [{"date": "2026-12-24", "hours": ["07:00", "14:00"]}]}
+    raw.update(changes)
+    return raw
+
+
+def test_valid_hours_parse():
+    hours = parse_hours(_hours(sunday_override={"open_branch_id": "blue_ash", "hours": ["12:00", "24:00"]}))
+    assert hours.default_hours["mon"] == ("07:00", "21:00") and hours.default_hours["sun"] is None
+    assert hours.sunday_override.hours == ("12:00", "24:00")
+    assert hours.exceptions[0].hours == ("07:00", "14:00")
+
+
+@pytest.mark.parametrize(
+    "pair",
+    [["7:00", "21:00"], ["07:00", "9pm"], ["07:00", "25:00"], ["07:60", "21:00"], ["24:00", "24:00"], ["21:00", "07:00"], ["09:00", "09:00"]],
+)
+def test_bad_hours_are_refused(pair):
+    with pytest.raises(ValueError, match=r"default_hours\.mon"):
+        parse_hours(_hours(default_hours={**WEEK, "mon": pair}))
+    with pytest.raises(ValueError, match=r"exceptions\[0\]\.hours"):
+        parse_hours(_hours(exceptions=[{"date": "2026-12-24", "hours": pair}]))
+
+
+def test_bad_reload_keeps_the_previous_hours(tmp_path, monkeypatch):
+    monkeypatch.setattr(config_registry, "FILES", [])
+    f = ConfigFile("hours.json", parse_hours, check_s=0)
+    f.path = tmp_path / "hours.json"
+    f.path.write_text(json.dumps(_hours()))
+    good = f.get()
+
+    f.path.write_text(json.dumps(_hours(exceptions=[{"date": "2026-12-24", "hours": ["14:00", "07:00"]}])))
+    assert f.get() is good and f.version == 1
+    assert "opening time must be before closing time" in f.last_error
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import pytest
+
+from app import calendar_store, data_version
+from app.data_version import VERSIONS
+
+from conftest import day, events
+
+
+@pytest.fixture
+def sessions(add_session):
+    return {
+        "north": add_session("north", "lap_swim", day(2).replace(hour=9), capacity=10, enrolled=2),
+        "south": add_session("south", "yoga", day(2).replace(hour=10), capacity=10, enrolled=2),
+    }
+
+
+def _calendar(client, branch_ids=None, etag=None):
+    params = {"start": day(1).date().isoformat(), "end": day(7).date().isoformat()}
+    if branch_ids:
+        params["branch_ids"] = branch_ids
+    return client.get("/api/v1/calendar", params=params, headers={"If-None-Match": etag} if etag else {})
+
+
+def _etags(client):
+    return {b: _calendar(client, b).headers["etag"] for b in (None, "north", "south")}
+
+
+def _write(sql, *params):
+    """A write from another connection, as another worker or an import would make it."""
+    c = calendar_store.conn()
+    c.execute(sql, params)
+    c.commit()
+    c.close()
+
+
+def test_calendar_304_until_the_branch_changes(client, sessions):
+    r = _calendar(client, "north")
+    assert r.status_code == 200 and r.headers["cache-control"] == "no-cache"
+    again = _calendar(client, "north", etag=r.headers["etag"])
+    assert again.status_code == 304 and again.content == b"" and again.headers["etag"] == r.headers["etag"]
+    assert _calendar(client, "north", etag=f'W/{r.headers["etag"]}, "other"').status_code == 304
+
+    assert client.post("/api/v1/enroll", json={"session_id": sessions["north"], "member_id": "m1"}).status_code == 200
+    r2 = _calendar(client, "north", etag=r.headers["etag"])
+    assert r2.status_code == 200
+    assert events(r2.json())[sessions["north"]]["extendedProps"]["enrolled"] == 3
+
+
+def test_enrollment_moves_its_branch_and_all_branch_etags_only(client, sessions):
+    before = _etags(client)
+    assert client.post("/api/v1/enroll", json={"session_id": sessions["north"], "member_id": "m1"}).status_code == 200
+    after = _etags(client)
+    assert after[None] != before[None] and after["north"] != before["north"]
+    assert after["south"] == before["south"]
+
+
+def test_session_etag(client, sessions):
+    sid = sessions["south"]
+    r = client.get(f"/api/v1/sessions/{sid}")
+    assert client.get(f"/api/v1/sessions/{sid}", headers={"If-None-Match": r.headers["etag"]}).status_code == 304
+    assert client.post("/api/v1/enroll", json={"session_id": sid, "member_id": "m1"}).status_code == 200
+    r2 = client.get(f"/api/v1/sessions/{sid}", headers={"If-None-Match": r.headers["etag"]})
+    assert r2.status_code == 200 and r2.json()["enrolled"] == 3
+
+
+def test_schedule_edit_moves_its_branch_etag(client, sessions, monkeypatch):
+    monkeypatch.setattr(VERSIONS, "refresh_s", 0.0)
+    before = _etags(client)
+    _write("UPDATE sessions SET capacity = 30 WHERE id = ?", sessions["north"])
+    after = _etags(client)
+    assert after[None] != before[None] and after["north"] != before["north"]
+    assert after["south"] == before["south"]
+    assert events(_calendar(client, "north").json())[sessions["north"]]["extendedProps"]["capacity"] == 30
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "UPDATE classes SET name = 'Yoga Flow' WHERE id = 'yoga'",
+        "UPDATE branches SET name = 'North Family Branch' WHERE id = 'north'",
+    ],
+)
+def test_catalog_edit_moves_every_etag(client, sessions, monkeypatch, sql):
+    monkeypatch.setattr(VERSIONS, "refresh_s", 0.0)
+    before = _etags(client)
+    _write(sql)
+    after = _etags(client)
+    assert all(after[b] != before[b] for b in before)
+
+
+def test_tag_resync_moves_etags_only_when_tags_change(client, sessions, monkeypatch):
+    monkeypatch.setattr(VERSIONS, "refresh_s", 0.0)
+
+    def resync(tags_json=None):
+        c = calendar_store.conn()
+        if tags_json is not None:
+            # class_tags out of step with classes, with the classes trigger out of the way
+            c.execute("DROP TRIGGER trg_classes_update_version")
+            c.execute("UPDATE classes SET tags_json = ? WHERE id = 'yoga'", (tags_json,))
+        calendar_store.sync_class_tags(c)
+        c.commit()
+        c.close()
+
+    before = _etags(client)
+    resync()
+    assert _etags(client) == before
+    resync('["yoga", "stretch"]')
+    assert all(etag != before[b] for b, etag in _etags(client).items())
+
+
+def test_response_version_is_part_of_the_etag(client, sessions, monkeypatch):
+    before = _etags(client)
+    monkeypatch.setattr(data_version, "RESPONSE_VERSION", data_version.RESPONSE_VERSION + 1)
+    assert all(etag != before[b] for b, etag in _etags(client).items())
+
+
+def test_unknown_class_tags_are_cached_until_the_epoch_moves(db, monkeypatch):
+    loads = []
+    load = calendar_store._load_class_tags
+    monkeypatch.setattr(calendar_store, "_load_class_tags", lambda: loads.append(1) or load())
+    monkeypatch.setattr(VERSIONS, "refresh_s", 0.0)
+    VERSIONS.etag("test", "", [])
+
+    assert [calendar_store.class_tags("pilates") for _ in range(3)] == [[]] * 3
+    assert calendar_store.class_tags("yoga") == ["yoga", "mind-body"]
+    assert len(loads) == 1
+
+    _write("INSERT INTO classes(id, name, bucket, tags_json, default_location, default_duration_min) VALUES ('pilates', 'Pilates', 'Gym', '[\"core\"]', 'Studio', 45)")
+    VERSIONS.etag("test", "", [])  # another worker's catalog write moved "#epoch"
+    assert calendar_store.class_tags("pilates") == ["core"]
+    assert len(loads) == 2
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+
+from app import llm, llm_cache
+from app.circuit_breaker import CircuitBreaker
+from app.llm_gate import PRIORITY_FRONT_DESK, PRIORITY_MEMBER, LLMGate
+from app.routers import chat
+from app.session_store import SessionState
+
+from conftest import day
+
+
+def test_single_flight_coalesces_only_within_a_priority(monkeypatch):
+    calls = []
+
+    async def fake_chat(messages, *, priority, **kwargs):
+        calls.append(priority)
+        await asyncio.sleep(0.05)
+        return {"message": {"content": '{"ok": true}'}}
+
+    monkeypatch.setattr(llm, "ollama_chat", fake_chat)
+    messages = [{"role": "user", "content": "swim tomorrow?"}]
+    opts = {"temperature": 0.7}  # not cacheable: every call reaches the flight
+
+    async def burst():
+        return await asyncio.gather(
+            llm.ollama_chat_json(messages, options=opts, priority=PRIORITY_MEMBER),
+            llm.ollama_chat_json(messages, options=opts, priority=PRIORITY_MEMBER),
+            llm.ollama_chat_json(messages, options=opts, priority=PRIORITY_FRONT_DESK),
+        )
+
+    assert asyncio.run(burst()) == [{"ok": True}] * 3
+    assert sorted(calls) == [PRIORITY_FRONT_DESK, PRIORITY_MEMBER]
+
+
+@pytest.fixture
+def ollama(monkeypatch):
+    """Route the shared client to a handler(request) -> httpx.Response, with a fresh gate and breaker."""
+    monkeypatch.setattr(llm, "BREAKER", CircuitBreaker())
+    monkeypatch.setattr(llm, "GATE", LLMGate(max_concurrency=1, max_queue=4, queue_timeout_s=5))
+    monkeypatch.setattr(llm_cache, "CACHE", None)
+
+    def use(handler):
+        monkeypatch.setattr(llm, "_client", httpx.AsyncClient(base_url=llm.OLLAMA_URL, transport=httpx.MockTransport(handler)))
+
+    return use
+
+
+def test_gate_wait_counts_against_the_budget():
+    gate = LLMGate(max_concurrency=1, max_queue=4, queue_timeout_s=5)
+
+    async def run():
+        async with gate.slot():
+            t0 = time.monotonic()
+            with pytest.raises(TimeoutError):
+                async with gate.slot(wait_s=0.05):
+                    pass
+            return time.monotonic() - t0
+
+    assert asyncio.run(run()) < 1
+
+
+def test_budget_spent_in_the_queue_is_a_timeout_not_a_breaker_failure(ollama):
+    ollama(lambda request: httpx.Response(200, json={"message": {"content": "{}"}}))
+
+    async def run():
+        async with llm.GATE.slot():  # every slot taken for longer than the budget
+            with pytest.raises(httpx.TimeoutException):
+                await llm.ollama_chat([{"role": "user", "content": "hi"}], timeout_s=0.05)
+
+    asyncio.run(run())
+    assert llm.BREAKER.snapshot() == CircuitBreaker().snapshot()
+
+
+@pytest.mark.parametrize("run_stage", [chat._run_planner, chat._run_narrator])
+def test_non_json_body_degrades_instead_of_failing(ollama, run_stage):
+    ollama(lambda request: httpx.Response(200, text="<html>upstream proxy error</html>"))
+    req = chat.ChatRequest(message="swim tomorrow")
+    args = ([], req, SessionState("t")) if run_stage is chat._run_planner else (req, {"action": "find_sessions"})
+    assert asyncio.run(run_stage(*args)) is None
+
+
+def test_stream_skips_malformed_lines(ollama):
+    body = "\n".join([
+        '{"message": {"content": "Lap swim "}}',
+        '{"message": {"content": "at 9',  # cut off mid-line
+        "42",
+        "",
+        '{"message": {"content": "tomorrow."}}',
+        '{"message": {"content": ""}, "done": true, "eval_count": 3}',
+    ])
+    ollama(lambda request: httpx.Response(200, text=body))
+
+    async def run():
+        return [piece async for piece in llm.ollama_chat_stream([{"role": "user", "content": "hi"}], stage="test")]
+
+    assert asyncio.run(run()) == ["Lap swim ", "tomorrow."]
+    assert llm.BREAKER.snapshot() == ("closed", 0, 1)  # one call, not a failure
+
+
+def _sse_events(text):
+    out = []
+    for block in text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        out.append((lines["event"], json.loads(lines["data"])))
+    return out
+
+
+@pytest.mark.parametrize("fail", [False, True])
+def test_stream_cut_off_partway_is_replaced_by_the_template(client, add_session, monkeypatch, fail):
+    add_session("north", "lap_swim", day(1).replace(hour=9))
+
+    async def planner_down(*args, **kwargs):
+        raise httpx.ConnectError("no planner in this test")
+
+    async def narrator(*args, **kwargs):
+        yield "Lap swim at North "
+        if fail:
+            raise httpx.ReadError("connection reset mid-stream")
+        yield "at 9 tomorrow."
+
+    monkeypatch.setattr(chat, "ollama_chat_json", planner_down)
+    monkeypatch.setattr(chat, "ollama_chat_stream", narrator)
+    monkeypatch.setattr(chat.hours_engine, "get", lambda: None)  # the test branches have no opening hours
+    body = {"session_id": f"cut-{fail}", "message": "lap swim tomorrow", "ui_context": {"selected_branch_ids": ["north"]}}
+    events = _sse_events(client.post("/api/v1/chat/stream", json=body).text)
+    assert [e for e, _ in events] == ["meta", "token"] + ([] if fail else ["token"]) + ["done"]
+    done = events[-1][1]
+    if fail:
+        assert done.get("narration_replaced") is True
+        assert "Lap swim at North" not in done["assistant_message"]
+        assert done["assistant_message"] == chat.STORE.get(body["session_id"]).history[-1][1]
+    else:
+        assert "narration_replaced" not in done
+        assert "Lap swim at North at 9 tomorrow." in done["assistant_message"]
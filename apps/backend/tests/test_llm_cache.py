@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+
+from app import metrics
+from app.llm_cache import LLMCache
+
+
+def _get(cache, key):
+    return asyncio.run(cache.get(key))
+
+
+def test_sqlite_tier_survives_a_restart(tmp_path):
+    path = str(tmp_path / "llm_cache.db")
+    first = LLMCache(db_path=path)
+    first.put("plan", {"action": "find_sessions"})
+    first.flush()
+
+    before = metrics.value("olivia_llm_cache_hits_total", tier="sqlite")
+    second = LLMCache(db_path=path)
+    assert _get(second, "plan") == {"action": "find_sessions"}
+    assert metrics.value("olivia_llm_cache_hits_total", tier="sqlite") == before + 1
+    assert _get(second, "plan") == {"action": "find_sessions"}  # now from memory
+    assert metrics.value("olivia_llm_cache_hits_total", tier="sqlite") == before + 1
+    assert _get(second, "other") is None
+
+
+def test_sqlite_reads_leave_the_event_loop_thread(tmp_path):
+    cache = LLMCache(db_path=str(tmp_path / "llm_cache.db"))
+    threads = []
+    cache._reader.set_trace_callback(lambda sql: threads.append(threading.get_ident()))
+
+    async def lookup():
+        return threading.get_ident(), await cache.get("missing")
+
+    loop_thread, hit = asyncio.run(lookup())
+    assert hit is None and threads and loop_thread not in threads
+
+
+def test_writes_queued_together_share_one_commit(tmp_path):
+    path = str(tmp_path / "llm_cache.db")
+    cache = LLMCache(db_path=path)
+    cache.flush()  # the startup rollover delete
+    hold, statements = threading.Event(), []
+
+    def trace(sql):
+        hold.wait(5)  # keep the writer on its first batch while the rest queue up
+        statements.append(sql.split()[0].upper())
+
+    cache._db.set_trace_callback(trace)
+    for i in range(50):
+        cache.put(f"k{i}", {"i": i})
+    hold.set()
+    cache.flush()
+
+    assert statements.count("INSERT") == 50
+    assert 1 <= statements.count("COMMIT") <= 2  # the first put alone, at most, then everything queued behind it
+    assert _get(LLMCache(db_path=path), "k49") == {"i": 49}
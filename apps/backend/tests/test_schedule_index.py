@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import pytest
+
+from app import calendar_store
+from app.schedule_index import SCHEDULE_INDEX
+from app.session_search import query_sessions, row_to_session
+
+from conftest import day
+
+pytestmark = pytest.mark.skipif(not SCHEDULE_INDEX.enabled, reason="needs numpy for the schedule index")
+
+
+def _both(monkeypatch, *args, **kwargs):
+    """(index rows, SQL rows) for the same query_sessions call, as response dicts."""
+    indexed = [row_to_session(r) for r in query_sessions(*args, **kwargs)]
+    with monkeypatch.context() as m:
+        m.setattr(SCHEDULE_INDEX, "enabled", False)
+        plain = [row_to_session(r) for r in query_sessions(*args, **kwargs)]
+    return indexed, plain
+
+
+@pytest.fixture
+def week(add_session):
+    ids = []
+    for d in range(1, 8):
+        for hour, (branch_id, class_id) in zip((6, 9, 12, 17, 19), [("north", "lap_swim"), ("south", "yoga"), ("north", "aqua_fit"), ("east", "lap_swim"), ("far", "yoga")]):
+            ids.append(add_session(branch_id, class_id, day(d).replace(hour=hour, minute=15 * (d % 4)), capacity=10, enrolled=(d * hour) % 11))
+    return ids
+
+
+def _window(first=1, last=8):
+    return day(first).isoformat(), day(last).isoformat()
+
+
+@pytest.mark.parametrize(
+    "branch_ids, buckets, tags, has_spots, limit, band",
+    [
+        (None, None, None, False, None, None),
+        (["north"], None, None, False, None, None),
+        (["north", "east"], ["swim"], None, True, None, None),
+        (None, ["Gym"], None, False, 3, None),
+        (None, None, ["LAP"], False, None, ("06:00", "12:00")),
+        (["far"], ["swim"], None, False, None, None),
+    ],
+)
+def test_index_matches_sql(monkeypatch, week, branch_ids, buckets, tags, has_spots, limit, band):
+    indexed, plain = _both(monkeypatch, _window(), branch_ids, buckets, tags, has_spots, limit, band=band)
+    assert indexed == plain
+    assert SCHEDULE_INDEX._cols is not None  # the first call really went through the index
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "UPDATE sessions SET start_ts = replace(start_ts, 'T06:', 'T07:') WHERE branch_id = 'north'",
+        "UPDATE sessions SET capacity = capacity + 5 WHERE branch_id = 'south'",
+        "UPDATE sessions SET instructor = 'Sam', location = 'Studio B' WHERE class_id = 'yoga'",
+        "UPDATE sessions SET status = 'cancelled' WHERE branch_id = 'east'",
+        "UPDATE classes SET name = 'Lap Swim (Lanes 1-4)', bucket = 'Gym' WHERE id = 'lap_swim'",
+        "UPDATE branches SET name = 'North Family Branch' WHERE id = 'north'",
+    ],
+)
+def test_index_sees_in_place_schedule_edits(monkeypatch, week, sql):
+    before, _ = _both(monkeypatch, _window(), None, None, None, False)
+    c = calendar_store.conn()
+    c.execute(sql)
+    c.commit()
+    c.close()
+    SCHEDULE_INDEX.expire()
+
+    indexed, plain = _both(monkeypatch, _window(), None, None, None, False)
+    assert plain != before
+    assert indexed == plain
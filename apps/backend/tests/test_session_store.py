@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import asyncio
+
+import httpx
+import pytest
+
+from app import members
+from app.routers import chat
+from app.session_store import SessionState, SessionStore, SQLiteSessionStore
+
+
+def test_sqlite_stores_on_one_file_share_conversations(tmp_path):
+    path = str(tmp_path / "chat_sessions.db")
+    a, b = SQLiteSessionStore(path), SQLiteSessionStore(path)
+
+    state = a.get("conv")
+    assert state.is_new
+    state.add("user", "swim tomorrow")
+    state.set_suggestions([{"session_id": "s1", "class_name": "Lap Swim", "branch_name": "North", "start_time": "09:00"}])
+    a.save(state)
+
+    seen = b.get("conv")
+    assert list(seen.history) == [("user", "swim tomorrow")] and seen.option(1) == "s1"
+    seen.add("assistant", "Here are the top options:")
+    b.save(seen)
+    assert [role for role, _ in a.get("conv").history] == ["user", "assistant"]
+
+    b.drop("conv")
+    assert a.get("conv").is_new and len(a) == 0
+
+
+def _off_loop(what: str) -> None:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    raise AssertionError(f"{what} called on the event loop")
+
+
+class _OffLoopStore(SessionStore):
+    """Fails the turn if the store is touched on the event loop thread."""
+
+    calls = 0
+
+    def _check(self) -> None:
+        _off_loop("session store")
+        type(self).calls += 1
+
+    def get(self, session_id: str) -> SessionState:
+        self._check()
+        return super().get(session_id)
+
+    def save(self, state: SessionState) -> None:
+        self._check()
+        super().save(state)
+
+
+@pytest.mark.parametrize("path", ["/api/v1/chat", "/api/v1/chat/stream"])
+def test_chat_turn_does_its_blocking_reads_off_the_event_loop(client, monkeypatch, path):
+    async def down(*args, **kwargs):
+        raise httpx.ConnectError("no model in tests")
+
+    looked_up = []
+
+    def home_branch(member_id):
+        _off_loop("member lookup")
+        looked_up.append(member_id)
+        return "north"
+
+    monkeypatch.setattr(chat, "STORE", _OffLoopStore())
+    monkeypatch.setattr(chat, "ollama_chat_json", down)
+    monkeypatch.setattr(members, "home_branch", home_branch)
+    _OffLoopStore.calls = 0
+    body = {"session_id": "t", "message": "any swim classes tomorrow?", "ui_context": {"member_id": "m1"}}
+    assert client.post(path, json=body).status_code == 200
+    assert _OffLoopStore.calls >= 2 and looked_up and set(looked_up) == {"m1"}
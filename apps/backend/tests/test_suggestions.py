@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import pytest
+
+from app.proximity import Proximity
+from app.suggestions import suggest_sessions
+
+from conftest import BRANCHES, day
+
+# south and east are in the nearby radius of north, far is not
+PROXIMITY = Proximity({("north", "south"): 10, ("north", "east"): 20, ("north", "far"): 60})
+BRANCH_LIST = [{"id": b, "name": name} for b, name in BRANCHES.items()]
+
+
+def _suggest(on_day=2, branch_ids=("north",), band=None, buckets=None, limit=5):
+    d = day(on_day).date().isoformat()
+    return suggest_sessions(d, d, list(branch_ids) if branch_ids else None, buckets, None, True, limit, BRANCH_LIST, PROXIMITY, band)
+
+
+def _tiers(results):
+    return [(x["branch_id"], x["suggestion_tier"]) for x in results]
+
+
+def test_primary_only_when_the_branch_has_enough(add_session):
+    add_session("north", "lap_swim", day(2).replace(hour=9))
+    add_session("north", "yoga", day(2).replace(hour=7))
+    add_session("south", "lap_swim", day(2).replace(hour=8))
+    results, meta = _suggest()
+    assert _tiers(results) == [("north", "primary"), ("north", "primary")]
+    assert [x["start_time"][11:16] for x in results] == ["07:00", "09:00"]
+    assert meta["strategy"] == "primary" and meta["fallback_used"] is None
+    assert meta["primary_branch_name"] == "North Branch"
+
+
+def test_nearby_fills_a_thin_answer_nearest_first_within_the_radius(add_session):
+    add_session("north", "lap_swim", day(2).replace(hour=9))
+    add_session("east", "lap_swim", day(2).replace(hour=7))
+    add_session("south", "lap_swim", day(2).replace(hour=8))
+    add_session("far", "lap_swim", day(2).replace(hour=6))
+    results, meta = _suggest()
+    assert _tiers(results) == [("north", "primary"), ("east", "nearby"), ("south", "nearby")]
+    assert {x["branch_id"]: x.get("drive_minutes") for x in results} == {"north": None, "east": 20, "south": 10}
+    assert meta["strategy"] == "nearby_same_day"
+    assert [b["branch_id"] for b in meta["nearby_branches"]] == ["south", "east"]
+    assert meta["tiers"] == {"primary": 1, "other_day": 0, "nearby": 2, "nearby_other_day": 0}
+
+
+def test_other_days_at_the_branch_then_nearby_same_day(add_session):
+    add_session("north", "lap_swim", day(4).replace(hour=9))
+    add_session("north", "lap_swim", day(9).replace(hour=9))  # outside +/- 3 days
+    add_session("south", "yoga", day(2).replace(hour=10))
+    results, meta = _suggest()
+    assert _tiers(results) == [("north", "other_day"), ("south", "nearby")]
+    assert meta["strategy"] == "mixed" and meta["fallback_used"] == "same_branch_other_day"
+    assert meta["primary_count"] == 0
+
+
+def test_nearby_other_day_is_the_last_resort(add_session):
+    add_session("south", "lap_swim", day(3).replace(hour=9))
+    add_session("far", "lap_swim", day(2).replace(hour=9))
+    results, meta = _suggest()
+    assert _tiers(results) == [("south", "nearby_other_day")]
+    assert meta["strategy"] == "nearby_other_day"
+
+
+def test_band_applies_to_every_tier(add_session):
+    add_session("north", "lap_swim", day(2).replace(hour=18))
+    add_session("north", "lap_swim", day(3).replace(hour=7))
+    add_session("south", "lap_swim", day(2).replace(hour=8))
+    add_session("south", "lap_swim", day(2).replace(hour=19))
+    results, meta = _suggest(band=("05:00", "12:00"))
+    assert _tiers(results) == [("north", "other_day"), ("south", "nearby")]
+    assert all(x["start_time"][11:16] < "12:00" for x in results)
+
+
+def test_full_sessions_and_other_buckets_are_left_out(add_session):
+    add_session("north", "lap_swim", day(2).replace(hour=9), capacity=10, enrolled=10)
+    add_session("north", "yoga", day(2).replace(hour=10))
+    results, _ = _suggest(buckets=["swim"])
+    assert results == []
+
+
+@pytest.mark.parametrize("limit", [1, 2])
+def test_each_tier_keeps_its_earliest_rows_up_to_limit(add_session, limit):
+    for hour in (11, 8, 9):
+        add_session("north", "lap_swim", day(2).replace(hour=hour))
+    results, _ = _suggest(limit=limit)
+    assert [x["start_time"][11:13] for x in results] == ["08", "09"][:limit]
+
+
+def test_without_a_branch_searches_everywhere(add_session):
+    add_session("far", "lap_swim", day(2).replace(hour=9))
+    add_session("south", "yoga", day(2).replace(hour=8))
+    results, meta = _suggest(branch_ids=None)
+    assert _tiers(results) == [("south", "primary"), ("far", "primary")]
+    assert meta["primary_branch_id"] is None
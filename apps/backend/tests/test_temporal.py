@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from datetime import date, datetime
+
+import pytest
+
+from app.temporal import TZ, When, parse
+
+NOW = datetime(2026, 10, 14, 8, 0, tzinfo=TZ)  # a Wednesday morning
+TODAY = NOW.date()
+
+
+def d(day: int) -> date:
+    return date(2026, 10, day)
+
+
+@pytest.mark.parametrize(
+    "text, band",
+    [
+        ("between 5 and 7", ("17:00", "19:00")),
+        ("from 5 to 7", ("17:00", "19:00")),
+        ("between 5pm and 7", ("17:00", "19:00")),
+        ("between 9 and 11", ("09:00", "11:00")),
+        ("between 11 and 1", ("11:00", "13:00")),
+        ("from 6:30 to 8", ("18:30", "20:00")),
+        ("between 9 and noon", ("09:00", "12:00")),
+        ("11-1pm", ("11:00", "13:00")),
+        ("5-7pm", ("17:00", "19:00")),
+        ("after 5", ("17:00", "24:00")),
+        ("before 9", ("00:00", "09:00")),
+        ("at 6pm", ("17:30", "18:30")),
+        ("morning after 9", ("09:00", "12:00")),
+    ],
+)
+def test_time_of_day(text, band):
+    assert parse(text, NOW).band == band
+
+
+@pytest.mark.parametrize("text", ["2-3", "lane 4", "from 10pm to 1", "I sat by the pool", "the sun is out"])
+def test_not_a_time_or_day(text):
+    assert parse(text, NOW) is None
+
+
+@pytest.mark.parametrize(
+    "text, start, end",
+    [
+        ("tomorrow", d(15), d(16)),
+        ("saturday", d(17), d(18)),
+        ("on sat", d(17), d(18)),
+        ("this sun", d(18), d(19)),
+        ("wednesday", d(21), d(22)),  # today's weekday means next week's
+        ("this wednesday", d(14), d(15)),
+        ("next 3 days", d(14), d(17)),
+        ("this weekend", d(17), d(19)),
+        ("next week", d(19), d(26)),
+        ("oct 20", d(20), d(21)),
+        ("10/20", d(20), d(21)),
+    ],
+)
+def test_days(text, start, end):
+    got = parse(text, NOW)
+    assert (got.start, got.end) == (start, end)
+
+
+def test_band_over_today_means_tomorrow():
+    assert parse("swim before 7", NOW) == When(d(15), d(16), ("00:00", "07:00"))
+
+
+def test_single_day_with_band_bounds_are_timestamps():
+    assert parse("yoga saturday between 5 and 7", NOW).bounds() == ("2026-10-17T17:00", "2026-10-17T19:00")